@@ -1,13 +1,38 @@
 #!/usr/bin/env bash
 # Session-start hook for gh-cli-search plugin
 # Loads the using-gh-cli-search skill at session start to introduce available skills
+#
+# The JSON payload is cached under ${XDG_CACHE_HOME:-~/.cache}/gh-cli-search/
+# and rebuilt only when the SKILL.md files it is built from (their content, or
+# which ones exist) change, so a normal session start is two file reads with
+# no subprocesses.
+#
+# Environment:
+#   GH_CLI_SEARCH_HOOK_MODE=full   Inject using-gh-cli-search/SKILL.md (default)
+#   GH_CLI_SEARCH_HOOK_MODE=index  Inject only a compact index: one line per skill
+#                                  with its description (much smaller context)
+#   GH_CLI_SEARCH_HOOK_NO_CACHE=1  Build the payload on every run (benchmarking)
 
 set -euo pipefail
 
-# Find the plugin directory (go up from hooks/ to plugin root)
-PLUGIN_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+# Bump when the payload format changes so older cached payloads are ignored
+PAYLOAD_VERSION=2
 
-# Load the intro skill content
+# Find the plugin directory (go up from hooks/ to plugin root) without subshells
+if [ -n "${CLAUDE_PLUGIN_ROOT:-}" ]; then
+    PLUGIN_DIR="$CLAUDE_PLUGIN_ROOT"
+else
+    case "${BASH_SOURCE[0]}" in
+        */*) PLUGIN_DIR="${BASH_SOURCE[0]%/*}/.." ;;
+        *) PLUGIN_DIR=".." ;;
+    esac
+fi
+case "$PLUGIN_DIR" in
+    /*) ;;
+    *) PLUGIN_DIR="${PWD}/${PLUGIN_DIR}" ;;
+esac
+
+MODE="${GH_CLI_SEARCH_HOOK_MODE:-full}"
 SKILL_FILE="${PLUGIN_DIR}/skills/using-gh-cli-search/SKILL.md"
 
 if [ ! -f "$SKILL_FILE" ]; then
@@ -15,16 +40,111 @@ if [ ! -f "$SKILL_FILE" ]; then
     exit 1
 fi
 
-# Read the skill content
-SKILL_CONTENT=$(cat "$SKILL_FILE")
+case "$MODE" in
+    full) SOURCES=("$SKILL_FILE") ;;
+    index) SOURCES=("${PLUGIN_DIR}"/skills/*/SKILL.md) ;;
+    *)
+        echo "Error: unknown GH_CLI_SEARCH_HOOK_MODE '$MODE' (expected full or index)" >&2
+        exit 1
+        ;;
+esac
+
+# One cache file per plugin location and mode
+CACHE_DIR="${XDG_CACHE_HOME:-${HOME:-/tmp}/.cache}/gh-cli-search"
+CACHE_KEY="${PLUGIN_DIR//[^A-Za-z0-9._-]/_}"
+CACHE_FILE="${CACHE_DIR}/session-start-v${PAYLOAD_VERSION}-${MODE}-${CACHE_KEY}.json"
+
+# Sorted source list (glob order); a removed skill changes it without touching any mtime
+printf -v SOURCE_LIST '%s\n' "${SOURCES[@]}"
+
+# Print a file with the read builtin (no cat process)
+emit_file() {
+    local payload=""
+    IFS= read -r -d '' payload < "$1" || true
+    printf '%s' "$payload"
+}
 
-# Escape for JSON
-SKILL_CONTENT_ESCAPED=$(echo "$SKILL_CONTENT" | jq -Rs .)
+# Source list the cached payload was built from ('' if unknown)
+cached_source_list() {
+    CACHED_SOURCE_LIST=""
+    if [ -f "${CACHE_FILE}.sources" ]; then
+        IFS= read -r -d '' CACHED_SOURCE_LIST < "${CACHE_FILE}.sources" || true
+    fi
+}
 
-# Output JSON context injection
-cat <<EOF
-{
-  "hook": "SessionStart",
-  "additional_context": "# gh-cli-search Skills Available\n\n${SKILL_CONTENT_ESCAPED}"
+content_hash() {
+    if command -v sha256sum >/dev/null 2>&1; then
+        { printf '%s' "$SOURCE_LIST"; cat "${SOURCES[@]}"; } | sha256sum | cut -d' ' -f1
+    else
+        { printf '%s' "$SOURCE_LIST"; cat "${SOURCES[@]}"; } | shasum -a 256 | cut -d' ' -f1
+    fi
 }
-EOF
+
+build_context() {
+    printf '# gh-cli-search Skills Available\n\n'
+    if [ "$MODE" = "full" ]; then
+        cat "$SKILL_FILE"
+        return
+    fi
+    # Index: name and description from each skill's frontmatter
+    printf 'If a user asks ANYTHING about GitHub CLI searching, use the Skill tool to load the matching skill before answering:\n\n'
+    awk '
+        FNR == 1 { in_frontmatter = ($0 == "---"); name = ""; next }
+        in_frontmatter && $0 == "---" {
+            if (name != "" && name != "using-gh-cli-search") printf "- **%s**: %s\n", name, description
+            in_frontmatter = 0
+            nextfile
+        }
+        in_frontmatter && /^name:/ { name = $0; sub(/^name:[ \t]*/, "", name) }
+        in_frontmatter && /^description:/ { description = $0; sub(/^description:[ \t]*/, "", description) }
+    ' "${SOURCES[@]}"
+}
+
+build_payload() {
+    build_context | jq -Rs '{hookSpecificOutput: {hookEventName: "SessionStart", additionalContext: .}}'
+}
+
+if [ "${GH_CLI_SEARCH_HOOK_NO_CACHE:-0}" = "1" ]; then
+    build_payload
+    exit 0
+fi
+
+# Fast path: cached payload built from the same sources and newer than each of them
+cached_source_list
+if [ -f "$CACHE_FILE" ] && [ "$CACHED_SOURCE_LIST" = "$SOURCE_LIST" ]; then
+    FRESH=1
+    for source in "${SOURCES[@]}"; do
+        if [ "$source" -nt "$CACHE_FILE" ]; then
+            FRESH=0
+            break
+        fi
+    done
+    if [ "$FRESH" = "1" ]; then
+        emit_file "$CACHE_FILE"
+        exit 0
+    fi
+fi
+
+# A source file was touched or the source list changed: rebuild only if the
+# hash over the list and the content actually changed
+HASH="$(content_hash)"
+if [ -f "$CACHE_FILE" ] && [ -f "${CACHE_FILE}.sha256" ] && [ "$(< "${CACHE_FILE}.sha256")" = "$HASH" ]; then
+    touch "$CACHE_FILE" 2>/dev/null || true
+    printf '%s' "$SOURCE_LIST" > "${CACHE_FILE}.sources" 2>/dev/null || true
+    emit_file "$CACHE_FILE"
+    exit 0
+fi
+
+PAYLOAD="$(build_payload)"
+# Write atomically; an unwritable cache only costs speed
+if mkdir -p "$CACHE_DIR" 2>/dev/null; then
+    TMP_FILE="${CACHE_FILE}.$$"
+    if printf '%s\n' "$PAYLOAD" > "$TMP_FILE" 2>/dev/null; then
+        mv -f "$TMP_FILE" "$CACHE_FILE"
+        printf '%s\n' "$HASH" > "${CACHE_FILE}.sha256" 2>/dev/null || true
+        printf '%s' "$SOURCE_LIST" > "${CACHE_FILE}.sources" 2>/dev/null || true
+    else
+        rm -f "$TMP_FILE"
+    fi
+fi
+printf '%s\n' "$PAYLOAD"
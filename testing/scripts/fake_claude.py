@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+Fake claude - offline stand-in for the claude CLI
+Answers test prompts from recorded reports or a synthetic template and plays
+the reviewer, product-manager and developer agents, so the orchestrator can
+be run and benchmarked without network access or API usage.
+
+Accepts the subset of claude's command line the orchestrator uses:
+    fake_claude.py -p PROMPT [--output-format text|json|stream-json] [...]
+    fake_claude.py -p --input-format stream-json --output-format stream-json [...]
+The second form is a persistent session: one stream-json user message per
+stdin line, each answered in turn until end of input.
+
+json and stream-json results carry synthetic usage: input and output tokens
+from the prompt and answer length, the test's SKILL.md size as a cache write
+the first time a process loads the skill (a cache read afterwards), and a
+cost at Sonnet-class prices.
+
+Configured through environment variables:
+    FAKE_CLAUDE_REPLAY          Report directory to replay test outputs (and
+                                durations, with latency 'replay') from; indexed
+                                once per version of the run in the temp directory
+    FAKE_CLAUDE_TEMPLATE        Synthetic answer for unknown requests; may use
+                                {user_request} and {search_type}
+    FAKE_CLAUDE_LATENCY         fixed:S | uniform:A,B | lognormal:MEDIAN,SIGMA | replay
+                                (default: lognormal:0.5,0.4)
+    FAKE_CLAUDE_TIME_SCALE      Multiplier applied to every latency (default: 1.0)
+    FAKE_CLAUDE_STARTUP_SECONDS Start-up delay paid once per process, standing in for
+                                plugin, hook and skill loading (default: 0)
+    FAKE_CLAUDE_FAILURE_RATE    Probability of a crash (exit 1, API error)
+    FAKE_CLAUDE_RATE_LIMIT_RATE Probability of a 429 rate-limit error
+    FAKE_CLAUDE_TIMEOUT_RATE    Probability of hanging for FAKE_CLAUDE_HANG_SECONDS
+                                (default: 600) so the orchestrator's timeout fires
+    FAKE_CLAUDE_WRONG_RATE      Probability a test is answered without a gh command,
+                                so the same test passes in some runs and fails in
+                                others (for --samples)
+    FAKE_CLAUDE_PM_ACTION       Product-manager decision: halt (default) or rerun
+    FAKE_CLAUDE_BATCH_COST      Latency added per extra request in a batched prompt,
+                                as a fraction of the sampled latency (default: 0.25)
+    FAKE_CLAUDE_MALFORMED_RATE  Probability a batched answer drops a closing marker
+    FAKE_CLAUDE_SEED            Make latencies and injected failures reproducible
+    FAKE_CLAUDE_STATE_DIR       Per-request invocation counters for seeded runs,
+                                so retries of the same request draw new values
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict, Tuple, Optional
+
+DEFAULT_LATENCY = "lognormal:0.5,0.4"
+DEFAULT_TEMPLATE = '```bash\ngh search {search_type} "{user_request}"\n```'
+REQUEST_PATTERN = re.compile(r'^USER REQUEST: (.*)$', re.MULTILINE)
+BATCH_REQUEST_PATTERN = re.compile(r'^USER REQUEST (\d+): (.*)$', re.MULTILINE)
+
+SKILLS_DIR = Path(__file__).resolve().parents[2] / "skills"
+
+# USD per million tokens, by usage field
+PRICES_PER_MTOK = {
+    'input_tokens': 3.0,
+    'cache_creation_input_tokens': 3.75,
+    'cache_read_input_tokens': 0.30,
+    'output_tokens': 15.0,
+}
+
+# Skills whose SKILL.md this process has already put in its context
+_loaded_skills = set()
+
+# Keywords used to pick a subcommand for synthetic answers (first match wins)
+SEARCH_TYPES = [
+    ('commit', 'commits'),
+    ('pull request', 'prs'),
+    (' pr', 'prs'),
+    ('issue', 'issues'),
+    ('repo', 'repos'),
+    ('code', 'code'),
+]
+
+
+def env_float(name: str, default: float) -> float:
+    """Read a float setting from the environment"""
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def make_rng(prompt: str) -> random.Random:
+    """Random generator, reproducible per (seed, prompt, invocation) when seeded"""
+    seed = os.environ.get("FAKE_CLAUDE_SEED")
+    if seed is None:
+        return random.Random()
+
+    prompt_hash = hashlib.sha256(prompt.encode()).hexdigest()
+    state_dir = Path(os.environ.get("FAKE_CLAUDE_STATE_DIR") or Path(tempfile.gettempdir()) / f"fake-claude-{seed}")
+    state_dir.mkdir(parents=True, exist_ok=True)
+    # One byte appended per invocation; O_APPEND keeps concurrent writers consistent
+    fd = os.open(state_dir / prompt_hash, os.O_WRONLY | os.O_APPEND | os.O_CREAT)
+    try:
+        invocation = os.fstat(fd).st_size
+        os.write(fd, b".")
+    finally:
+        os.close(fd)
+    return random.Random(f"{seed}:{prompt_hash}:{invocation}")
+
+
+def replay_index(report_dir: Path) -> Path:
+    """Directory of per-request replay entries for a report directory, built once
+
+    Parsing a report directory takes far longer than answering, so the first
+    invocation writes one small JSON file per user request and later ones read
+    only the entry they need. The index is named by the directory's path and
+    a stamp of its journal and group directories, so a changed run gets a new
+    index; older indexes of the same directory are removed.
+    """
+    stamp = hashlib.sha256()
+    for path in [report_dir / "results.jsonl", *sorted(report_dir.glob("*-tests"))]:
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        stamp.update(f"{path.name}:{stat.st_mtime_ns}:{stat.st_size}\n".encode())
+    prefix = "fake-claude-replay-" + hashlib.sha256(str(report_dir.resolve()).encode()).hexdigest()[:16]
+    index_dir = Path(tempfile.gettempdir()) / f"{prefix}-{stamp.hexdigest()[:16]}"
+    if index_dir.is_dir():
+        return index_dir
+
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    from test_orchestrator.revalidation import load_report_results
+
+    # Build next to the final location and rename, so concurrent fakes never see half an index
+    build_dir = Path(tempfile.mkdtemp(prefix=f"{index_dir.name}.", dir=index_dir.parent))
+    for results in load_report_results(report_dir).values():
+        for result in results:
+            entry_path = build_dir / f"{replay_key(result.user_request)}.json"
+            if result.status == "INFRA_ERROR" or entry_path.exists():
+                continue
+            streams = result.stored_streams()
+            if streams:
+                output = streams[0]
+            else:
+                output = result.full_output()
+                output = output[:-1] if output.endswith("\n") else output
+            entry_path.write_text(json.dumps([output, result.duration_seconds]))
+    try:
+        os.rename(build_dir, index_dir)
+    except OSError:
+        shutil.rmtree(build_dir, ignore_errors=True)  # Another process built it first
+    for stale in index_dir.parent.glob(f"{prefix}-*"):
+        if stale.name != index_dir.name and "." not in stale.name:
+            shutil.rmtree(stale, ignore_errors=True)
+    return index_dir
+
+
+def replay_key(user_request: str) -> str:
+    """File name of a user request's replay entry"""
+    return hashlib.sha256(user_request.encode()).hexdigest()
+
+
+def load_replay(report_dir: Optional[str], user_request: str) -> Tuple[Optional[str], Optional[float]]:
+    """(output, duration) recorded for a user request in a previous report directory
+
+    Returns:
+        (None, None) without a replay directory or a recorded answer
+    """
+    if not report_dir:
+        return None, None
+    try:
+        output, duration = json.loads((replay_index(Path(report_dir)) / f"{replay_key(user_request)}.json").read_text())
+    except FileNotFoundError:
+        return None, None
+    return output, duration
+
+
+def sample_latency(rng: random.Random, recorded: Optional[float]) -> float:
+    """Draw a response latency in seconds from FAKE_CLAUDE_LATENCY"""
+    spec = os.environ.get("FAKE_CLAUDE_LATENCY", DEFAULT_LATENCY)
+    if spec == "replay" and recorded is None:
+        spec = DEFAULT_LATENCY
+    kind, _, params = spec.partition(":")
+    values = [float(v) for v in params.split(",") if v.strip()]
+    if kind == "replay":
+        latency = recorded
+    elif kind == "fixed":
+        latency = values[0]
+    elif kind == "uniform":
+        latency = rng.uniform(values[0], values[1])
+    elif kind == "lognormal":
+        latency = values[0] * rng.lognormvariate(0, values[1])
+    else:
+        raise SystemExit(f"fake_claude: unknown FAKE_CLAUDE_LATENCY '{spec}'")
+    return max(0.0, latency * env_float("FAKE_CLAUDE_TIME_SCALE", 1.0))
+
+
+def search_type_for(user_request: str) -> str:
+    """gh search subcommand a request is about"""
+    request_lower = " " + user_request.lower()
+    return next((value for keyword, value in SEARCH_TYPES if keyword in request_lower), 'code')
+
+
+def fake_usage(prompt: str, text: str, user_request: Optional[str] = None) -> Dict[str, int]:
+    """Synthetic token counts for one answer"""
+    usage = {field: 0 for field in PRICES_PER_MTOK}
+    usage['input_tokens'] = len(prompt) // 4
+    usage['output_tokens'] = max(1, len(text) // 4)
+    if user_request is not None:
+        skill = f"gh-search-{search_type_for(user_request)}"
+        skill_file = SKILLS_DIR / skill / "SKILL.md"
+        skill_tokens = skill_file.stat().st_size // 4 if skill_file.exists() else 2000
+        field = 'cache_read_input_tokens' if skill in _loaded_skills else 'cache_creation_input_tokens'
+        usage[field] = skill_tokens
+        _loaded_skills.add(skill)
+    return usage
+
+
+def synthetic_answer(user_request: str) -> str:
+    """Build a plausible gh command answer for a request"""
+    search_type = search_type_for(user_request)
+    template = os.environ.get("FAKE_CLAUDE_TEMPLATE", DEFAULT_TEMPLATE).replace("\\n", "\n")
+    return template.format(user_request=user_request.replace('"', "'"), search_type=search_type)
+
+
+def write_notes(prompt: str, name: str, title: str, body: str) -> None:
+    """Write an agent notes file to the path named in the prompt"""
+    match = re.search(rf'Write {re.escape(name)} to: (\S+)', prompt)
+    if not match:
+        return
+    commit = re.search(r'\*\*Git Commit:\*\* ([0-9a-z]+)', prompt)
+    header = f"**Git Commit:** {commit.group(1)}\n\n" if commit else ""
+    Path(match.group(1)).write_text(f"{header}# {title}\n\n{body}\n")
+
+
+def agent_answer(prompt: str) -> str:
+    """Play one of the orchestrator's agents, writing its notes file"""
+    if "headless test-reviewer agent for ONE test group" in prompt:
+        write_notes(prompt, "GROUP-REVIEWER-NOTES.md", "Group Reviewer Notes", "Generated by fake_claude.py; no analysis was performed.")
+        return "Group review complete."
+    if "headless test-reviewer agent" in prompt:
+        write_notes(prompt, "REVIEWER-NOTES.md", "Test Reviewer Notes", "Generated by fake_claude.py; no analysis was performed.")
+        return "Review complete."
+    if "headless product-manager agent" in prompt:
+        action = os.environ.get("FAKE_CLAUDE_PM_ACTION", "halt")
+        write_notes(prompt, "PM-NOTES.md", "Product Manager Notes", f"Generated by fake_claude.py. Decision: {action}.")
+        return json.dumps({"action": action, "reasoning": "fake_claude.py scripted decision", "confidence": "high"})
+    if "headless developer agent" in prompt:
+        # Notes only - the fake developer never edits the repository
+        write_notes(prompt, "DEVELOPER-NOTES.md", "Developer Notes", "Generated by fake_claude.py; no changes were made.")
+        return "No changes made."
+    return "fake_claude.py: unrecognized prompt."
+
+
+def result_event(text: str, latency: float, usage: Dict[str, int]) -> Dict:
+    """Final result event of a json or stream-json run"""
+    cost = sum(usage[field] * price for field, price in PRICES_PER_MTOK.items()) / 1e6
+    return {"type": "result", "subtype": "success", "is_error": False, "duration_ms": int(latency * 1000),
+            "duration_api_ms": int(latency * 1000), "result": text, "total_cost_usd": cost, "usage": usage}
+
+
+def emit(text: str, output_format: str, latency: float, usage: Dict[str, int]) -> None:
+    """Print the answer in the requested output format, spread over `latency` seconds"""
+    if output_format == "stream-json":
+        print(json.dumps({"type": "system", "subtype": "init", "model": "fake"}), flush=True)
+        chunks = [text[i:i + 16] for i in range(0, len(text), 16)] or [""]
+        for chunk in chunks:
+            time.sleep(latency / len(chunks))
+            event = {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": chunk}}
+            print(json.dumps({"type": "stream_event", "event": event}), flush=True)
+        print(json.dumps({"type": "assistant", "message": {"content": [{"type": "text", "text": text}]}}), flush=True)
+        print(json.dumps(result_event(text, latency, usage)), flush=True)
+        return
+
+    time.sleep(latency)
+    if output_format == "json":
+        print(json.dumps(result_event(text, latency, usage)))
+    else:
+        print(text)
+
+
+def inject_failure(rng: random.Random, latency: float) -> Optional[int]:
+    """Simulate a hang, rate limit or crash at the configured rates
+
+    Returns:
+        Exit code if a failure was injected, otherwise None
+    """
+    # One draw so the rates are exclusive
+    roll = rng.random()
+    timeout_rate = env_float("FAKE_CLAUDE_TIMEOUT_RATE", 0.0)
+    rate_limit_rate = env_float("FAKE_CLAUDE_RATE_LIMIT_RATE", 0.0)
+    failure_rate = env_float("FAKE_CLAUDE_FAILURE_RATE", 0.0)
+    if roll < timeout_rate:
+        time.sleep(env_float("FAKE_CLAUDE_HANG_SECONDS", 600.0))
+        return 1
+    roll -= timeout_rate
+    if roll < rate_limit_rate:
+        time.sleep(latency * 0.1)
+        print("API Error: 429 rate limit exceeded", file=sys.stderr)
+        return 1
+    roll -= rate_limit_rate
+    if roll < failure_rate:
+        time.sleep(latency * 0.5)
+        print("API Error: 500 Internal server error (injected by fake_claude.py)", file=sys.stderr)
+        return 1
+    return None
+
+
+def batch_answer(rng: random.Random, requests: list, replay_dir: Optional[str]) -> str:
+    """Answer a batched prompt in its numbered block format"""
+    blocks = []
+    for number, user_request in requests:
+        output = load_replay(replay_dir, user_request)[0]
+        blocks.append(f"=== ANSWER {number} ===\n{output if output is not None else synthetic_answer(user_request)}\n"
+                      f"=== END ANSWER {number} ===")
+    if rng.random() < env_float("FAKE_CLAUDE_MALFORMED_RATE", 0.0):
+        blocks[-1] = blocks[-1].rsplit("\n", 1)[0]
+    return "\n".join(blocks)
+
+
+def answer(prompt: str, output_format: str) -> int:
+    """Answer one prompt
+
+    Returns:
+        Exit code (non-zero if a failure was injected)
+    """
+    rng = make_rng(prompt)
+    request_match = REQUEST_PATTERN.search(prompt)
+    batch_requests = BATCH_REQUEST_PATTERN.findall(prompt)
+
+    if not request_match and not batch_requests:
+        text = agent_answer(prompt)
+        emit(text, output_format, sample_latency(rng, None), fake_usage(prompt, text))
+        return 0
+
+    replay_dir = os.environ.get("FAKE_CLAUDE_REPLAY")
+    if batch_requests:
+        latency = sample_latency(rng, None) * (1 + env_float("FAKE_CLAUDE_BATCH_COST", 0.25) * (len(batch_requests) - 1))
+        exit_code = inject_failure(rng, latency)
+        if exit_code is not None:
+            return exit_code
+        text = batch_answer(rng, batch_requests, replay_dir)
+        emit(text, output_format, latency, fake_usage(prompt, text, batch_requests[0][1]))
+        return 0
+
+    user_request = request_match.group(1)
+    output, recorded = load_replay(replay_dir, user_request)
+    latency = sample_latency(rng, recorded)
+    exit_code = inject_failure(rng, latency)
+    if exit_code is not None:
+        return exit_code
+
+    text = output if output is not None else synthetic_answer(user_request)
+    if rng.random() < env_float("FAKE_CLAUDE_WRONG_RATE", 0.0):
+        text = "I could not determine the right gh command for this request."
+    emit(text, output_format, latency, fake_usage(prompt, text, user_request))
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Offline stand-in for the claude CLI")
+    parser.add_argument('-p', '--print', dest='prompt', nargs='?', default=None)
+    parser.add_argument('--input-format', default='text', choices=['text', 'stream-json'])
+    parser.add_argument('--output-format', default='text', choices=['text', 'json', 'stream-json'])
+    args, _ = parser.parse_known_args()
+
+    time.sleep(env_float("FAKE_CLAUDE_STARTUP_SECONDS", 0.0) * env_float("FAKE_CLAUDE_TIME_SCALE", 1.0))
+
+    if args.input_format != 'stream-json':
+        if args.prompt is None:
+            parser.error("a prompt is required unless --input-format stream-json is used")
+        return answer(args.prompt, args.output_format)
+
+    # Persistent session: answer user messages until stdin closes
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        message = json.loads(line).get('message', {})
+        content = message.get('content', '')
+        if isinstance(content, list):
+            content = "".join(block.get('text', '') for block in content if block.get('type') == 'text')
+        exit_code = answer(content, args.output_format)
+        if exit_code:
+            return exit_code
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
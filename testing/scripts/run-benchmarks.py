@@ -0,0 +1,13 @@
+#!/usr/bin/env python3
+"""
+Orchestrator Benchmarks - Measures test suite throughput and scaling
+Runs the orchestrator against the fake claude backend across engines,
+worker counts and suite sizes, and compares the results to a baseline
+"""
+
+import sys
+
+from test_orchestrator.benchmark import main
+
+if __name__ == "__main__":
+    sys.exit(main())
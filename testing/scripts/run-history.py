@@ -0,0 +1,13 @@
+#!/usr/bin/env python3
+"""
+Test History - Queries the SQLite index of all test runs
+Indexes new report directories (backfilling older markdown-only runs on
+first use) and answers questions about pass rates, durations and failures
+"""
+
+import sys
+
+from test_orchestrator.history_cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())
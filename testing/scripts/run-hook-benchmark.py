@@ -0,0 +1,13 @@
+#!/usr/bin/env python3
+"""
+Hook Benchmark - Measures SessionStart hook latency and injected context size
+Runs hooks/session-start.sh uncached, with a cold cache and with a warm cache
+in each payload mode, optionally next to an older version of the hook
+"""
+
+import sys
+
+from test_orchestrator.hook_benchmark import main
+
+if __name__ == "__main__":
+    sys.exit(main())
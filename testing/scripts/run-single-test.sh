@@ -2,6 +2,9 @@
 # Run a single test using Claude Code headless mode
 # This script provides a CLEAN test - only the user request, no hints
 # Usage: ./run-single-test.sh <user-request>
+# Set TEST_OUTPUT_FORMAT=json for a result document with token usage and cost (used by the orchestrator)
+# or stream-json to stream partial output (used by --early-exit)
+# Set CLAUDE_BIN to run a different claude executable (e.g. fake_claude.py)
 
 set -e
 
@@ -13,6 +16,12 @@ if [ -z "$USER_REQUEST" ]; then
     exit 1
 fi
 
+OUTPUT_FORMAT="${TEST_OUTPUT_FORMAT:-text}"
+STREAM_FLAGS=()
+if [ "$OUTPUT_FORMAT" = "stream-json" ]; then
+    STREAM_FLAGS=(--verbose --include-partial-messages)
+fi
+
 # Execute Claude with ONLY the user request
 # No test criteria, no hints - authentic skill application test
 # Minimal tools to prevent slowdowns and hanging
@@ -20,7 +29,8 @@ fi
 # Skill: Required for using gh-cli-search skills
 # bypassPermissions: Prevents interactive prompts
 # NO episodic memory: Add explicit instruction to skip it
-claude -p "CRITICAL INSTRUCTIONS:
+# Keep this prompt in sync with TEST_PROMPT_TEMPLATE in test_orchestrator/config.py
+"${CLAUDE_BIN:-claude}" -p "CRITICAL INSTRUCTIONS:
 1. Identify which gh-cli-search skill is needed: gh-search-code, gh-search-issues, gh-search-prs, gh-search-repos, gh-search-commits, or gh-cli-setup
 2. Use the Skill tool to load that skill
 3. Follow the skill's documentation to generate the correct command
@@ -29,6 +39,6 @@ claude -p "CRITICAL INSTRUCTIONS:
 USER REQUEST: ${USER_REQUEST}
 
 Provide ONLY the gh command in a code block. No explanations." \
---output-format text \
+--output-format "$OUTPUT_FORMAT" "${STREAM_FLAGS[@]}" \
 --allowedTools "Read,Skill" \
 --permission-mode bypassPermissions
@@ -1,7 +1,8 @@
 """Agent invocation modules"""
 
 from .test_reviewer import run_test_reviewer
+from .group_reviewer import GroupReviewPipeline, run_group_reviewer
 from .product_manager import run_product_manager
 from .developer import run_developer_agent
 
-__all__ = ['run_test_reviewer', 'run_product_manager', 'run_developer_agent']
+__all__ = ['run_test_reviewer', 'GroupReviewPipeline', 'run_group_reviewer', 'run_product_manager', 'run_developer_agent']
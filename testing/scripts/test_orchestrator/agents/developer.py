@@ -1,9 +1,12 @@
 """Developer agent invocation"""
 
+import time
 import subprocess
 from pathlib import Path
 
-from ..config import DEVELOPER_AGENT, REPO_ROOT
+from ..config import DEVELOPER_AGENT, REPO_ROOT, claude_bin
+from ..tracing import tracer
+from ..usage import decode_json_result, record_agent_usage
 
 
 def run_developer_agent(report_dir: Path, verbose: bool = False) -> bool:
@@ -79,19 +82,26 @@ Begin your implementation now."""
     try:
         # Execute headless agent
         # In verbose mode, output goes directly to terminal; otherwise capture it
-        result = subprocess.run(
-            [
-                'claude',
-                '-p', full_prompt,
-                '--output-format', 'text',
-                '--allowedTools', 'Read,Write,Edit,Bash,Grep,Glob',
-                '--permission-mode', 'bypassPermissions'
-            ],
-            capture_output=not verbose,
-            text=True,
-            timeout=600,  # 10 minute timeout
-            cwd=str(REPO_ROOT)
-        )
+        # as json, whose result document carries token usage and cost
+        started = time.monotonic()
+        with tracer.span("developer", category="agent"):
+            result = subprocess.run(
+                [
+                    claude_bin(),
+                    '-p', full_prompt,
+                    '--output-format', 'text' if verbose else 'json',
+                    '--allowedTools', 'Read,Write,Edit,Bash,Grep,Glob',
+                    '--permission-mode', 'bypassPermissions'
+                ],
+                capture_output=not verbose,
+                text=True,
+                timeout=600,  # 10 minute timeout
+                cwd=str(REPO_ROOT)
+            )
+
+        # Usage is unknown in verbose mode (the text went straight to the terminal)
+        usage = decode_json_result(result.stdout, "")[2] if not verbose else {}
+        record_agent_usage(report_dir, "developer", usage, time.monotonic() - started)
 
         if result.returncode == 0:
             print("✓ Developer agent completed successfully")
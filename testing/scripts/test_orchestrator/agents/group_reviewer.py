@@ -0,0 +1,178 @@
+"""Per-group test reviewer passes (--pipelined-review)
+
+Each group's reviewer pass starts in the background as soon as its group
+report is written, so review overlaps with the groups still executing.
+The final test-reviewer run then merges the group notes into
+REVIEWER-NOTES.md instead of analyzing every failure itself.
+"""
+
+import time
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import List, Dict, Optional
+
+from ..config import (
+    TEST_REVIEWER_AGENT, REPO_ROOT, GROUP_REVIEWER_NOTES_FILENAME, GROUP_REVIEW_WORKERS,
+    GROUP_REVIEW_TIMEOUT_SECONDS, claude_bin, print_lock
+)
+from ..execution import run_captured, request_shutdown
+from ..tracing import tracer
+from ..usage import UsageBudget, decode_json_result, record_agent_usage, format_usage
+
+
+def build_group_review_prompt(group_dir: Path, group_name: str, start_commit_id: str) -> str:
+    """Build the prompt for one group's reviewer pass
+
+    Args:
+        group_dir: Group report directory (holds REPORT.md and the test reports)
+        group_name: Name of the test group
+        start_commit_id: Git commit ID when test run started
+
+    Returns:
+        Full prompt for the headless reviewer
+    """
+    agent_prompt = TEST_REVIEWER_AGENT.read_text()
+    notes_path = group_dir / GROUP_REVIEWER_NOTES_FILENAME
+    return f"""You are executing as a headless test-reviewer agent for ONE test group.
+
+Other groups are still running; a final reviewer will merge your notes with
+those of the other groups into REVIEWER-NOTES.md, so analyze only this group.
+
+Group: {group_name}
+Group report: {group_dir}/REPORT.md
+Individual test reports: {group_dir}/<test-number>.md
+Git commit ID when test started: {start_commit_id}
+
+Follow these instructions from the agent definition, scoped to this group:
+
+{agent_prompt}
+
+IMPORTANT:
+1. **FIRST**: Read testing/GUIDANCE.md for human decisions and product philosophy
+2. Read the group report, not the master REPORT.md (it doesn't exist yet)
+3. Write {GROUP_REVIEWER_NOTES_FILENAME} to: {notes_path}
+4. **CRITICAL**: Start {GROUP_REVIEWER_NOTES_FILENAME} with a header line: "**Git Commit:** {start_commit_id}" before any other content
+5. Use the REVIEWER-NOTES.md sections (Executive Summary, Failure Patterns, Root Cause Breakdown,
+   Actionable Recommendations) for this group only; skip the Group Status table
+6. Be brief - sample at most 3 representative failures
+7. Question test validity before assuming skills are wrong (per GUIDANCE.md)
+
+Begin your analysis now."""
+
+
+def run_group_reviewer(report_dir: Path, group_name: str, start_commit_id: str,
+                       budget: Optional[UsageBudget] = None) -> bool:
+    """Run one group's reviewer pass
+
+    Output is always captured (several passes may run at once), so usage is
+    recorded even in verbose mode.
+
+    Args:
+        report_dir: Current test run report directory
+        group_name: Name of the test group to review
+        start_commit_id: Git commit ID when test run started
+        budget: Spending limit to charge the pass to
+
+    Returns:
+        True if the pass wrote its notes file
+    """
+    group_dir = report_dir / group_name
+    notes_path = group_dir / GROUP_REVIEWER_NOTES_FILENAME
+    notes_path.unlink(missing_ok=True)  # Left over from an interrupted run
+
+    started = time.monotonic()
+    with tracer.track(), tracer.span("group review", category="agent", args={'group': group_name}):
+        _, stderr, usage = decode_json_result(*run_captured(
+            [
+                claude_bin(),
+                '-p', build_group_review_prompt(group_dir, group_name, start_commit_id),
+                '--output-format', 'json',
+                '--allowedTools', 'Read,Bash,Write,Grep',
+                '--permission-mode', 'bypassPermissions'
+            ],
+            GROUP_REVIEW_TIMEOUT_SECONDS,
+            cwd=str(REPO_ROOT)
+        ))
+    seconds = time.monotonic() - started
+    record_agent_usage(report_dir, f"group-reviewer:{group_name}", usage, seconds, announce=False)
+    if budget:
+        budget.add(usage)
+
+    success = notes_path.exists() and "ERROR:" not in stderr
+    with print_lock:
+        if success:
+            print(f"  [{group_name}] Group review complete in {seconds:.1f}s ({format_usage(usage)})")
+        else:
+            reason = next((line for line in stderr.splitlines() if line.startswith("ERROR:")), "no notes written")
+            print(f"  [{group_name}] Group review failed: {reason}")
+    return success
+
+
+class GroupReviewPipeline:
+    """Background reviewer passes for groups whose reports are complete
+
+    Usage:
+        reviews = GroupReviewPipeline(report_dir, start_commit_id)
+        reviews.submit(group_name)  # as each group report is written
+        ...
+        notes = reviews.wait()  # notes files for the final merge
+    """
+
+    def __init__(self, report_dir: Path, start_commit_id: str, budget: Optional[UsageBudget] = None,
+                 workers: int = GROUP_REVIEW_WORKERS):
+        self.report_dir = report_dir
+        self.start_commit_id = start_commit_id
+        self.budget = budget
+        self.skipped: List[str] = []  # Groups not reviewed because the budget ran out
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="group-review")
+
+    def submit(self, group_name: str) -> None:
+        """Start a reviewer pass for a group whose report has just been written"""
+        with self._lock:
+            if group_name in self._futures:
+                return
+            if self.budget and self.budget.exceeded:
+                self.skipped.append(group_name)
+                return
+            self._futures[group_name] = self._executor.submit(self._review, group_name)
+
+    def _review(self, group_name: str) -> bool:
+        if self.budget and self.budget.exceeded:
+            with self._lock:
+                self.skipped.append(group_name)
+            return False
+        return run_group_reviewer(self.report_dir, group_name, self.start_commit_id, self.budget)
+
+    def wait(self) -> List[Path]:
+        """Wait for every submitted pass to finish
+
+        Returns:
+            Notes files of the groups reviewed successfully, in group order
+        """
+        with self._lock:
+            futures = dict(self._futures)
+        running = sum(1 for future in futures.values() if not future.done())
+        if running:
+            print(f"Waiting for {running} group review(s) to finish...")
+        self._executor.shutdown(wait=True)
+
+        notes = []
+        for group_name in sorted(futures):
+            try:
+                reviewed = futures[group_name].result()
+            except Exception as e:
+                print(f"  [{group_name}] Group review error: {str(e)}")
+                reviewed = False
+            if reviewed:
+                notes.append(self.report_dir / group_name / GROUP_REVIEWER_NOTES_FILENAME)
+        print(f"Group reviews: {len(notes)} of {len(futures)} completed"
+              f"{', ' + str(len(self.skipped)) + ' skipped (budget)' if self.skipped else ''}")
+        return notes
+
+    def cancel(self) -> None:
+        """Drop queued passes and kill running ones (Ctrl-C)"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        request_shutdown()
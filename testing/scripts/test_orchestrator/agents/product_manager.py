@@ -1,12 +1,15 @@
 """Product manager agent invocation"""
 
+import time
 import subprocess
 import json
 import re
 from pathlib import Path
 from typing import List, Dict
 
-from ..config import PRODUCT_MANAGER_AGENT, REPO_ROOT
+from ..config import PRODUCT_MANAGER_AGENT, REPO_ROOT, claude_bin
+from ..tracing import tracer
+from ..usage import result_usage, record_agent_usage
 
 
 def run_product_manager(report_dir: Path, all_report_dirs: List[Path], start_commit_id: str, max_runs: int, verbose: bool = False) -> Dict:
@@ -90,7 +93,7 @@ Follow these instructions from the agent definition:
 IMPORTANT:
 1. **FIRST**: Read testing/GUIDANCE.md for human decisions and product philosophy
 2. Use the report directory: {report_dir}
-3. Read REPORT.md for test results
+3. Read DIGEST.md for test results and the change since the previous run (REPORT.md only for details it lacks)
 4. Read REVIEWER-NOTES.md for failure analysis
 5. {"**READ PREVIOUS PM-NOTES.md FILES** (listed above)" if previous_runs else "This is the first test run in this session (no previous context)"}
 6. Write PM-NOTES.md to: {report_dir}/PM-NOTES.md
@@ -109,19 +112,29 @@ Begin your analysis now."""
         if verbose:
             print("Note: PM output is captured (not streamed) to parse JSON decision\n")
 
-        result = subprocess.run(
-            [
-                'claude',
-                '-p', full_prompt,
-                '--output-format', 'json',
-                '--allowedTools', 'Read,Bash,Write,Grep',
-                '--permission-mode', 'bypassPermissions'
-            ],
-            capture_output=True,  # Always capture for PM to parse JSON
-            text=True,
-            timeout=180,  # 3 minute timeout
-            cwd=str(REPO_ROOT)
-        )
+        started = time.monotonic()
+        with tracer.span("product-manager", category="agent"):
+            result = subprocess.run(
+                [
+                    claude_bin(),
+                    '-p', full_prompt,
+                    '--output-format', 'json',
+                    '--allowedTools', 'Read,Bash,Write,Grep',
+                    '--permission-mode', 'bypassPermissions'
+                ],
+                capture_output=True,  # Always capture for PM to parse JSON
+                text=True,
+                timeout=180,  # 3 minute timeout
+                cwd=str(REPO_ROOT)
+            )
+
+        # Token usage and cost come from the json result document
+        try:
+            output_data = json.loads(result.stdout)
+        except json.JSONDecodeError:
+            output_data = None
+        usage = result_usage(output_data) if isinstance(output_data, dict) else {}
+        record_agent_usage(report_dir, "product-manager", usage, time.monotonic() - started)
 
         if result.returncode != 0:
             print(f"✗ Product manager failed with exit code {result.returncode}")
@@ -1,13 +1,17 @@
 """Test reviewer agent invocation"""
 
+import time
 import subprocess
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
-from ..config import TEST_REVIEWER_AGENT, REPO_ROOT
+from ..config import TEST_REVIEWER_AGENT, REPO_ROOT, claude_bin
+from ..tracing import tracer
+from ..usage import decode_json_result, record_agent_usage
 
 
-def run_test_reviewer(report_dir: Path, all_report_dirs: List[Path], start_commit_id: str, verbose: bool = False) -> bool:
+def run_test_reviewer(report_dir: Path, all_report_dirs: List[Path], start_commit_id: str, verbose: bool = False,
+                      group_notes: Optional[List[Path]] = None) -> bool:
     """Invoke the test-reviewer agent as a headless agent
 
     Args:
@@ -15,6 +19,8 @@ def run_test_reviewer(report_dir: Path, all_report_dirs: List[Path], start_commi
         all_report_dirs: List of all report directories (existing + current)
         start_commit_id: Git commit ID when test run started
         verbose: Whether to show real-time agent output
+        group_notes: Notes from per-group reviewer passes (--pipelined-review);
+            the reviewer then merges them instead of analyzing every group
 
     Returns:
         True if reviewer completed successfully
@@ -23,6 +29,8 @@ def run_test_reviewer(report_dir: Path, all_report_dirs: List[Path], start_commi
     print("RUNNING TEST REVIEWER AGENT")
     print("=" * 60)
     print(f"Analyzing results in: {report_dir}")
+    if group_notes:
+        print(f"Merging {len(group_notes)} group review(s)")
     if verbose:
         print("(Verbose mode: real-time agent output)")
     print()
@@ -57,6 +65,22 @@ READ THIS FIRST to understand:
 - PM's concerns from the previous iteration
 
 This helps you focus your analysis and see if you're heading in the right direction.
+"""
+
+    # With pipelined review, most of the analysis is already in the group notes
+    merge_context = ""
+    if group_notes:
+        notes_list = "\n".join(f"- {path}" for path in group_notes)
+        merge_context = f"""
+GROUP REVIEWS:
+Each of these groups was already analyzed by a per-group reviewer pass:
+{notes_list}
+
+Build REVIEWER-NOTES.md by merging these notes: read each one, combine failure
+patterns that recur across groups, and re-prioritize the recommendations
+suite-wide. Use the master REPORT.md for overall metrics and the Group Status
+table. Only analyze individual failures yourself for groups with failures that
+have no notes above.
 """
 
     # Create the full prompt for the agent
@@ -66,18 +90,18 @@ Your task is to analyze the test suite results and create REVIEWER-NOTES.md.
 
 The test results are located in: {report_dir}
 Git commit ID when test started: {start_commit_id}
-{pm_context}
+{pm_context}{merge_context}
 Follow these instructions from the agent definition:
 
 {agent_prompt}
 
 IMPORTANT:
 1. **FIRST**: Read testing/GUIDANCE.md for human decisions and product philosophy
-2. Use the report directory: {report_dir}
+2. Use the report directory: {report_dir} - read {report_dir}/DIGEST.md (failure clusters and change since the previous run) before REPORT.md
 3. {"Check for and read previous PM-NOTES if it exists (path provided above)" if previous_pm_notes else "This is the first test run in this session (no previous PM context)"}
 4. Write REVIEWER-NOTES.md to: {report_dir}/REVIEWER-NOTES.md
 5. **CRITICAL**: Start REVIEWER-NOTES.md with a header line: "**Git Commit:** {start_commit_id}" before any other content
-6. Be thorough but efficient - sample 3-5 representative failures
+6. {"Merge the group reviews rather than re-analyzing their groups" if group_notes else "Be thorough but efficient - sample 3-5 representative failures"}
 7. Question test validity before assuming skills are wrong (per GUIDANCE.md)
 8. Provide specific, actionable recommendations that respect GUIDANCE.md
 
@@ -86,19 +110,26 @@ Begin your analysis now."""
     try:
         # Execute headless agent
         # In verbose mode, output goes directly to terminal; otherwise capture it
-        result = subprocess.run(
-            [
-                'claude',
-                '-p', full_prompt,
-                '--output-format', 'text',
-                '--allowedTools', 'Read,Bash,Write,Grep',
-                '--permission-mode', 'bypassPermissions'
-            ],
-            capture_output=not verbose,
-            text=True,
-            timeout=300,  # 5 minute timeout
-            cwd=str(REPO_ROOT)
-        )
+        # as json, whose result document carries token usage and cost
+        started = time.monotonic()
+        with tracer.span("test-reviewer", category="agent"):
+            result = subprocess.run(
+                [
+                    claude_bin(),
+                    '-p', full_prompt,
+                    '--output-format', 'text' if verbose else 'json',
+                    '--allowedTools', 'Read,Bash,Write,Grep',
+                    '--permission-mode', 'bypassPermissions'
+                ],
+                capture_output=not verbose,
+                text=True,
+                timeout=300,  # 5 minute timeout
+                cwd=str(REPO_ROOT)
+            )
+
+        # Usage is unknown in verbose mode (the text went straight to the terminal)
+        usage = decode_json_result(result.stdout, "")[2] if not verbose else {}
+        record_agent_usage(report_dir, "test-reviewer", usage, time.monotonic() - started)
 
         if result.returncode == 0:
             print("✓ Test reviewer completed successfully")
@@ -0,0 +1,291 @@
+"""asyncio execution engine for headless test runs
+
+Launches claude directly (no run-single-test.sh wrapper) from a single event
+loop, so concurrency is bounded by a semaphore instead of one OS thread per
+in-flight test.
+"""
+
+import os
+import signal
+import asyncio
+import tempfile
+from pathlib import Path
+from datetime import datetime
+from typing import Tuple, Dict, List, Optional, Callable
+
+from .config import TEST_TIMEOUT_SECONDS
+from .models import TestResult
+from .cache import ResponseCache
+from .concurrency import AIMDController, AsyncAdaptiveLimiter
+from .retry import RetryPolicy, record_attempt
+from .execution import (
+    build_test_command, create_test_result, complete_test_result,
+    classify_failure, with_exit_status, StreamJsonDecoder, trace_stream_phases
+)
+from .validation import extract_complete_command, supports_early_exit
+from .scheduling import test_key
+from .tracing import tracer
+from .outputs import read_capped
+from .usage import collect_usage, report_usage, decode_json_result, UsageBudget, BudgetExhausted
+
+
+async def run_single_test_async(user_request: str, timeout: float = TEST_TIMEOUT_SECONDS) -> Tuple[str, str]:
+    """Execute a single test by launching claude directly
+
+    The process is killed and reaped on timeout or cancellation so no
+    orphaned claude sessions outlive the test. Output is captured in
+    temporary files and read back up to OUTPUT_CAPTURE_MAX_BYTES per stream.
+
+    Args:
+        user_request: The user's test request string
+        timeout: Seconds to wait before killing the process
+
+    Returns:
+        Tuple of (response text, stderr), with an ERROR: message in stderr on failure
+    """
+    with tempfile.TemporaryFile() as stdout_file, tempfile.TemporaryFile() as stderr_file:
+        try:
+            with tracer.span("spawn"):
+                process = await asyncio.create_subprocess_exec(
+                    *build_test_command(user_request),
+                    stdin=asyncio.subprocess.DEVNULL,
+                    stdout=stdout_file,
+                    stderr=stderr_file,
+                    start_new_session=True  # Own process group so children are killed too
+                )
+        except Exception as e:
+            return "", f"ERROR: {str(e)}"
+
+        with tracer.span("claude"):
+            try:
+                await asyncio.wait_for(process.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                await _kill(process)
+                return "", f"ERROR: Test timed out after {timeout:.0f} seconds"
+            except asyncio.CancelledError:
+                await _kill(process)
+                raise
+
+        stdout, stderr, usage = decode_json_result(read_capped(stdout_file),
+                                                   with_exit_status(read_capped(stderr_file), process.returncode))
+        report_usage(usage)
+        return stdout, stderr
+
+
+async def run_single_test_streaming_async(user_request: str, stop_when: Callable[[str], bool],
+                                         timeout: float = TEST_TIMEOUT_SECONDS) -> Tuple[str, str, bool]:
+    """Execute a single test with stream-json output, stopping early when possible
+
+    Args:
+        user_request: The user's test request string
+        stop_when: Predicate over the partial response text
+        timeout: Seconds to wait before killing the process
+
+    Returns:
+        Tuple of (stdout, stderr, stopped_early)
+    """
+    with tempfile.TemporaryFile() as stderr_file:
+        try:
+            with tracer.span("spawn"):
+                process = await asyncio.create_subprocess_exec(
+                    *build_test_command(user_request, streaming=True),
+                    stdin=asyncio.subprocess.DEVNULL,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=stderr_file,
+                    start_new_session=True  # Own process group so children are killed too
+                )
+        except Exception as e:
+            return "", f"ERROR: {str(e)}", False
+
+        return await _read_stream(process, stderr_file, stop_when, timeout)
+
+
+async def _read_stream(process: asyncio.subprocess.Process, stderr_file, stop_when: Callable[[str], bool],
+                       timeout: float) -> Tuple[str, str, bool]:
+    """Read a streaming test's stdout until it ends, is stopped early or times out"""
+    spawned_at = tracer.now()
+    decoder = StreamJsonDecoder()
+
+    async def read_stdout() -> bool:
+        while True:
+            chunk = await process.stdout.read(65536)
+            if not chunk:
+                decoder.close()
+                return False
+            decoder.feed(chunk.decode(errors='replace'))
+            if stop_when(decoder.text):
+                return True
+
+    try:
+        stopped_early = await asyncio.wait_for(read_stdout(), timeout=timeout)
+    except asyncio.TimeoutError:
+        trace_stream_phases(decoder, spawned_at, tracer.now())
+        await _kill(process)
+        return decoder.response, f"ERROR: Test timed out after {timeout:.0f} seconds", False
+    except asyncio.CancelledError:
+        await _kill(process)
+        raise
+
+    trace_stream_phases(decoder, spawned_at, tracer.now())
+    report_usage(decoder.usage)
+    if stopped_early:
+        with tracer.span("terminate"):
+            await _kill(process)
+    else:
+        await process.wait()
+    stderr = read_capped(stderr_file)
+    if not stopped_early:
+        stderr = with_exit_status(stderr, process.returncode)
+
+    return decoder.response, stderr, stopped_early
+
+
+async def _kill(process: asyncio.subprocess.Process) -> None:
+    """Kill a process and its process group, then wait for it to exit"""
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    await process.wait()
+
+
+async def process_single_test_async(test: Dict, group_name: str, group_dir: Path,
+                                    semaphore,
+                                    cache: Optional[ResponseCache] = None,
+                                    early_exit: bool = False,
+                                    retry: Optional[RetryPolicy] = None,
+                                    budget: Optional[UsageBudget] = None) -> TestResult:
+    """Process a single test on the event loop
+
+    Produces the same TestResult and reports as execution.process_single_test.
+
+    Args:
+        test: Test definition dictionary
+        group_name: Name of the test group
+        group_dir: Directory for group reports
+        semaphore: Limits concurrently running claude processes (asyncio.Semaphore
+            or AsyncAdaptiveLimiter)
+        cache: Optional response cache to consult before running claude
+        early_exit: Stream output and stop claude once a complete gh command is emitted
+        retry: Optional retry policy for transient failures
+        budget: Spending limit checked once the test holds a slot
+
+    Returns:
+        TestResult with execution results
+
+    Raises:
+        BudgetExhausted: The budget was spent before the test could start
+    """
+    test_result = create_test_result(test, group_name)
+    # The test's worker track is claimed once it holds a slot (or is served from cache)
+    track_token = None
+    test_started = None
+
+    with tracer.collect_phases(test_result.phase_seconds), collect_usage(test_result.usage):
+        try:
+            with tracer.span("cache lookup"):
+                cache_key = cache.key_for(test['user_request'], group_name) if cache else None
+                cached_response = cache.get(cache_key) if cache else None
+
+            if cached_response:
+                track_token = tracer.open_track()
+                test_started = tracer.now()
+                test_result.start_time = datetime.now()
+                stdout, stderr = cached_response
+                test_result.cached = True
+            else:
+                attempt = 1
+                while True:
+                    async with semaphore:
+                        # Timing starts once a slot is acquired, matching the thread engine
+                        attempt_start = datetime.now()
+                        if test_result.start_time is None:
+                            if budget and budget.exceeded:
+                                raise BudgetExhausted(budget.describe())
+                            test_result.start_time = attempt_start
+                            track_token = tracer.open_track()
+                            test_started = tracer.now()
+                        with tracer.span(f"attempt {attempt}", category="attempt"):
+                            if early_exit and supports_early_exit(test):
+                                stdout, stderr, test_result.early_exit = await run_single_test_streaming_async(
+                                    test['user_request'],
+                                    lambda text: extract_complete_command(text) is not None
+                                )
+                            else:
+                                stdout, stderr = await run_single_test_async(test['user_request'])
+                    error_kind = classify_failure(stdout, stderr)
+                    record_attempt(test_result, attempt_start, datetime.now(), error_kind, stderr)
+
+                    # Back off without holding a slot
+                    if not retry or not retry.should_retry(error_kind, attempt):
+                        break
+                    with tracer.span("backoff"):
+                        await asyncio.sleep(retry.backoff_delay(attempt))
+                    attempt += 1
+
+                # A run stopped early holds a truncated answer, which a full run must not replay
+                if cache and not test_result.early_exit:
+                    cache.put(cache_key, stdout, stderr)
+            test_result.end_time = datetime.now()
+            test_result.duration_seconds = (test_result.end_time - test_result.start_time).total_seconds()
+
+            complete_test_result(test_result, test, group_name, group_dir, stdout, stderr)
+        finally:
+            if track_token is not None:
+                tracer.add_span(test_key(group_name, test['test_num']), test_started, tracer.now(),
+                                category="test", args={'status': test_result.status})
+                tracer.close_track(track_token)
+
+    return test_result
+
+
+def run_tests_async(jobs: List[Tuple[str, Path, Dict]], workers: int,
+                    on_result: Callable[[str, Dict, Optional[TestResult], Optional[BaseException]], None],
+                    cache: Optional[ResponseCache] = None,
+                    early_exit: bool = False,
+                    controller: Optional[AIMDController] = None,
+                    retry: Optional[RetryPolicy] = None,
+                    budget: Optional[UsageBudget] = None) -> None:
+    """Run jobs on an asyncio event loop with bounded concurrency
+
+    Jobs are started in the given order, so a longest-first ordering from
+    the scheduler is preserved.
+
+    Args:
+        jobs: List of (group_name, group_dir, test) tuples
+        workers: Maximum number of concurrent claude processes
+        on_result: Called as on_result(group_name, test, result, error) as each job finishes
+        cache: Optional response cache to consult before running claude
+        early_exit: Stop each claude process once a complete gh command is emitted
+        controller: Adaptive concurrency controller; replaces the fixed limit when given
+        retry: Optional retry policy for transient failures
+        budget: Spending limit; tests not started once it is spent finish
+            with a BudgetExhausted error
+    """
+    async def run_all() -> None:
+        if controller:
+            semaphore = AsyncAdaptiveLimiter(controller)
+        else:
+            semaphore = asyncio.Semaphore(workers)
+
+        async def run_job(group_name: str, group_dir: Path, test: Dict):
+            try:
+                result = await process_single_test_async(test, group_name, group_dir, semaphore, cache, early_exit,
+                                                         retry, budget)
+                if controller:
+                    await semaphore.record(result)
+                return group_name, test, result, None
+            except Exception as e:
+                return group_name, test, None, e
+
+        tasks = [asyncio.create_task(run_job(*job)) for job in jobs]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                on_result(*await next_done)
+        finally:
+            # Cancel anything still running (e.g., on KeyboardInterrupt)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    asyncio.run(run_all())
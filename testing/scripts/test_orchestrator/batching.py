@@ -0,0 +1,180 @@
+"""Batched execution: several requests per claude invocation (--batch-size)
+
+A batch packs up to N requests from one scenario group into a single claude
+run using BATCH_PROMPT_TEMPLATE, so process start-up, plugin and hook loading
+and skill discovery are paid once per batch instead of once per test. The
+numbered answer blocks are split back into one TestResult per test. A batch
+whose response doesn't hold exactly one block per request, or that fails for
+infrastructure reasons, is re-run test by test.
+"""
+
+import re
+import contextlib
+from pathlib import Path
+from datetime import datetime
+from typing import List, Dict, Tuple, Optional, ContextManager
+
+from .config import BATCH_PROMPT_TEMPLATE, BATCH_TIMEOUT_PER_TEST_SECONDS, TEST_TIMEOUT_SECONDS, print_lock
+from .models import TestResult
+from .cache import ResponseCache
+from .retry import RetryPolicy, record_attempt
+from .execution import (
+    build_test_command, create_test_result, complete_test_result, process_single_test,
+    classify_failure, run_json_captured, shutdown_event
+)
+from .tracing import tracer
+from .usage import collect_usage, split_usage
+
+ANSWER_PATTERN = re.compile(r'^=== ANSWER (\d+) ===\n(.*?)\n=== END ANSWER \1 ===$', re.MULTILINE | re.DOTALL)
+
+
+def build_batches(jobs: List[Tuple[str, Path, Dict]], batch_size: int) -> List[List[Tuple[str, Path, Dict]]]:
+    """Pack jobs into batches of tests from the same group
+
+    Jobs keep their relative order, so a longest-first ordering is preserved
+    within and across batches.
+
+    Args:
+        jobs: List of (group_name, group_dir, test) tuples
+        batch_size: Maximum tests per batch (1 disables batching)
+
+    Returns:
+        List of batches, each a list of jobs from a single group
+    """
+    batches: List[List[Tuple[str, Path, Dict]]] = []
+    open_batches: Dict[str, List[Tuple[str, Path, Dict]]] = {}
+    for job in jobs:
+        batch = open_batches.get(job[0])
+        if batch is None or len(batch) >= batch_size:
+            batch = []
+            open_batches[job[0]] = batch
+            batches.append(batch)
+        batch.append(job)
+    return batches
+
+
+def build_batch_prompt(user_requests: List[str]) -> str:
+    """Build the prompt for one batch of user requests"""
+    requests = "\n".join(f"USER REQUEST {number}: {request}" for number, request in enumerate(user_requests, start=1))
+    return BATCH_PROMPT_TEMPLATE.format(count=len(user_requests), requests=requests)
+
+
+def split_batch_response(text: str, count: int) -> Optional[List[str]]:
+    """Split a batch response into per-request answers
+
+    Args:
+        text: claude's response to a batch prompt
+        count: Number of requests in the batch
+
+    Returns:
+        Answers in request order, or None unless every request has exactly
+        one well-formed answer block
+    """
+    answers: Dict[int, str] = {}
+    for match in ANSWER_PATTERN.finditer(text):
+        number = int(match.group(1))
+        if number in answers:
+            return None
+        answers[number] = match.group(2)
+    if sorted(answers) != list(range(1, count + 1)):
+        return None
+    return [answers[number] for number in range(1, count + 1)]
+
+
+def run_batch(user_requests: List[str]) -> Tuple[str, str]:
+    """Run one batch prompt through claude
+
+    Args:
+        user_requests: Requests in answer order
+
+    Returns:
+        Tuple of (response text, stderr)
+    """
+    timeout = TEST_TIMEOUT_SECONDS + BATCH_TIMEOUT_PER_TEST_SECONDS * (len(user_requests) - 1)
+    command = build_test_command("", prompt=build_batch_prompt(user_requests))
+    return run_json_captured(command, timeout)
+
+
+def process_batch(batch: List[Tuple[str, Path, Dict]], cache: Optional[ResponseCache] = None,
+                  early_exit: bool = False, retry: Optional[RetryPolicy] = None,
+                  slot: Optional[ContextManager] = None) -> List[TestResult]:
+    """Process a batch of tests from one group with a single claude invocation
+
+    Tests with a cached response are served from the cache. Batched answers
+    are not cached, since they come from a different prompt. Each test's
+    duration, phase times and usage are its equal share of the batch.
+
+    Args:
+        batch: Jobs from build_batches() (all from the same group)
+        cache: Optional response cache to consult before running claude
+        early_exit: Passed to single-test runs (cached tests and fallbacks)
+        retry: Optional retry policy for transient failures
+        slot: Concurrency gate held while each claude run (batched or single)
+            is in flight and released during retry backoff
+
+    Returns:
+        One TestResult per test, in no particular order
+    """
+    group_name, group_dir = batch[0][0], batch[0][1]
+    results: List[TestResult] = []
+    tests = []
+    for _, _, test in batch:
+        if cache and cache.contains(cache.key_for(test['user_request'], group_name)):
+            results.append(process_single_test(test, group_name, group_dir, cache, early_exit, retry, slot=slot))
+        else:
+            tests.append(test)
+    if len(tests) <= 1:
+        return results + [process_single_test(test, group_name, group_dir, cache, early_exit, retry, slot=slot)
+                          for test in tests]
+
+    # Attempts are recorded once and copied to every test in the batch
+    batch_record = TestResult(group_name, 0, "batch", "")
+    batch_phases: Dict[str, float] = {}
+    batch_usage: Dict[str, float] = {}
+    with tracer.collect_phases(batch_phases), collect_usage(batch_usage), \
+            tracer.span(f"batch {group_name} x{len(tests)}", category="batch") as span_args:
+        start_time = None
+        attempt = 1
+        while True:
+            with slot or contextlib.nullcontext():
+                attempt_start = datetime.now()
+                start_time = start_time or attempt_start
+                with tracer.span(f"attempt {attempt}", category="attempt"):
+                    stdout, stderr = run_batch([test['user_request'] for test in tests])
+            error_kind = classify_failure(stdout, stderr)
+            record_attempt(batch_record, attempt_start, datetime.now(), error_kind, stderr)
+
+            # Back off without holding a slot
+            if not retry or not retry.should_retry(error_kind, attempt) or shutdown_event.is_set():
+                break
+            with tracer.span("backoff"):
+                shutdown_event.wait(retry.backoff_delay(attempt))
+            attempt += 1
+        end_time = datetime.now()
+        answers = None if error_kind else split_batch_response(stdout, len(tests))
+        span_args['answers'] = "split" if answers else "fallback"
+
+    if error_kind and shutdown_event.is_set():
+        raise InterruptedError("test run interrupted")
+
+    if answers is None:
+        problem = f"failed ({error_kind})" if error_kind else "returned malformed answers"
+        with print_lock:
+            print(f"  [{group_name}] Batch of {len(tests)} {problem}, re-running tests individually")
+        return results + [process_single_test(test, group_name, group_dir, cache, early_exit, retry, batch_fallback=True,
+                                              prior_usage=split_usage(batch_usage, len(tests)), slot=slot)
+                          for test in tests]
+
+    share = (end_time - start_time).total_seconds() / len(tests)
+    for test, answer in zip(tests, answers):
+        test_result = create_test_result(test, group_name)
+        test_result.start_time = start_time
+        test_result.end_time = end_time
+        test_result.duration_seconds = share
+        test_result.attempts = [dict(entry) for entry in batch_record.attempts]
+        test_result.batch_size = len(tests)
+        test_result.phase_seconds = {name: seconds / len(tests) for name, seconds in batch_phases.items()}
+        test_result.usage = split_usage(batch_usage, len(tests))
+        with tracer.collect_phases(test_result.phase_seconds):
+            results.append(complete_test_result(test_result, test, group_name, group_dir, answer + "\n", ""))
+    return results
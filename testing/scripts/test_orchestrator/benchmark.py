@@ -0,0 +1,255 @@
+"""Orchestrator throughput benchmarks against the fake claude backend
+
+Runs run_test_suite() over a grid of engines, worker counts and suite sizes
+with fake_claude.py standing in for claude, so the numbers measure the
+orchestrator (process spawning, scheduling, validation, report I/O) plus
+a simulated, reproducible model latency.
+"""
+
+import io
+import os
+import json
+import math
+import time
+import argparse
+import tempfile
+import contextlib
+from pathlib import Path
+from datetime import datetime
+from typing import List, Dict, Optional
+
+from .config import FAKE_CLAUDE_SCRIPT, BENCHMARK_RESULTS_PATH
+from .manifest import load_scenario_manifest
+from .retry import RetryPolicy
+from .orchestration import run_test_suite, get_current_commit_id
+
+# Metrics compared against the baseline, and whether higher is better
+REGRESSION_METRICS = {
+    'tests_per_second': True,
+    'p95_latency_seconds': False,
+}
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile
+
+    Args:
+        values: Samples (need not be sorted)
+        fraction: Percentile as a fraction (e.g., 0.95)
+
+    Returns:
+        The smallest sample with at least `fraction` of samples at or below it
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(len(ordered) * fraction))
+    return ordered[rank - 1]
+
+
+def build_suite(size: int) -> Dict[str, List[Dict]]:
+    """Build a suite of `size` tests from the scenario manifest
+
+    Scenario tests are cycled in order; copies beyond the real suite get
+    test numbers offset by 1000 per pass so reports don't collide.
+
+    Args:
+        size: Number of tests to include
+
+    Returns:
+        Test definitions by group, as accepted by run_test_suite(groups=...)
+    """
+    all_tests = [(group_name, test) for group_name, tests in load_scenario_manifest().groups().items() for test in tests]
+    suite: Dict[str, List[Dict]] = {}
+    for index in range(size):
+        group_name, test = all_tests[index % len(all_tests)]
+        copy_num = index // len(all_tests)
+        test = dict(test, test_num=test['test_num'] + 1000 * copy_num)
+        suite.setdefault(group_name, []).append(test)
+    return suite
+
+
+def run_benchmark(engine: str, workers: int, size: int, seed: str) -> Dict:
+    """Run one benchmark configuration
+
+    Args:
+        engine: Execution engine ("threads", "asyncio" or "sessions")
+        workers: Parallel workers
+        size: Number of tests in the suite
+        seed: FAKE_CLAUDE_SEED so every configuration sees the same latencies
+
+    Returns:
+        Metrics for the run
+    """
+    suite = build_suite(size)
+    with tempfile.TemporaryDirectory(prefix="gh-bench-") as tmp:
+        os.environ['FAKE_CLAUDE_SEED'] = seed
+        os.environ['FAKE_CLAUDE_STATE_DIR'] = str(Path(tmp) / "state")
+        report_dir = Path(tmp) / "report"
+        report_dir.mkdir()
+
+        # The suite prints per-test progress; keep benchmark output readable
+        start = time.monotonic()
+        with contextlib.redirect_stdout(io.StringIO()):
+            all_results = run_test_suite(report_dir, workers, engine=engine,
+                                         retry=RetryPolicy(2, 10), groups=suite)
+        makespan = time.monotonic() - start
+
+    results = [r for group_results in all_results.values() for r in group_results]
+    latencies = [r.duration_seconds for r in results]
+    busy = sum(latencies)
+    return {
+        'engine': engine,
+        'workers': workers,
+        'size': size,
+        'completed': len(results),
+        'infra_errors': sum(1 for r in results if r.status == "INFRA_ERROR"),
+        'makespan_seconds': makespan,
+        'tests_per_second': len(results) / makespan if makespan > 0 else 0.0,
+        # Share of worker-slot time spent inside a test (includes retries/backoff)
+        'utilization': busy / (workers * makespan) if makespan > 0 else 0.0,
+        # Best possible makespan for these latencies: perfect packing onto the workers
+        'ideal_makespan_seconds': max(busy / workers, max(latencies, default=0.0)),
+        'p50_latency_seconds': percentile(latencies, 0.50),
+        'p95_latency_seconds': percentile(latencies, 0.95),
+        'p99_latency_seconds': percentile(latencies, 0.99),
+    }
+
+
+def config_key(run: Dict) -> str:
+    """Identify a benchmark configuration across result files"""
+    return f"{run['engine']}/w{run['workers']}/n{run['size']}"
+
+
+def compare_to_baseline(runs: List[Dict], baseline: Dict, threshold: float) -> List[str]:
+    """Find metrics that regressed beyond the threshold
+
+    Args:
+        runs: Current benchmark runs
+        baseline: Previously saved results document
+        threshold: Allowed relative change (e.g., 0.10 for 10%)
+
+    Returns:
+        One message per regressed metric (empty if none)
+    """
+    baseline_runs = {config_key(run): run for run in baseline.get('runs', [])}
+    regressions = []
+    for run in runs:
+        previous = baseline_runs.get(config_key(run))
+        if not previous:
+            continue
+        for metric, higher_is_better in REGRESSION_METRICS.items():
+            old, new = previous[metric], run[metric]
+            if old <= 0:
+                continue
+            change = (new - old) / old
+            if (higher_is_better and change < -threshold) or (not higher_is_better and change > threshold):
+                regressions.append(f"{config_key(run)} {metric}: {old:.3f} -> {new:.3f} ({change:+.1%})")
+    return regressions
+
+
+def print_table(runs: List[Dict]) -> None:
+    """Print benchmark runs as a fixed-width table"""
+    print(f"{'Engine':<8} {'Workers':>7} {'Tests':>5} {'Makespan':>9} {'Ideal':>7} {'Tests/s':>8} "
+          f"{'Util':>6} {'p50':>6} {'p95':>6} {'p99':>6} {'Infra':>5}")
+    for run in runs:
+        print(f"{run['engine']:<8} {run['workers']:>7} {run['size']:>5} {run['makespan_seconds']:>8.1f}s "
+              f"{run['ideal_makespan_seconds']:>6.1f}s {run['tests_per_second']:>8.2f} {run['utilization']:>6.1%} "
+              f"{run['p50_latency_seconds']:>5.2f}s {run['p95_latency_seconds']:>5.2f}s "
+              f"{run['p99_latency_seconds']:>5.2f}s {run['infra_errors']:>5}")
+
+
+def parse_int_list(value: str) -> List[int]:
+    """Parse a comma-separated list of integers (argparse type)"""
+    return [int(v) for v in value.split(',') if v.strip()]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Benchmark entry point
+
+    Returns:
+        Exit code: 1 if any metric regressed against the baseline, otherwise 0
+    """
+    parser = argparse.ArgumentParser(
+        description='Benchmark orchestrator throughput against the fake claude backend'
+    )
+    parser.add_argument('--engines', default='threads,asyncio',
+                        help='Comma-separated execution engines: threads, asyncio, sessions (default: threads,asyncio)')
+    parser.add_argument('--workers', type=parse_int_list, default=[1, 4, 8, 16, 32],
+                        help='Comma-separated worker counts (default: 1,4,8,16,32)')
+    parser.add_argument('--sizes', type=parse_int_list, default=[80],
+                        help='Comma-separated suite sizes; sizes beyond the scenario count '
+                             'repeat tests (default: 80)')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='Runs per configuration; the median-throughput run is kept (default: 1)')
+    parser.add_argument('--latency', default='lognormal:0.5,0.4',
+                        help='Simulated claude latency, as FAKE_CLAUDE_LATENCY (default: lognormal:0.5,0.4)')
+    parser.add_argument('--startup', type=float, default=0.0,
+                        help='Simulated claude start-up seconds per process, as FAKE_CLAUDE_STARTUP_SECONDS '
+                             '(paid once per session by the sessions engine; default: 0)')
+    parser.add_argument('--failure-rate', type=float, default=0.0,
+                        help='Injected crash probability per claude call (default: 0)')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0,
+                        help='Injected rate-limit probability per claude call (default: 0)')
+    parser.add_argument('--seed', default='1',
+                        help='Seed for simulated latencies and failures (default: 1)')
+    parser.add_argument('--output', type=Path, default=BENCHMARK_RESULTS_PATH,
+                        help=f'Results JSON file (default: {BENCHMARK_RESULTS_PATH})')
+    parser.add_argument('--baseline', type=Path,
+                        help='Results JSON to compare against; exit 1 on regression')
+    parser.add_argument('--threshold', type=float, default=0.20,
+                        help='Relative change in tests/sec or p95 latency counted as a regression (default: 0.20)')
+    args = parser.parse_args(argv)
+
+    os.environ['CLAUDE_BIN'] = str(FAKE_CLAUDE_SCRIPT)
+    os.environ['FAKE_CLAUDE_LATENCY'] = args.latency
+    os.environ['FAKE_CLAUDE_STARTUP_SECONDS'] = str(args.startup)
+    os.environ['FAKE_CLAUDE_FAILURE_RATE'] = str(args.failure_rate)
+    os.environ['FAKE_CLAUDE_RATE_LIMIT_RATE'] = str(args.rate_limit_rate)
+    os.environ.pop('FAKE_CLAUDE_REPLAY', None)
+
+    engines = [e.strip() for e in args.engines.split(',') if e.strip()]
+    configs = [(engine, workers, size) for size in args.sizes for engine in engines for workers in args.workers]
+    print(f"Benchmarking {len(configs)} configuration(s), latency {args.latency}, seed {args.seed}\n")
+
+    runs = []
+    for engine, workers, size in configs:
+        samples = [run_benchmark(engine, workers, size, args.seed) for _ in range(args.repeat)]
+        samples.sort(key=lambda run: run['tests_per_second'])
+        run = samples[len(samples) // 2]
+        run['repeats'] = len(samples)
+        runs.append(run)
+        print(f"  {config_key(run)}: {run['tests_per_second']:.2f} tests/s, makespan {run['makespan_seconds']:.1f}s")
+
+    print()
+    print_table(runs)
+
+    document = {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'commit': get_current_commit_id(),
+        'settings': {
+            'latency': args.latency,
+            'startup': args.startup,
+            'failure_rate': args.failure_rate,
+            'rate_limit_rate': args.rate_limit_rate,
+            'seed': args.seed,
+        },
+        'runs': runs,
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(document, indent=2) + "\n")
+    print(f"\nResults: {args.output}")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        if baseline.get('settings', {}).get('latency') != args.latency:
+            print(f"⚠️  Baseline used latency {baseline.get('settings', {}).get('latency')}, comparison may not be meaningful")
+        regressions = compare_to_baseline(runs, baseline, args.threshold)
+        if regressions:
+            print(f"\n✗ {len(regressions)} regression(s) beyond {args.threshold:.0%} vs {args.baseline}:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            return 1
+        print(f"\n✓ No regressions beyond {args.threshold:.0%} vs {args.baseline}")
+
+    return 0
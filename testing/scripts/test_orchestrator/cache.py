@@ -0,0 +1,219 @@
+"""Persistent response cache for headless test runs
+
+Responses are content-addressed: the key covers the user request, the prompt
+template (run-single-test.sh and its Python copy), the SessionStart hook (its
+script, which holds the payload version, and its mode, plus every skill's
+frontmatter in index mode) and the SKILL.md files the test depends on, so
+editing a skill only invalidates the groups that load it.
+"""
+
+import os
+import json
+import hashlib
+from pathlib import Path
+from threading import Lock, get_ident
+from typing import Optional, Tuple, Dict, List
+
+from .config import RUN_TEST_SCRIPT, SESSION_START_HOOK, SKILLS_DIR, SHARED_SKILLS, TEST_PROMPT_TEMPLATE
+
+
+def skill_for_group(group_name: str) -> str:
+    """Map a scenario group name to the skill it exercises
+
+    Args:
+        group_name: Scenario group name (e.g., 'gh-search-code-tests')
+
+    Returns:
+        Skill directory name (e.g., 'gh-search-code')
+    """
+    if group_name.endswith('-tests'):
+        return group_name[:-len('-tests')]
+    return group_name
+
+
+def relevant_skill_files(group_name: str) -> List[Path]:
+    """List the SKILL.md files a test in this group can load
+
+    Args:
+        group_name: Scenario group name
+
+    Returns:
+        Sorted list of SKILL.md paths (group skill plus shared skills)
+    """
+    names = set(SHARED_SKILLS)
+    names.add(skill_for_group(group_name))
+    return [SKILLS_DIR / name / "SKILL.md" for name in sorted(names)]
+
+
+def test_fingerprint(test: Dict, group_name: str) -> str:
+    """Identify what a test's result depends on: its scenario text and skills
+
+    Results with the same fingerprint come from the same test definition and
+    the same versions of the SKILL.md files it loads (see relevant_skill_files).
+
+    Args:
+        test: Test definition dictionary
+        group_name: Scenario group name
+
+    Returns:
+        Hex digest
+    """
+    content = test.get('content_hash') or json.dumps([test['user_request'], test['criteria']])
+    parts = ["test:" + content]
+    for skill_file in relevant_skill_files(group_name):
+        try:
+            digest = hashlib.sha256(skill_file.read_bytes()).hexdigest()
+        except FileNotFoundError:
+            digest = "missing"
+        parts.append(f"skill:{skill_file.parent.name}:{digest}")
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+
+def frontmatter(text: str) -> str:
+    """The YAML frontmatter block of a SKILL.md ('' if it has none)"""
+    if not text.startswith("---\n"):
+        return ""
+    end = text.find("\n---", 4)
+    return text[4:end] if end != -1 else ""
+
+
+class ResponseCache:
+    """On-disk cache of claude outputs with size-bounded LRU eviction
+
+    Each entry is a JSON file named by its key. The file mtime doubles as the
+    last-access time, so hits refresh it and eviction removes the oldest files.
+    """
+
+    def __init__(self, cache_dir: Path, max_bytes: int, read: bool = True, write: bool = True):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.read = read
+        self.write = write
+        self.hits = 0
+        self.misses = 0
+        self._lock = Lock()
+        self._file_hashes: Dict[Tuple[Path, bool], Tuple[int, int, str]] = {}
+        if self.write:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _hash_file(self, path: Path, frontmatter_only: bool = False) -> str:
+        """Hash a file's content (or only its frontmatter), memoized on (mtime, size)"""
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return "missing"
+
+        with self._lock:
+            cached = self._file_hashes.get((path, frontmatter_only))
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+
+        content = path.read_bytes()
+        if frontmatter_only:
+            content = frontmatter(content.decode(errors='replace')).encode()
+        digest = hashlib.sha256(content).hexdigest()
+        with self._lock:
+            self._file_hashes[(path, frontmatter_only)] = (stat.st_mtime_ns, stat.st_size, digest)
+        return digest
+
+    def key_for(self, user_request: str, group_name: str) -> str:
+        """Compute the cache key for a test
+
+        Args:
+            user_request: The user's test request string
+            group_name: Scenario group the test belongs to
+
+        Returns:
+            Hex digest identifying the response
+        """
+        parts = [
+            "request:" + user_request,
+            "template:" + self._hash_file(RUN_TEST_SCRIPT),
+            "prompt:" + hashlib.sha256(TEST_PROMPT_TEMPLATE.encode()).hexdigest(),
+            "hook:" + self._hash_file(SESSION_START_HOOK),
+        ]
+        for skill_file in relevant_skill_files(group_name):
+            parts.append(f"skill:{skill_file.parent.name}:{self._hash_file(skill_file)}")
+        # The hook mode picks the SessionStart payload, so it is part of every key
+        hook_mode = os.environ.get("GH_CLI_SEARCH_HOOK_MODE", "full")
+        parts.append("hook_mode:" + hook_mode)
+        if hook_mode == "index":
+            # The index payload lists every skill's name and description
+            for skill_file in sorted(SKILLS_DIR.glob("*/SKILL.md")):
+                parts.append(f"index:{skill_file.parent.name}:{self._hash_file(skill_file, frontmatter_only=True)}")
+        return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+    def contains(self, key: str) -> bool:
+        """Check for a readable entry without counting a hit or miss"""
+        return self.read and (self.cache_dir / f"{key}.json").exists()
+
+    def get(self, key: str) -> Optional[Tuple[str, str]]:
+        """Look up a cached response
+
+        Args:
+            key: Cache key from key_for()
+
+        Returns:
+            Tuple of (stdout, stderr) or None on a miss
+        """
+        if not self.read:
+            return None
+
+        entry_path = self.cache_dir / f"{key}.json"
+        try:
+            entry = json.loads(entry_path.read_text())
+            os.utime(entry_path)  # Mark as recently used
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return entry['stdout'], entry['stderr']
+
+    def put(self, key: str, stdout: str, stderr: str) -> None:
+        """Store a response and evict old entries if over the size limit
+
+        Errors (timeouts, exceptions) and empty responses are never cached.
+
+        Args:
+            key: Cache key from key_for()
+            stdout: Claude's stdout
+            stderr: Claude's stderr
+        """
+        if not self.write or not stdout.strip() or stderr.startswith("ERROR:"):
+            return
+
+        entry_path = self.cache_dir / f"{key}.json"
+        tmp_path = entry_path.with_suffix(f".tmp{os.getpid()}-{get_ident()}")
+        tmp_path.write_text(json.dumps({'stdout': stdout, 'stderr': stderr}))
+        os.replace(tmp_path, entry_path)
+
+        self._evict()
+
+    def _evict(self) -> None:
+        """Remove least recently used entries until the cache fits max_bytes"""
+        with self._lock:
+            entries = []
+            total = 0
+            for path in self.cache_dir.glob("*.json"):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, path))
+                total += stat.st_size
+
+            if total <= self.max_bytes:
+                return
+
+            entries.sort(key=lambda e: e[0])
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    path.unlink()
+                    total -= size
+                except FileNotFoundError:
+                    pass
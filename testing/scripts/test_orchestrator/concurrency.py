@@ -0,0 +1,173 @@
+"""Adaptive (AIMD) concurrency control for test execution
+
+The limit grows by one slot per "window" of clean completions and is halved
+when a test times out, hits a rate limit or runs far slower than the recent
+baseline. Other errors (crashes, empty output) hold the limit: they are not
+a sign of overload, but they are not evidence of spare capacity either.
+Signals from tests that started before the last decrease are ignored so one
+burst of failures only cuts the limit once.
+"""
+
+import time
+import asyncio
+import threading
+from datetime import datetime
+from typing import List, Dict, Optional
+
+from .models import TestResult
+
+# Failure kinds that mean "back off" rather than "the answer was wrong"
+CONGESTION_SIGNALS = ['timeout', 'rate_limit']
+
+
+class AIMDController:
+    """Additive-increase / multiplicative-decrease concurrency limit"""
+
+    def __init__(self, initial: int, maximum: int, minimum: int = 1,
+                 decrease_factor: float = 0.5, latency_tolerance: float = 2.0,
+                 min_slowdown_seconds: float = 10.0):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.min_slowdown_seconds = min_slowdown_seconds
+        self.limit = float(max(minimum, min(initial, maximum)))
+        self.baseline_latency: Optional[float] = None
+        self.samples = 0
+        self.timeline: List[Dict] = []
+        self._started = time.monotonic()
+        self._last_decrease: Optional[datetime] = None
+        self._log(f"start (max {maximum})")
+
+    @property
+    def current(self) -> int:
+        """Current number of tests allowed in flight"""
+        return int(self.limit)
+
+    def record(self, result: TestResult) -> None:
+        """Update the limit from a completed test
+
+        Args:
+            result: Completed test result (cached results are ignored)
+        """
+        if result.cached or result.start_time is None:
+            return
+
+        # Judge the last attempt; any congested attempt (even if retried) backs off
+        latency = result.attempts[-1]['duration_seconds'] if result.attempts else result.duration_seconds
+        congestion = [a['error_kind'] for a in result.attempts if a['error_kind'] in CONGESTION_SIGNALS]
+        if result.error_kind in CONGESTION_SIGNALS:
+            congestion.append(result.error_kind)
+        if congestion:
+            self._decrease(result, congestion[0])
+            return
+
+        if (self.baseline_latency is not None and self.samples >= 5
+                and latency > self.latency_tolerance * self.baseline_latency
+                and latency - self.baseline_latency > self.min_slowdown_seconds):
+            self._decrease(result, f"slow ({latency:.0f}s vs {self.baseline_latency:.0f}s baseline)")
+        elif result.error_kind or any(a['error_kind'] for a in result.attempts):
+            # Not congestion, but not a clean completion either: hold the limit
+            pass
+        else:
+            # One extra slot per window of `limit` clean completions
+            previous = self.current
+            self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            if self.current != previous:
+                self._log("increase")
+
+        if not result.error_kind:
+            # Exponentially weighted moving average of healthy latencies
+            if self.baseline_latency is None:
+                self.baseline_latency = latency
+            else:
+                self.baseline_latency = 0.8 * self.baseline_latency + 0.2 * latency
+            self.samples += 1
+
+    def _decrease(self, result: TestResult, reason: str) -> None:
+        # Ignore signals from tests started under the previous (higher) limit
+        if self._last_decrease and result.start_time < self._last_decrease:
+            return
+        self.limit = max(float(self.minimum), self.limit * self.decrease_factor)
+        self._last_decrease = datetime.now()
+        self._log(f"decrease: {reason}")
+
+    def _log(self, reason: str) -> None:
+        self.timeline.append({
+            'elapsed': time.monotonic() - self._started,
+            'limit': self.current,
+            'reason': reason
+        })
+
+
+class AdaptiveLimiter:
+    """Thread gate admitting at most controller.current tests at once
+
+    Held per attempt rather than per test, so a test backing off before a
+    retry does not occupy a slot.
+
+    Usage:
+        result = process_single_test(..., slot=limiter)
+        limiter.record(result)
+    """
+
+    def __init__(self, controller: AIMDController):
+        self.controller = controller
+        self.in_flight = 0
+        self._condition = threading.Condition()
+
+    def __enter__(self):
+        with self._condition:
+            while self.in_flight >= self.controller.current:
+                self._condition.wait()
+            self.in_flight += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def record(self, result: TestResult) -> None:
+        """Feed a completed result to the controller and wake waiting workers"""
+        with self._condition:
+            self.controller.record(result)
+            self._condition.notify_all()
+
+
+class AsyncAdaptiveLimiter:
+    """asyncio gate admitting at most controller.current tests at once
+
+    Drop-in replacement for asyncio.Semaphore in the asyncio engine.
+    """
+
+    def __init__(self, controller: AIMDController):
+        self.controller = controller
+        self.in_flight = 0
+        self._condition: Optional[asyncio.Condition] = None
+
+    def _get_condition(self) -> asyncio.Condition:
+        # Created lazily so it binds to the running event loop
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    async def __aenter__(self):
+        condition = self._get_condition()
+        async with condition:
+            await condition.wait_for(lambda: self.in_flight < self.controller.current)
+            self.in_flight += 1
+        return self
+
+    async def __aexit__(self, *exc_info):
+        condition = self._get_condition()
+        async with condition:
+            self.in_flight -= 1
+            condition.notify_all()
+
+    async def record(self, result: TestResult) -> None:
+        """Feed a completed result to the controller and wake waiting tasks"""
+        condition = self._get_condition()
+        async with condition:
+            self.controller.record(result)
+            condition.notify_all()
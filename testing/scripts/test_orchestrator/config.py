@@ -1,5 +1,6 @@
 """Configuration constants and paths for test orchestrator"""
 
+import os
 from pathlib import Path
 from threading import Lock
 
@@ -8,6 +9,14 @@ REPO_ROOT = Path("/home/aaddrick/source/gh-cli-search")
 SCENARIOS_DIR = REPO_ROOT / "testing" / "scenarios"
 REPORTS_BASE = REPO_ROOT / "testing" / "reports"
 RUN_TEST_SCRIPT = REPO_ROOT / "testing" / "scripts" / "run-single-test.sh"
+FAKE_CLAUDE_SCRIPT = REPO_ROOT / "testing" / "scripts" / "fake_claude.py"
+SKILLS_DIR = REPO_ROOT / "skills"
+SESSION_START_HOOK = REPO_ROOT / "hooks" / "session-start.sh"
+CACHE_DIR = REPO_ROOT / "testing" / ".cache"
+RESPONSE_CACHE_DIR = CACHE_DIR / "responses"
+SCENARIO_MANIFEST_PATH = CACHE_DIR / "scenario-manifest.json"
+BENCHMARK_RESULTS_PATH = CACHE_DIR / "benchmark-results.json"
+HISTORY_DB_PATH = CACHE_DIR / "history.sqlite"
 TEST_REVIEWER_AGENT = REPO_ROOT / "agents" / "test-reviewer.md"
 PRODUCT_MANAGER_AGENT = REPO_ROOT / "agents" / "product-manager.md"
 DEVELOPER_AGENT = REPO_ROOT / "agents" / "developer.md"
@@ -15,5 +24,96 @@ DEVELOPER_AGENT = REPO_ROOT / "agents" / "developer.md"
 # Thread-safe printing
 print_lock = Lock()
 
+
+def claude_bin() -> str:
+    """claude executable used for tests and agents
+
+    Read from CLAUDE_BIN on every call so `--backend fake` (which sets it)
+    also reaches run-single-test.sh and already-imported modules.
+    """
+    return os.environ.get("CLAUDE_BIN", "claude")
+
+# Per-test timeout for headless claude runs
+TEST_TIMEOUT_SECONDS = 120
+
+# Prompt used for direct claude invocations (asyncio engine)
+# Must stay in sync with the prompt in run-single-test.sh
+TEST_PROMPT_TEMPLATE = """CRITICAL INSTRUCTIONS:
+1. Identify which gh-cli-search skill is needed: gh-search-code, gh-search-issues, gh-search-prs, gh-search-repos, gh-search-commits, or gh-cli-setup
+2. Use the Skill tool to load that skill
+3. Follow the skill's documentation to generate the correct command
+4. Do not search episodic memory
+
+USER REQUEST: {user_request}
+
+Provide ONLY the gh command in a code block. No explanations."""
+
+# Prompt for batched runs (--batch-size): several requests from one group per
+# claude invocation, answered in numbered blocks that batching.py splits apart
+BATCH_PROMPT_TEMPLATE = """CRITICAL INSTRUCTIONS:
+1. Identify which gh-cli-search skill is needed: gh-search-code, gh-search-issues, gh-search-prs, gh-search-repos, gh-search-commits, or gh-cli-setup
+2. Use the Skill tool to load that skill
+3. Follow the skill's documentation to generate the correct command
+4. Do not search episodic memory
+5. Answer each of the {count} numbered requests below independently
+
+{requests}
+
+For each request, in order, reply with exactly this block and nothing else:
+=== ANSWER <number> ===
+```bash
+<the gh command>
+```
+=== END ANSWER <number> ==="""
+
+# Extra timeout per additional request in a batch
+BATCH_TIMEOUT_PER_TEST_SECONDS = 30
+
+# Sent ahead of TEST_PROMPT_TEMPLATE to reused sessions (experimental
+# --session-requests > 1), whose conversation still holds earlier requests
+SESSION_PROMPT_PREAMBLE = """NEW INDEPENDENT REQUEST: every earlier request in this conversation is finished.
+Do not reuse earlier answers or commands; answer only the request below.
+
+"""
+
+# Requests a session answers before it is replaced (--engine sessions);
+# 1 gives every test a fresh conversation, more reuses it (not a clean run)
+SESSION_MAX_REQUESTS = 1
+
+# Pipelined review (--pipelined-review): per-group reviewer passes run in the
+# background while other groups are still executing, then get merged
+GROUP_REVIEWER_NOTES_FILENAME = "GROUP-REVIEWER-NOTES.md"
+GROUP_REVIEW_WORKERS = 2
+GROUP_REVIEW_TIMEOUT_SECONDS = 180
+
+# Statistical flakiness mode (--samples): sequential probability ratio test
+# between a stable test (passes with SAMPLING_STABLE_PASS_RATE, or fails with
+# it) and a flaky one (passes with SAMPLING_FLAKY_PASS_RATE)
+SAMPLING_STABLE_PASS_RATE = 0.95
+SAMPLING_FLAKY_PASS_RATE = 0.5
+SAMPLING_ALPHA = 0.1  # Chance of calling a flaky test stable
+SAMPLING_BETA = 0.1  # Chance of calling a stable test flaky
+SAMPLING_PASS_AT_K = 3  # k reported as pass@k next to pass@1
+# A test whose latest SAMPLING_PRIOR_RUNS executed results (history index) all
+# agree, with the current scenario text and skills, counts them as samples, so one agreeing sample reaches a verdict
+SAMPLING_PRIOR_RUNS = 3
+SAMPLES_DIRNAME = "samples"  # Per-sample reports: <group>/samples/<sample>/<test>.md
+
+# Response cache size limit (least recently used entries are evicted beyond this)
+RESPONSE_CACHE_MAX_BYTES = 50 * 1024 * 1024
+
+# Per-stream capture limit for a test process; anything beyond is dropped
+# (guards against runaway output, real answers are a few KB)
+OUTPUT_CAPTURE_MAX_BYTES = 4 * 1024 * 1024
+
+# Characters of output kept in memory and in reports (head and tail);
+# the complete output is stored gzipped next to the test report
+OUTPUT_PREVIEW_HEAD_CHARS = 1500
+OUTPUT_PREVIEW_TAIL_CHARS = 500
+
+# Skills loaded by every test session regardless of group
+# (using-gh-cli-search is injected by the SessionStart hook, gh-search is the umbrella skill)
+SHARED_SKILLS = ["using-gh-cli-search", "gh-search"]
+
 # Maximum test iterations to prevent infinite loops
 MAX_TEST_ITERATIONS = 5
@@ -0,0 +1,211 @@
+"""Compact failure digest for the reviewer and PM agents
+
+REPORT.md embeds the output of every failed test, so reading it costs the
+agents more with every failure. DIGEST.md summarizes the same run in a
+fixed-size form: failures clustered by normalized failure reason and by
+skill, one representative output per cluster, and the change since the
+previous test run (new, fixed and still-failing tests).
+"""
+
+import re
+from pathlib import Path
+from typing import List, Dict, Tuple, Optional
+
+from .models import TestResult
+from .cache import skill_for_group
+from .scheduling import test_key
+from .revalidation import load_report_results
+from .flakiness import VERDICT_FLAKY, VERDICT_UNCERTAIN, describe_samples
+
+# File written next to REPORT.md
+DIGEST_FILENAME = "DIGEST.md"
+
+# Characters of the representative output shown per cluster
+DIGEST_OUTPUT_CHARS = 800
+
+# Tests listed per cluster before the rest are summarized as a count
+DIGEST_TESTS_PER_CLUSTER = 10
+
+_QUOTED = re.compile(r'"[^"]*"|\'[^\']*\'')
+_NUMBER = re.compile(r'\b\d+(\.\d+)?\b')
+_ATTEMPTS = re.compile(r'\s+after \d+ attempt\(s\).*$', re.DOTALL)
+
+
+def normalize_reason(reason: str) -> List[str]:
+    """Split a failure reason into normalized cluster keys
+
+    Validation joins one message per failed criterion with "; ", so a test
+    can belong to several clusters. Quoted values and numbers are masked so
+    the same problem with different arguments clusters together.
+
+    Args:
+        reason: TestResult.failure_reason
+
+    Returns:
+        Normalized reasons, in order, without duplicates
+    """
+    reason = _ATTEMPTS.sub('', reason.strip())
+    keys = []
+    for part in reason.split('; '):
+        part = _NUMBER.sub('N', _QUOTED.sub('"…"', part))
+        part = ' '.join(part.split())
+        if part and part not in keys:
+            keys.append(part)
+    return keys or ["No failure reason recorded"]
+
+
+def cluster_failures(results: List[TestResult]) -> List[Tuple[str, List[TestResult]]]:
+    """Group failed tests by normalized failure reason
+
+    Args:
+        results: Failed test results
+
+    Returns:
+        (reason, tests) pairs, largest cluster first
+    """
+    clusters: Dict[str, List[TestResult]] = {}
+    for result in results:
+        for key in normalize_reason(result.failure_reason):
+            clusters.setdefault(key, []).append(result)
+    return sorted(clusters.items(), key=lambda item: (-len(item[1]), item[0]))
+
+
+def compare_runs(current: List[TestResult], previous: List[TestResult]) -> Dict[str, List[TestResult]]:
+    """Classify this run's tests against the previous run
+
+    Infrastructure errors are neither passes nor failures and are left out
+    on both sides.
+
+    Args:
+        current: This run's results
+        previous: The previous run's results
+
+    Returns:
+        Dictionary with 'new' (failing now, passed before), 'fixed' (passing
+        now, failed before) and 'still' (failing in both) result lists
+    """
+    previous_status = {test_key(r.group, r.test_num): r.status for r in previous}
+    delta: Dict[str, List[TestResult]] = {'new': [], 'fixed': [], 'still': []}
+    for result in current:
+        before = previous_status.get(test_key(result.group, result.test_num))
+        if before is None or before == "INFRA_ERROR" or result.status == "INFRA_ERROR":
+            continue
+        failed_before = before == "FAIL"
+        if result.status == "FAIL":
+            delta['still' if failed_before else 'new'].append(result)
+        elif failed_before:
+            delta['fixed'].append(result)
+    return delta
+
+
+def _test_line(result: TestResult) -> str:
+    """One-line reference to a test for digest lists"""
+    return f"- `{test_key(result.group, result.test_num)}` {result.test_name} ([report](./{result.group}/{result.test_num}.md))"
+
+
+def representative(tests: List[TestResult]) -> TestResult:
+    """Pick the test whose output best stands for its cluster
+
+    Prefers a test that produced a command (the typical wrong answer) over
+    one that produced none, then the shortest output.
+    """
+    return min(tests, key=lambda r: (not r.command_generated, r.output_chars or len(r.output)))
+
+
+def write_failure_digest(report_dir: Path, all_results: Dict[str, List[TestResult]],
+                         previous_report_dir: Optional[Path] = None) -> Path:
+    """Write DIGEST.md for a test run
+
+    Args:
+        report_dir: Report directory of the run
+        all_results: Dictionary mapping group names to test results
+        previous_report_dir: Previous test run, for the run-over-run delta
+
+    Returns:
+        Path of the digest
+    """
+    results = [r for group_results in all_results.values() for r in group_results]
+    failed = [r for r in results if r.status == "FAIL"]
+    infra = [r for r in results if r.status == "INFRA_ERROR"]
+    passed = sum(1 for r in results if r.status in ["PASS", "SKIPPED"])
+
+    digest_path = report_dir / DIGEST_FILENAME
+    with open(digest_path, 'w') as f:
+        f.write("# Failure Digest\n\n")
+        f.write(f"**Run:** {report_dir.name}\n")
+        f.write(f"**Tests:** {len(results)} ({passed} passed, {len(failed)} failed, {len(infra)} infrastructure errors)\n\n")
+        f.write("Generated by the orchestrator from `results.jsonl`. Read this first; open REPORT.md or the "
+                "linked test reports only for the details a cluster doesn't show.\n\n")
+
+        # Run-over-run delta
+        f.write("## Change Since Previous Run\n\n")
+        if previous_report_dir is None:
+            f.write("No previous run to compare with.\n\n")
+        else:
+            previous = [r for group_results in load_report_results(previous_report_dir).values() for r in group_results]
+            delta = compare_runs(results, previous)
+            f.write(f"Compared with {previous_report_dir.name}: {len(delta['new'])} new failures, "
+                    f"{len(delta['fixed'])} fixed, {len(delta['still'])} still failing.\n\n")
+            for key, title in (('new', "New Failures"), ('fixed', "Fixed"), ('still', "Still Failing")):
+                if delta[key]:
+                    f.write(f"### {title}\n\n")
+                    for result in delta[key]:
+                        reason = f" - {result.failure_reason}" if result.status == "FAIL" else ""
+                        f.write(f"{_test_line(result)}{reason}\n")
+                    f.write("\n")
+
+        # Flakiness mode: tests whose samples disagree are not plain skill failures
+        unstable = [r for r in results if r.verdict in [VERDICT_FLAKY, VERDICT_UNCERTAIN]]
+        if unstable:
+            f.write("## Flaky Tests\n\n")
+            f.write("These tests passed in some samples and failed in others (their status is the majority "
+                    "outcome). Treat them as nondeterminism in the skill or test, not as a consistent failure.\n\n")
+            for result in unstable:
+                f.write(f"{_test_line(result)} - {result.verdict}: {describe_samples(result)}\n")
+            f.write("\n")
+
+        # Failures by skill
+        f.write("## Failures by Skill\n\n")
+        if not failed:
+            f.write("No test failures - all tests passed!\n\n")
+        else:
+            f.write("| Skill | Failed | Tests | Most Common Reasons |\n")
+            f.write("|-------|--------|-------|---------------------|\n")
+            for group_name, group_results in sorted(all_results.items()):
+                group_failed = [r for r in group_results if r.status == "FAIL"]
+                if not group_failed:
+                    continue
+                top = "; ".join(f"{reason} ({len(tests)})" for reason, tests in cluster_failures(group_failed)[:3])
+                f.write(f"| {skill_for_group(group_name)} | {len(group_failed)} | {len(group_results)} | {top} |\n")
+            f.write("\n")
+
+        # Failure clusters
+        if failed:
+            f.write("## Failure Clusters\n\n")
+            f.write("A test whose failure reason lists several problems appears in several clusters.\n\n")
+            for index, (reason, tests) in enumerate(cluster_failures(failed), 1):
+                skills = sorted({skill_for_group(r.group) for r in tests})
+                f.write(f"### Cluster {index}: {reason} ({len(tests)} test{'s' if len(tests) != 1 else ''})\n\n")
+                f.write(f"**Skills:** {', '.join(skills)}\n\n")
+                for result in tests[:DIGEST_TESTS_PER_CLUSTER]:
+                    f.write(f"{_test_line(result)}\n")
+                if len(tests) > DIGEST_TESTS_PER_CLUSTER:
+                    f.write(f"- ... and {len(tests) - DIGEST_TESTS_PER_CLUSTER} more\n")
+                example = representative(tests)
+                output = example.output[:DIGEST_OUTPUT_CHARS]
+                more = "\n[...]" if len(example.output) > DIGEST_OUTPUT_CHARS or example.truncated else ""
+                f.write(f"\n**Representative:** `{test_key(example.group, example.test_num)}` "
+                        f"\"{example.user_request}\"\n\n")
+                f.write(f"**Command Generated:**\n```bash\n{example.command_generated}\n```\n\n")
+                # Outputs hold ``` fences of their own
+                f.write(f"**Output:**\n~~~\n{output}{more}\n~~~\n\n")
+
+        # Infrastructure errors only need counting; they are not skill failures
+        if infra:
+            kinds: Dict[str, int] = {}
+            for result in infra:
+                kinds[result.error_kind or "error"] = kinds.get(result.error_kind or "error", 0) + 1
+            f.write("## Infrastructure Errors\n\n")
+            f.write(", ".join(f"{kind}: {count}" for kind, count in sorted(kinds.items())) + " (not skill failures)\n\n")
+
+    return digest_path
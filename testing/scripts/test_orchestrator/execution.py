@@ -1,49 +1,414 @@
 """Test execution and processing"""
 
+import os
+import re
+import copy
+import json
+import time
+import signal
+import contextlib
+import tempfile
+import selectors
+import threading
 import subprocess
 from pathlib import Path
 from datetime import datetime
-from typing import Tuple, Dict
+from typing import Tuple, Dict, List, Set, Optional, Callable, ContextManager, TYPE_CHECKING
 
-from .config import RUN_TEST_SCRIPT, print_lock
+from .config import RUN_TEST_SCRIPT, TEST_TIMEOUT_SECONDS, TEST_PROMPT_TEMPLATE, print_lock, claude_bin
 from .models import TestResult
-from .validation import extract_command, validate_test
+from .cache import ResponseCache, test_fingerprint
+from .rules import compile_criteria, unparsed_criteria
+from .retry import RetryPolicy, record_attempt, summarize_error
+from .validation import extract_command, validate_test, extract_complete_command, supports_early_exit
 from .reporting import write_test_report
+from .scheduling import test_key
+from .tracing import tracer
+from .outputs import read_capped, make_preview, output_blob_path, write_output_blob
+from .usage import collect_usage, report_usage, result_usage, decode_json_result
+
+if TYPE_CHECKING:
+    from .sessions import SessionPool
+
+
+# Error signatures that indicate API throttling/overload rather than a bad answer
+RATE_LIMIT_PATTERN = re.compile(r'rate.?limit|too many requests|\b429\b|overloaded|\b529\b', re.IGNORECASE)
+
+# Set on Ctrl-C: no new attempts start and in-flight results are discarded
+shutdown_event = threading.Event()
+
+# Test processes currently running (thread engine), killed by request_shutdown()
+_active_processes: Set[subprocess.Popen] = set()
+_active_lock = threading.Lock()
+
+
+def request_shutdown() -> None:
+    """Stop starting tests and kill every in-flight test process group"""
+    with _active_lock:
+        shutdown_event.set()
+        processes = list(_active_processes)
+    for process in processes:
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+
+def _start_process(args: List[str], **kwargs) -> subprocess.Popen:
+    """Start a test process in its own process group and track it for shutdown
+
+    Keyword arguments are passed to Popen (e.g., stdout/stderr targets).
+    """
+    options = dict(
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        start_new_session=True  # Own process group so claude dies with the wrapper
+    )
+    options.update(kwargs)
+    with _active_lock:
+        if shutdown_event.is_set():
+            raise InterruptedError("test run interrupted")
+        process = subprocess.Popen(args, **options)
+        _active_processes.add(process)
+    return process
+
+
+def _finish_process(process: subprocess.Popen) -> None:
+    with _active_lock:
+        _active_processes.discard(process)
+
+
+def classify_failure(stdout: str, stderr: str) -> str:
+    """Classify infrastructure problems in a claude invocation
+
+    Args:
+        stdout: Claude's stdout
+        stderr: Claude's stderr
+
+    Returns:
+        'timeout', 'rate_limit', 'error', 'empty', or '' if the run looks healthy
+    """
+    if stderr.startswith("ERROR: Test timed out"):
+        return 'timeout'
+    # A run that produced an answer is healthy, even if claude logged (and survived)
+    # a rate limit on the way; non-zero exits show up as an ERROR: line (with_exit_status)
+    if not stderr.startswith("ERROR:") and stdout.strip():
+        return ''
+    if RATE_LIMIT_PATTERN.search(stderr):
+        return 'rate_limit'
+    if stderr.startswith("ERROR:"):
+        return 'error'
+    return 'empty'
+
+
+def with_exit_status(stderr: str, returncode: int) -> str:
+    """Prefix stderr with an ERROR: line when the process exited non-zero
+
+    Args:
+        stderr: The process's stderr
+        returncode: The process's exit code
+
+    Returns:
+        stderr, prefixed with the exit status on failure
+    """
+    if returncode != 0:
+        return f"ERROR: Process exited with code {returncode}\n{stderr}"
+    return stderr
 
 
 def run_single_test(user_request: str) -> Tuple[str, str]:
     """Execute a single test using run-single-test.sh
 
+    claude runs with json output; the response is unwrapped and its usage
+    reported (see usage.collect_usage).
+
     Args:
         user_request: The user's test request string
 
     Returns:
         Tuple of (stdout, stderr)
     """
+    env = dict(os.environ, TEST_OUTPUT_FORMAT="json")
+    return run_json_captured([str(RUN_TEST_SCRIPT), user_request], TEST_TIMEOUT_SECONDS, env=env)
+
+
+def run_json_captured(args: List[str], timeout: float, **kwargs) -> Tuple[str, str]:
+    """run_captured() for a claude run with `--output-format json`
+
+    Returns:
+        Tuple of (response text, stderr), after reporting the run's usage
+    """
+    stdout, stderr, usage = decode_json_result(*run_captured(args, timeout, **kwargs))
+    report_usage(usage)
+    return stdout, stderr
+
+
+def run_captured(args: List[str], timeout: float, **kwargs) -> Tuple[str, str]:
+    """Run a test process to completion with bounded output capture
+
+    Output goes to temporary files rather than pipes and is read back up
+    to OUTPUT_CAPTURE_MAX_BYTES per stream.
+
+    Args:
+        args: Command line (run-single-test.sh or claude)
+        timeout: Seconds to wait before killing the process group
+        **kwargs: Extra Popen arguments (e.g., env)
+
+    Returns:
+        Tuple of (stdout, stderr), with an ERROR: message in stderr on failure
+    """
+    with tempfile.TemporaryFile() as stdout_file, tempfile.TemporaryFile() as stderr_file:
+        try:
+            with tracer.span("spawn"):
+                process = _start_process(args, stdout=stdout_file, stderr=stderr_file, **kwargs)
+        except Exception as e:
+            return "", f"ERROR: {str(e)}"
+
+        try:
+            with tracer.span("claude"):
+                try:
+                    process.wait(timeout=timeout)
+                except subprocess.TimeoutExpired:
+                    os.killpg(process.pid, signal.SIGKILL)
+                    process.wait()
+                    return "", f"ERROR: Test timed out after {timeout:.0f} seconds"
+            return read_capped(stdout_file), with_exit_status(read_capped(stderr_file), process.returncode)
+        except Exception as e:
+            return "", f"ERROR: {str(e)}"
+        finally:
+            _finish_process(process)
+
+
+class StreamJsonDecoder:
+    """Incrementally decode claude's stream-json output into response text
+
+    Feed raw stdout chunks as they arrive; `text` holds all assistant text
+    received so far and `response` the final answer once known. Arrival
+    times (tracer clock) of the first model event and of the Skill tool
+    call and its result are kept for phase timing.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._seen_deltas = False
+        self.text = ""
+        self.result: Optional[str] = None
+        self.is_error = False
+        self.usage: Dict[str, float] = {}
+        self.first_output_at: Optional[float] = None
+        self.skill_started_at: Optional[float] = None
+        self.skill_finished_at: Optional[float] = None
+
+    def feed(self, data: str) -> None:
+        """Consume a chunk of stdout (may contain partial lines)"""
+        self._buffer += data
+        *lines, self._buffer = self._buffer.split("\n")
+        for line in lines:
+            self._handle_line(line)
+
+    def close(self) -> None:
+        """Consume any trailing line without a newline"""
+        if self._buffer:
+            self._handle_line(self._buffer)
+            self._buffer = ""
+
+    def _handle_line(self, line: str) -> None:
+        line = line.strip()
+        if not line:
+            return
+        try:
+            event = json.loads(line)
+        except ValueError:
+            # Not stream-json (e.g., a wrapper error message) - keep it verbatim
+            self.text += line + "\n"
+            return
+
+        event_type = event.get('type')
+        now = tracer.now()
+        if event_type in ('stream_event', 'assistant') and self.first_output_at is None:
+            self.first_output_at = now
+
+        if event_type == 'stream_event':
+            inner = event.get('event', {})
+            delta = inner.get('delta', {})
+            if delta.get('type') == 'text_delta':
+                self._seen_deltas = True
+                self.text += delta.get('text', '')
+            elif inner.get('type') == 'content_block_start':
+                self._check_skill_call(inner.get('content_block', {}), now)
+        elif event_type == 'assistant':
+            for block in event.get('message', {}).get('content', []):
+                self._check_skill_call(block, now)
+                # Full messages only matter when partial messages aren't streamed
+                if block.get('type') == 'text' and not self._seen_deltas:
+                    self.text += block.get('text', '') + "\n"
+        elif event_type == 'user':
+            # Tool results come back as user messages
+            if self.skill_started_at is not None and self.skill_finished_at is None:
+                self.skill_finished_at = now
+        elif event_type == 'result':
+            self.result = event.get('result')
+            self.is_error = bool(event.get('is_error'))
+            self.usage = result_usage(event)
+
+    def _check_skill_call(self, block: Dict, now: float) -> None:
+        if block.get('type') == 'tool_use' and block.get('name') == 'Skill' and self.skill_started_at is None:
+            self.skill_started_at = now
+
+    @property
+    def response(self) -> str:
+        """Final answer if the result event arrived, otherwise text so far"""
+        return self.result if self.result is not None else self.text
+
+
+def trace_stream_phases(decoder: StreamJsonDecoder, spawned_at: float, ended_at: float) -> None:
+    """Record ttfb, skill loading and generation spans for a streamed run
+
+    Args:
+        decoder: Decoder that consumed the run's stdout
+        spawned_at: When the process had been started (tracer clock)
+        ended_at: When output ended or the process was stopped
+    """
+    if decoder.first_output_at is None:
+        tracer.add_span("ttfb", spawned_at, ended_at)
+        return
+    tracer.add_span("ttfb", spawned_at, decoder.first_output_at)
+    cursor = decoder.first_output_at
+    if decoder.skill_started_at is not None:
+        skill_end = decoder.skill_finished_at or ended_at
+        tracer.add_span("generation", cursor, decoder.skill_started_at)
+        tracer.add_span("skill loading", decoder.skill_started_at, skill_end)
+        cursor = skill_end
+    tracer.add_span("generation", cursor, ended_at)
+
+
+def run_single_test_streaming(user_request: str, stop_when: Callable[[str], bool]) -> Tuple[str, str, bool]:
+    """Execute a single test via run-single-test.sh, reading output as it streams
+
+    The process group (wrapper and claude) is terminated as soon as
+    stop_when() accepts the response text received so far.
+
+    Args:
+        user_request: The user's test request string
+        stop_when: Predicate over the partial response text
+
+    Returns:
+        Tuple of (stdout, stderr, stopped_early)
+    """
+    env = dict(os.environ, TEST_OUTPUT_FORMAT="stream-json")
+    # stderr only matters once the process is done, so it goes to a file
+    stderr_file = tempfile.TemporaryFile()
     try:
-        result = subprocess.run(
-            [str(RUN_TEST_SCRIPT), user_request],
-            capture_output=True,
-            text=True,
-            timeout=120  # 120 second timeout
-        )
-        return result.stdout, result.stderr
-    except subprocess.TimeoutExpired:
-        return "", "ERROR: Test timed out after 120 seconds"
+        with tracer.span("spawn"):
+            process = _start_process([str(RUN_TEST_SCRIPT), user_request], env=env, stderr=stderr_file)
     except Exception as e:
-        return "", f"ERROR: {str(e)}"
+        stderr_file.close()
+        return "", f"ERROR: {str(e)}", False
 
+    spawned_at = tracer.now()
+    ended_at = None
+    decoder = StreamJsonDecoder()
+    stopped_early = False
+    deadline = time.monotonic() + TEST_TIMEOUT_SECONDS
 
-def process_single_test(test: Dict, group_name: str, group_dir: Path) -> TestResult:
-    """Process a single test (for parallel execution)
+    selector = selectors.DefaultSelector()
+    selector.register(process.stdout, selectors.EVENT_READ)
+
+    try:
+        while selector.get_map():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                ended_at = tracer.now()
+                _terminate_process_group(process)
+                stderr_file.close()
+                return decoder.response, f"ERROR: Test timed out after {TEST_TIMEOUT_SECONDS} seconds", False
+
+            for key, _ in selector.select(timeout=remaining):
+                data = os.read(key.fd, 65536)
+                if not data:
+                    selector.unregister(key.fileobj)
+                    continue
+
+                decoder.feed(data.decode(errors='replace'))
+                if stop_when(decoder.text):
+                    stopped_early = True
+                    ended_at = tracer.now()
+                    _terminate_process_group(process)
+                    break
+            if stopped_early:
+                break
+    finally:
+        trace_stream_phases(decoder, spawned_at, ended_at or tracer.now())
+        # Empty when stopped early: the result event (which carries usage) never arrived
+        report_usage(decoder.usage)
+        _finish_process(process)
+        selector.close()
+        process.stdout.close()
+
+    with stderr_file:
+        stderr = read_capped(stderr_file)
+    if not stopped_early:
+        decoder.close()
+        stderr = with_exit_status(stderr, process.wait())
+
+    return decoder.response, stderr, stopped_early
+
+
+def _terminate_process_group(process: subprocess.Popen) -> None:
+    """Terminate a process group, escalating to SIGKILL if it lingers"""
+    with tracer.span("terminate"):
+        _terminate(process)
+
+
+def _terminate(process: subprocess.Popen) -> None:
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=5)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+        process.wait()
+    except ProcessLookupError:
+        process.wait()
+
+
+def build_test_command(user_request: str, streaming: bool = False, prompt: Optional[str] = None) -> List[str]:
+    """Build the claude command line used by run-single-test.sh
+
+    Used by engines that launch claude directly instead of through the
+    shell wrapper.
+
+    Args:
+        user_request: The user's test request string
+        streaming: Emit stream-json with partial messages instead of a json result
+        prompt: Complete prompt to send instead of TEST_PROMPT_TEMPLATE
+            (used for batched requests)
+
+    Returns:
+        Argument list for the claude process
+    """
+    output_flags = ['--output-format', 'json']
+    if streaming:
+        output_flags = ['--output-format', 'stream-json', '--verbose', '--include-partial-messages']
+
+    return [
+        claude_bin(),
+        '-p', prompt or TEST_PROMPT_TEMPLATE.format(user_request=user_request),
+        *output_flags,
+        '--allowedTools', 'Read,Skill',
+        '--permission-mode', 'bypassPermissions'
+    ]
+
+
+def create_test_result(test: Dict, group_name: str) -> TestResult:
+    """Create a pending TestResult from a test definition
 
     Args:
         test: Test definition dictionary
         group_name: Name of the test group
-        group_dir: Directory for group reports
 
     Returns:
-        TestResult with execution results
+        TestResult populated with the test's metadata
     """
     test_result = TestResult(
         group=group_name,
@@ -52,29 +417,172 @@ def process_single_test(test: Dict, group_name: str, group_dir: Path) -> TestRes
         user_request=test['user_request']
     )
     test_result.criteria = test['criteria']
+    test_result.unchecked_criteria = unparsed_criteria(test.get('rules') or compile_criteria(test['criteria']))
     test_result.platform = test['platform']
+    test_result.fingerprint = test_fingerprint(test, group_name)
+    return test_result
+
+
+def complete_test_result(test_result: TestResult, test: Dict, group_name: str, group_dir: Path, stdout: str, stderr: str) -> TestResult:
+    """Validate a test's output, write its report and print its status
+
+    Shared by all execution engines so results and reports are identical.
+    Runs that still failed for infrastructure reasons after all retries are
+    marked INFRA_ERROR instead of being validated.
+
+    Args:
+        test_result: Result with timing already recorded
+        test: Test definition dictionary
+        group_name: Name of the test group
+        group_dir: Directory for group reports
+        stdout: Claude's stdout
+        stderr: Claude's stderr
 
-    # Run test with timing
-    test_result.start_time = datetime.now()
-    stdout, stderr = run_single_test(test['user_request'])
-    test_result.end_time = datetime.now()
-    test_result.duration_seconds = (test_result.end_time - test_result.start_time).total_seconds()
-    test_result.output = stdout + "\n" + stderr
+    Returns:
+        The completed TestResult
+    """
+    # Keep a preview in memory; the complete output goes to the gzipped store
+    output = stdout + "\n" + stderr
+    test_result.output = make_preview(output)
+    test_result.output_chars = len(output)
+    test_result.stdout_chars = len(stdout)
+    blob_path = output_blob_path(group_dir, test_result.test_num)
+    with tracer.span("report I/O"):
+        write_output_blob(blob_path, output)
+    test_result.output_path = str(blob_path)
+    test_result.error_kind = classify_failure(stdout, stderr)
 
     # Extract command
     test_result.command_generated = extract_command(stdout)
 
-    # Validate (add group name to test dict for validation)
-    test['group'] = group_name
-    passed, reason = validate_test(test, stdout, test_result.command_generated)
-    test_result.status = "PASS" if passed else "FAIL"
-    test_result.failure_reason = reason if not passed else ""
+    if test_result.error_kind:
+        attempts = max(1, len(test_result.attempts))
+        error = summarize_error(stderr)
+        detail = f": {error}" if error else ""
+        test_result.status = "INFRA_ERROR"
+        test_result.failure_reason = f"Infrastructure error ({test_result.error_kind}) after {attempts} attempt(s){detail}"
+    else:
+        # Validate (add group name to test dict for validation)
+        test['group'] = group_name
+        with tracer.span("validation"):
+            passed, reason = validate_test(test, stdout, test_result.command_generated)
+        test_result.status = "PASS" if passed else "FAIL"
+        test_result.failure_reason = reason if not passed else ""
 
     # Write individual report
-    write_test_report(group_dir, test_result)
+    with tracer.span("report I/O"):
+        write_test_report(group_dir, test_result)
 
     # Thread-safe status printing
     with print_lock:
-        print(f"  Test {test_result.test_num}: {test_result.test_name[:50]}... {test_result.status} ({test_result.duration_seconds:.1f}s)")
+        cached_note = ", cached" if test_result.cached else ", early exit" if test_result.early_exit else \
+            f", batch of {test_result.batch_size}" if test_result.batch_size > 1 else \
+            f", session request {test_result.session_request}, not clean" if test_result.session_request > 1 else ""
+        retry_note = f", {len(test_result.attempts)} attempts" if len(test_result.attempts) > 1 else ""
+        print(f"  [{group_name}] Test {test_result.test_num}: {test_result.test_name[:50]}... {test_result.status} ({test_result.duration_seconds:.1f}s{cached_note}{retry_note})")
+
+    return test_result
+
+
+def process_single_test(test: Dict, group_name: str, group_dir: Path, cache: Optional[ResponseCache] = None,
+                        early_exit: bool = False, retry: Optional[RetryPolicy] = None,
+                        batch_fallback: bool = False, sessions: Optional['SessionPool'] = None,
+                        prior_usage: Optional[Dict[str, float]] = None,
+                        slot: Optional[ContextManager] = None) -> TestResult:
+    """Process a single test (for parallel execution)
+
+    Args:
+        test: Test definition dictionary
+        group_name: Name of the test group
+        group_dir: Directory for group reports
+        cache: Optional response cache to consult before running claude
+        early_exit: Stream output and stop claude once a complete gh command is emitted
+        retry: Optional retry policy for transient failures
+        batch_fallback: The test is being re-run alone after its batch failed
+        sessions: Answer in a pooled persistent claude session instead of a new process
+        prior_usage: Usage already spent on this test (its share of a failed batch)
+        slot: Concurrency gate (e.g. AdaptiveLimiter) held while each attempt
+            runs and released during retry backoff
+
+    Returns:
+        TestResult with execution results
+    """
+    test_result = create_test_result(test, group_name)
+    test_result.batch_fallback = batch_fallback
+    test_result.usage = dict(prior_usage or {})
+
+    with tracer.collect_phases(test_result.phase_seconds), collect_usage(test_result.usage), \
+            tracer.span(test_key(group_name, test['test_num']), category="test") as span_args:
+        # Run test with timing
+        test_result.start_time = datetime.now()
+        with tracer.span("cache lookup"):
+            cache_key = cache.key_for(test['user_request'], group_name) if cache else None
+            cached_response = cache.get(cache_key) if cache else None
+        if cached_response:
+            stdout, stderr = cached_response
+            test_result.cached = True
+        else:
+            attempt = 1
+            while True:
+                with slot or contextlib.nullcontext():
+                    attempt_start = datetime.now()
+                    if attempt == 1:
+                        # Timing starts once a slot is acquired, matching the asyncio engine
+                        test_result.start_time = attempt_start
+                    with tracer.span(f"attempt {attempt}", category="attempt"):
+                        if early_exit and supports_early_exit(test):
+                            stdout, stderr, test_result.early_exit = run_single_test_streaming(
+                                test['user_request'],
+                                lambda text: extract_complete_command(text) is not None
+                            )
+                        elif sessions:
+                            stdout, stderr, test_result.session_request = sessions.run(test['user_request'])
+                        else:
+                            stdout, stderr = run_single_test(test['user_request'])
+                error_kind = classify_failure(stdout, stderr)
+                record_attempt(test_result, attempt_start, datetime.now(), error_kind, stderr)
+
+                # Back off without holding a slot
+                if not retry or not retry.should_retry(error_kind, attempt) or shutdown_event.is_set():
+                    break
+                with tracer.span("backoff"):
+                    shutdown_event.wait(retry.backoff_delay(attempt))
+                attempt += 1
+
+            if error_kind and shutdown_event.is_set():
+                # Killed by Ctrl-C: not a real result, so it is neither cached nor reported
+                raise InterruptedError("test run interrupted")
+            # Answers from reused sessions depend on earlier requests, so only clean runs are
+            # cached; an early exit cut the answer short, which a full run must not replay
+            if cache and test_result.session_request <= 1 and not test_result.early_exit:
+                cache.put(cache_key, stdout, stderr)
+        test_result.end_time = datetime.now()
+        test_result.duration_seconds = (test_result.end_time - test_result.start_time).total_seconds()
+
+        complete_test_result(test_result, test, group_name, group_dir, stdout, stderr)
+        span_args['status'] = test_result.status
+
+    return test_result
+
+
+def carry_over_test_result(previous: TestResult, group_dir: Path, source_dir_name: str) -> TestResult:
+    """Reuse a previous run's result for a test that was not re-run
+
+    Args:
+        previous: Result from the previous test run
+        group_dir: Directory for group reports in the current run
+        source_dir_name: Report directory name the result was produced in
+
+    Returns:
+        Copy of the result marked as carried over
+    """
+    test_result = copy.copy(previous)
+    # Keep pointing at the run that actually executed the test
+    test_result.carried_from = previous.carried_from or source_dir_name
+
+    write_test_report(group_dir, test_result)
+
+    with print_lock:
+        print(f"  [{test_result.group}] Test {test_result.test_num}: {test_result.test_name[:50]}... {test_result.status} (carried over from {test_result.carried_from})")
 
     return test_result
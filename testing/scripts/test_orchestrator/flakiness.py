@@ -0,0 +1,174 @@
+"""Pass-probability estimates and flakiness verdicts for sampled tests
+
+In flakiness mode (--samples) each test is run several times. A sequential
+probability ratio test (SPRT) decides after every wave of samples whether
+the test is a stable pass, a stable failure or flaky, so stable tests stop
+after the few samples needed to tell them apart from flaky ones. A test
+whose recent history is consistent starts with those runs as evidence, so
+a single sample that agrees with them decides it.
+"""
+
+import math
+from typing import List, Tuple, Optional
+
+from .config import (
+    SAMPLING_STABLE_PASS_RATE, SAMPLING_FLAKY_PASS_RATE, SAMPLING_ALPHA, SAMPLING_BETA, SAMPLING_PASS_AT_K,
+    SAMPLING_PRIOR_RUNS
+)
+from .models import TestResult
+
+# Verdicts, in the order reports list them
+VERDICT_FLAKY = "flaky"
+VERDICT_UNCERTAIN = "uncertain"  # Sample limit reached before the test decided
+VERDICT_STABLE_FAIL = "stable-fail"
+VERDICT_STABLE_PASS = "stable-pass"
+VERDICTS = [VERDICT_FLAKY, VERDICT_UNCERTAIN, VERDICT_STABLE_FAIL, VERDICT_STABLE_PASS]
+
+
+def wilson_interval(passes: int, samples: int, z: float = 1.96) -> Tuple[float, float]:
+    """Wilson score interval for a pass probability (95% by default)
+
+    Unlike the normal approximation it stays inside [0, 1] and is usable
+    for the handful of samples a test gets.
+
+    Args:
+        passes: Samples that passed
+        samples: Samples taken
+
+    Returns:
+        (low, high) bounds
+    """
+    if samples == 0:
+        return 0.0, 1.0
+    rate = passes / samples
+    denominator = 1 + z * z / samples
+    center = (rate + z * z / (2 * samples)) / denominator
+    margin = z * math.sqrt(rate * (1 - rate) / samples + z * z / (4 * samples * samples)) / denominator
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+
+def pass_at_k(passes: int, samples: int, k: int) -> Optional[float]:
+    """Unbiased estimate of the chance that at least one of k runs passes
+
+    Args:
+        passes: Samples that passed
+        samples: Samples taken
+        k: Runs per attempt
+
+    Returns:
+        The estimate, or None with fewer than k samples
+    """
+    if samples < k:
+        return None
+    return 1.0 - math.comb(samples - passes, k) / math.comb(samples, k)
+
+
+class SequentialTest:
+    """SPRT of a stable test against a flaky one
+
+    Two tests run side by side: stable pass (p = stable_rate) against flaky
+    (p = flaky_rate), and stable failure (p = 1 - stable_rate) against
+    flaky. A test is stable once either stable hypothesis is accepted, and
+    flaky once both are rejected.
+    """
+
+    def __init__(self, stable_rate: float = SAMPLING_STABLE_PASS_RATE, flaky_rate: float = SAMPLING_FLAKY_PASS_RATE,
+                 alpha: float = SAMPLING_ALPHA, beta: float = SAMPLING_BETA):
+        self.accept = math.log((1 - beta) / alpha)
+        self.reject = math.log(beta / (1 - alpha))
+        # Log-likelihood ratio per passing / failing sample, for each stable hypothesis
+        self._pass_steps = (math.log(stable_rate / flaky_rate), math.log((1 - stable_rate) / flaky_rate))
+        self._fail_steps = (math.log((1 - stable_rate) / (1 - flaky_rate)), math.log(stable_rate / (1 - flaky_rate)))
+
+    def verdict(self, passes: int, fails: int) -> str:
+        """Verdict after the given samples
+
+        Returns:
+            VERDICT_STABLE_PASS, VERDICT_STABLE_FAIL, VERDICT_FLAKY, or ''
+            while more samples are needed
+        """
+        stable_pass, stable_fail = (passes * p + fails * f for p, f in zip(self._pass_steps, self._fail_steps))
+        if stable_pass >= self.accept:
+            return VERDICT_STABLE_PASS
+        if stable_fail >= self.accept:
+            return VERDICT_STABLE_FAIL
+        if stable_pass <= self.reject and stable_fail <= self.reject:
+            return VERDICT_FLAKY
+        return ""
+
+    def samples_needed(self, passes: int, fails: int, limit: int) -> int:
+        """Fewest further samples that could reach a verdict
+
+        Samples in a wave run concurrently, so a wave is as large as it can
+        be without overshooting: with the most decisive split of outcomes
+        (all passes, all failures, or a mix for a flaky verdict), the test
+        could decide after exactly this many.
+
+        Args:
+            passes: Samples that passed so far
+            fails: Samples that failed so far
+            limit: Samples left under --samples
+
+        Returns:
+            Wave size, between 1 and limit
+        """
+        for extra in range(1, limit + 1):
+            if any(self.verdict(passes + extra_passes, fails + extra - extra_passes) for extra_passes in range(extra + 1)):
+                return extra
+        return max(1, limit)
+
+
+def history_prior(outcomes: List[Tuple[str, str]], fingerprint: str,
+                  runs: int = SAMPLING_PRIOR_RUNS) -> Tuple[int, int]:
+    """Earlier results of a test to count as samples
+
+    Only a consistent history of the same test counts: the latest `runs`
+    results must come from the current scenario text and skill versions
+    (same fingerprint) and all pass or all fail. No history, too little of
+    it, an edit since, or a mix (a flaky test) gives no prior, and the test
+    is sampled from scratch.
+
+    Args:
+        outcomes: (status, fingerprint) of the test's executed results, newest first
+        fingerprint: The test's current fingerprint (see cache.test_fingerprint)
+        runs: Results to look at
+
+    Returns:
+        (passes, fails) to add to the test's own samples
+    """
+    recent = outcomes[:runs]
+    if len(recent) < runs or any(earlier != fingerprint for _, earlier in recent):
+        return 0, 0
+    if all(status in ["PASS", "SKIPPED"] for status, _ in recent):
+        return runs, 0
+    if all(status == "FAIL" for status, _ in recent):
+        return 0, runs
+    return 0, 0
+
+
+def sample_counts(result: TestResult) -> Tuple[int, int]:
+    """(passed, decided) samples of a sampled result; infrastructure errors are not decided"""
+    passes = sum(1 for sample in result.samples if sample['status'] in ["PASS", "SKIPPED"])
+    fails = sum(1 for sample in result.samples if sample['status'] == "FAIL")
+    return passes, passes + fails
+
+
+def describe_samples(result: TestResult) -> str:
+    """One-line pass-rate summary of a sampled result for reports
+
+    Example: "3/5 passed, pass@1 0.60, 95% CI 0.23-0.88, pass@3 1.00"
+    """
+    passes, decided = sample_counts(result)
+    if decided == 0:
+        return f"0 of {len(result.samples)} samples usable (infrastructure errors)"
+    low, high = wilson_interval(passes, decided)
+    text = f"{passes}/{decided} passed, pass@1 {passes / decided:.2f}, 95% CI {low:.2f}-{high:.2f}"
+    at_k = pass_at_k(passes, decided, SAMPLING_PASS_AT_K)
+    if at_k is not None:
+        text += f", pass@{SAMPLING_PASS_AT_K} {at_k:.2f}"
+    infra = len(result.samples) - decided
+    if infra:
+        text += f", {infra} infrastructure error{'s' if infra != 1 else ''}"
+    if result.prior_runs:
+        text += f", plus {result.prior_runs} agreeing earlier runs"
+    return text
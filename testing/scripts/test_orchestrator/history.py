@@ -0,0 +1,395 @@
+"""SQLite index of test run history
+
+Each report directory is its own tree of markdown reports (plus a
+results.jsonl journal for newer runs), so historical questions - a test's
+pass rate over time, the slowest tests, when a test started failing -
+would otherwise re-read every directory. HistoryIndex keeps runs, tests,
+attempts, phase timings, commit IDs and PM decisions in one SQLite file.
+A report directory is re-indexed only when its files change, so keeping
+the index current costs a few stat() calls per directory.
+"""
+
+import re
+import json
+import sqlite3
+from pathlib import Path
+from datetime import datetime
+from typing import List, Dict, Tuple, Optional, Iterable
+
+from .config import SAMPLING_PRIOR_RUNS
+from .models import TestResult
+from .scheduling import test_key, HISTORY_WINDOW
+from .journal import RESULTS_JOURNAL_FILENAME
+from .revalidation import load_report_results
+from .usage import load_agent_usage, AGENT_USAGE_FILENAME
+
+# Bump when the schema changes; an index with another version is rebuilt
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run TEXT PRIMARY KEY,           -- Report directory name (yyyy-mm-dd_N)
+    run_date TEXT NOT NULL,
+    sequence INTEGER NOT NULL,
+    commit_id TEXT,
+    started_at TEXT,
+    tests INTEGER NOT NULL,
+    passed INTEGER NOT NULL,
+    failed INTEGER NOT NULL,
+    infra_errors INTEGER NOT NULL,
+    duration_seconds REAL NOT NULL, -- Sum of test durations
+    tests_cost_usd REAL NOT NULL,
+    agents_cost_usd REAL NOT NULL,
+    pm_action TEXT,                 -- 'rerun' or 'halt'
+    pm_confidence TEXT,
+    pm_reasoning TEXT,
+    signature TEXT NOT NULL,        -- Sizes and mtimes of the indexed files
+    indexed_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tests (
+    run TEXT NOT NULL REFERENCES runs(run) ON DELETE CASCADE,
+    test_id TEXT NOT NULL,          -- group:test_num
+    group_name TEXT NOT NULL,
+    test_num INTEGER NOT NULL,
+    test_name TEXT,
+    user_request TEXT,
+    status TEXT NOT NULL,
+    failure_reason TEXT,
+    command TEXT,
+    duration_seconds REAL,
+    start_time TEXT,
+    cached INTEGER NOT NULL,
+    carried_from TEXT NOT NULL,     -- Run the result was carried over from ('' if executed)
+    error_kind TEXT,
+    cost_usd REAL,
+    fingerprint TEXT NOT NULL,      -- Scenario text and skill versions ('' if not recorded)
+    PRIMARY KEY (run, test_id)
+);
+CREATE INDEX IF NOT EXISTS tests_by_test ON tests (test_id, run);
+CREATE TABLE IF NOT EXISTS attempts (
+    run TEXT NOT NULL REFERENCES runs(run) ON DELETE CASCADE,
+    test_id TEXT NOT NULL,
+    attempt INTEGER NOT NULL,
+    start_time TEXT,
+    duration_seconds REAL,
+    error_kind TEXT,
+    error TEXT,
+    PRIMARY KEY (run, test_id, attempt)
+);
+CREATE TABLE IF NOT EXISTS phases (
+    run TEXT NOT NULL REFERENCES runs(run) ON DELETE CASCADE,
+    test_id TEXT NOT NULL,
+    phase TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    PRIMARY KEY (run, test_id, phase)
+);
+"""
+
+RUN_NAME_PATTERN = re.compile(r'^(\d{4}-\d{2}-\d{2})_(\d+)$')
+COMMIT_PATTERN = re.compile(r'\*\*Git Commit:\*\*\s*([0-9a-f]{7,40})')
+REPORT_DATE_PATTERN = re.compile(r'^\*\*Date:\*\* (.+)$', re.MULTILINE)
+# PM-NOTES.md: "**Decision Made:** RERUN" (or "Decision: rerun" from the fake agent)
+PM_DECISION_PATTERN = re.compile(r'Decision(?: Made)?:\**\s*(RERUN|HALT)', re.IGNORECASE)
+PM_CONFIDENCE_PATTERN = re.compile(r'Confidence in Decision:\**\s*(\w+)', re.IGNORECASE)
+
+# Files whose size and mtime decide whether a run must be re-indexed
+SIGNATURE_FILES = (RESULTS_JOURNAL_FILENAME, "REPORT.md", "PM-NOTES.md", "REVIEWER-NOTES.md", AGENT_USAGE_FILENAME)
+
+
+def run_signature(report_dir: Path) -> str:
+    """Fingerprint of the files a run's index entry is built from"""
+    parts = {}
+    for name in SIGNATURE_FILES:
+        try:
+            stat = (report_dir / name).stat()
+        except OSError:
+            continue
+        parts[name] = [stat.st_size, stat.st_mtime_ns]
+    return json.dumps(parts, sort_keys=True)
+
+
+def _notes_commit(report_dir: Path) -> Optional[str]:
+    """Commit ID from the header of the run's agent notes, if any"""
+    for name in ("REVIEWER-NOTES.md", "PM-NOTES.md", "DEVELOPER-NOTES.md"):
+        try:
+            match = COMMIT_PATTERN.search((report_dir / name).read_text())
+        except OSError:
+            continue
+        if match:
+            return match.group(1)
+    return None
+
+
+def _notes_decision(report_dir: Path) -> Dict[str, str]:
+    """PM decision parsed from PM-NOTES.md (empty if there is none)"""
+    try:
+        notes = (report_dir / "PM-NOTES.md").read_text()
+    except OSError:
+        return {}
+    action = PM_DECISION_PATTERN.search(notes)
+    if not action:
+        return {}
+    confidence = PM_CONFIDENCE_PATTERN.search(notes)
+    return {'action': action.group(1).lower(), 'confidence': confidence.group(1).lower() if confidence else None}
+
+
+class HistoryIndex:
+    """SQLite index over all report directories
+
+    Usage:
+        history = HistoryIndex(HISTORY_DB_PATH)
+        history.update(scan_existing_report_dirs())  # index new or changed runs
+        history.index_run(report_dir, commit_id)  # after a test run
+        history.record_decision(report_dir.name, pm_decision)
+        rows = history.pass_rates(min_runs=3)
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(path), timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("PRAGMA journal_mode = WAL")  # Queries may run while a test run updates
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            with self.conn:
+                for table in ("phases", "attempts", "tests", "runs"):
+                    self.conn.execute(f"DROP TABLE IF EXISTS {table}")
+                self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        """Close the database connection"""
+        self.conn.close()
+
+    def update(self, report_dirs: Iterable[Path], rebuild: bool = False, prune: bool = True) -> Dict[str, int]:
+        """Index report directories that are new or changed since last indexed
+
+        Args:
+            report_dirs: Report directories (e.g., from scan_existing_report_dirs())
+            rebuild: Re-index every directory regardless of its signature
+            prune: Drop runs whose directory is not in report_dirs
+
+        Returns:
+            Counts of 'indexed', 'unchanged' and 'pruned' runs
+        """
+        known = {row['run']: row['signature'] for row in self.conn.execute("SELECT run, signature FROM runs")}
+        counts = {'indexed': 0, 'unchanged': 0, 'pruned': 0}
+        names = set()
+        for report_dir in report_dirs:
+            if not RUN_NAME_PATTERN.match(report_dir.name):
+                continue
+            names.add(report_dir.name)
+            if not rebuild and known.get(report_dir.name) == run_signature(report_dir):
+                counts['unchanged'] += 1
+                continue
+            self.index_run(report_dir)
+            counts['indexed'] += 1
+
+        if prune:
+            with self.conn:
+                for run in set(known) - names:
+                    self.conn.execute("DELETE FROM runs WHERE run = ?", (run,))
+                    counts['pruned'] += 1
+        return counts
+
+    def index_run(self, report_dir: Path, commit_id: Optional[str] = None) -> None:
+        """(Re-)index one report directory
+
+        Results come from the run's journal, or from its markdown reports for
+        runs older than the journal. A commit ID or PM decision recorded
+        earlier is kept when the files don't name one.
+
+        Args:
+            report_dir: Report directory of a test run
+            commit_id: Commit the run tested, if known
+        """
+        match = RUN_NAME_PATTERN.match(report_dir.name)
+        if not match:
+            raise ValueError(f"not a report directory name: {report_dir.name}")
+        signature = run_signature(report_dir)
+        results = [r for group_results in load_report_results(report_dir).values() for r in group_results]
+
+        previous = self.conn.execute("SELECT commit_id, pm_action, pm_confidence, pm_reasoning FROM runs WHERE run = ?",
+                                     (report_dir.name,)).fetchone()
+        commit_id = commit_id or (previous['commit_id'] if previous else None) or _notes_commit(report_dir)
+        decision = _notes_decision(report_dir)
+        pm_action = decision.get('action') or (previous['pm_action'] if previous else None)
+        pm_confidence = decision.get('confidence') or (previous['pm_confidence'] if previous else None)
+        pm_reasoning = previous['pm_reasoning'] if previous else None
+
+        start_times = [r.start_time for r in results if r.start_time and not r.carried_from]
+        started_at = min(start_times).isoformat(timespec='seconds') if start_times else None
+        if started_at is None:
+            try:
+                date = REPORT_DATE_PATTERN.search((report_dir / "REPORT.md").read_text())
+                started_at = date.group(1).strip() if date else None
+            except OSError:
+                pass
+
+        agents_cost = sum(step.get('usage', {}).get('cost_usd', 0.0) for step in load_agent_usage(report_dir))
+        with self.conn:
+            self.conn.execute("DELETE FROM runs WHERE run = ?", (report_dir.name,))
+            self.conn.execute(
+                "INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (report_dir.name, match.group(1), int(match.group(2)), commit_id, started_at,
+                 len(results),
+                 sum(1 for r in results if r.status in ["PASS", "SKIPPED"]),
+                 sum(1 for r in results if r.status == "FAIL"),
+                 sum(1 for r in results if r.status == "INFRA_ERROR"),
+                 sum(r.duration_seconds for r in results),
+                 sum(r.usage.get('cost_usd', 0.0) for r in results if not r.carried_from),
+                 agents_cost, pm_action, pm_confidence, pm_reasoning,
+                 signature, datetime.now().isoformat(timespec='seconds'))
+            )
+            for result in results:
+                self._insert_test(report_dir.name, result)
+
+    def _insert_test(self, run: str, result: TestResult) -> None:
+        key = test_key(result.group, result.test_num)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO tests VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (run, key, result.group, result.test_num, result.test_name, result.user_request,
+             result.status, result.failure_reason, result.command_generated, result.duration_seconds,
+             result.start_time.isoformat() if result.start_time else None,
+             int(result.cached), result.carried_from, result.error_kind, result.usage.get('cost_usd'),
+             result.fingerprint)
+        )
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO attempts VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(run, key, attempt.get('attempt'), attempt.get('start_time'), attempt.get('duration_seconds'),
+              attempt.get('error_kind'), attempt.get('error')) for attempt in result.attempts]
+        )
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO phases VALUES (?, ?, ?, ?)",
+            [(run, key, phase, seconds) for phase, seconds in result.phase_seconds.items()]
+        )
+
+    def record_decision(self, run: str, decision: Dict) -> None:
+        """Store the product manager's decision for an indexed run
+
+        Args:
+            run: Report directory name
+            decision: Decision dict from run_product_manager()
+        """
+        with self.conn:
+            self.conn.execute(
+                "UPDATE runs SET pm_action = ?, pm_confidence = ?, pm_reasoning = ? WHERE run = ?",
+                (decision.get('action'), decision.get('confidence'), decision.get('reasoning'), run)
+            )
+
+    def expected_durations(self, exclude: Optional[str] = None, window: int = HISTORY_WINDOW) -> Dict[str, float]:
+        """Average test durations over the most recent runs (for dispatch order)
+
+        Same semantics as scheduling.load_historical_durations(): cached and
+        carried-over results are ignored.
+
+        Args:
+            exclude: Run to leave out (the one about to execute)
+            window: Number of most recent runs to average over
+
+        Returns:
+            Dictionary mapping test keys to average duration in seconds
+        """
+        rows = self.conn.execute(
+            """SELECT test_id, AVG(duration_seconds) AS seconds FROM tests
+               WHERE cached = 0 AND carried_from = '' AND run IN (
+                   SELECT run FROM runs WHERE run != ? ORDER BY run_date DESC, sequence DESC LIMIT ?)
+               GROUP BY test_id""",
+            (exclude or "", window)
+        )
+        return {row['test_id']: row['seconds'] for row in rows}
+
+    def recent_outcomes(self, exclude: Optional[str] = None,
+                        limit: int = SAMPLING_PRIOR_RUNS) -> Dict[str, List[Tuple[str, str]]]:
+        """Latest statuses of each test (prior for flakiness sampling)
+
+        Cached and carried-over results (not independent runs) and
+        infrastructure errors are left out.
+
+        Args:
+            exclude: Run to leave out (the one about to execute)
+            limit: Results kept per test
+
+        Returns:
+            Dictionary mapping test keys to (status, fingerprint) pairs, newest first
+        """
+        rows = self.conn.execute(
+            """SELECT test_id, status, fingerprint FROM tests JOIN runs USING (run)
+               WHERE cached = 0 AND carried_from = '' AND status != 'INFRA_ERROR' AND run != ?
+               ORDER BY runs.run_date DESC, runs.sequence DESC""",
+            (exclude or "",)
+        )
+        outcomes: Dict[str, List[Tuple[str, str]]] = {}
+        for row in rows:
+            results = outcomes.setdefault(row['test_id'], [])
+            if len(results) < limit:
+                results.append((row['status'], row['fingerprint']))
+        return outcomes
+
+    def runs(self, limit: int = 20) -> List[sqlite3.Row]:
+        """Summary of the most recent runs, oldest first"""
+        return self.conn.execute(
+            """SELECT run, commit_id, tests, passed, failed, infra_errors,
+                      ROUND(100.0 * passed / MAX(tests, 1), 1) AS pass_pct,
+                      ROUND(tests_cost_usd + agents_cost_usd, 4) AS cost_usd, pm_action
+               FROM (SELECT * FROM runs ORDER BY run_date DESC, sequence DESC LIMIT ?)
+               ORDER BY run_date, sequence""",
+            (limit,)
+        ).fetchall()
+
+    def pass_rates(self, min_runs: int = 1, limit: int = 20) -> List[sqlite3.Row]:
+        """Tests with the lowest pass rate over all runs that executed them
+
+        Carried-over results (already counted in the run that executed them)
+        and infrastructure errors are left out.
+        """
+        return self.conn.execute(
+            """SELECT test_id, MAX(test_name) AS test_name, COUNT(*) AS runs,
+                      SUM(status IN ('PASS', 'SKIPPED')) AS passed,
+                      AVG(status IN ('PASS', 'SKIPPED')) AS pass_rate
+               FROM tests WHERE carried_from = '' AND status != 'INFRA_ERROR'
+               GROUP BY test_id HAVING COUNT(*) >= ?
+               ORDER BY pass_rate, runs DESC, test_id LIMIT ?""",
+            (min_runs, limit)
+        ).fetchall()
+
+    def slowest(self, limit: int = 20, window: int = 10) -> List[sqlite3.Row]:
+        """Tests with the highest average duration over the most recent runs"""
+        return self.conn.execute(
+            """SELECT test_id, MAX(test_name) AS test_name, COUNT(*) AS runs,
+                      AVG(duration_seconds) AS avg_seconds, MAX(duration_seconds) AS max_seconds
+               FROM tests WHERE cached = 0 AND carried_from = '' AND run IN (
+                   SELECT run FROM runs ORDER BY run_date DESC, sequence DESC LIMIT ?)
+               GROUP BY test_id ORDER BY avg_seconds DESC LIMIT ?""",
+            (window, limit)
+        ).fetchall()
+
+    def test_history(self, test_id: str) -> List[sqlite3.Row]:
+        """Every indexed result of one test, oldest first"""
+        return self.conn.execute(
+            """SELECT tests.*, runs.commit_id FROM tests JOIN runs USING (run)
+               WHERE test_id = ? ORDER BY runs.run_date, runs.sequence""",
+            (test_id,)
+        ).fetchall()
+
+    def failing_since(self, test_id: str) -> Optional[str]:
+        """First run of a test's current streak of failures
+
+        Returns:
+            Run name, or None if the test's latest result is not a failure
+        """
+        since = None
+        for row in self.test_history(test_id):
+            if row['status'] == "INFRA_ERROR":
+                continue  # Says nothing about the skill
+            since = (since or row['run']) if row['status'] == "FAIL" else None
+        return since
+
+    def query(self, sql: str) -> List[sqlite3.Row]:
+        """Run a read-only SQL query"""
+        self.conn.execute("PRAGMA query_only = ON")
+        try:
+            return self.conn.execute(sql).fetchall()
+        finally:
+            self.conn.execute("PRAGMA query_only = OFF")
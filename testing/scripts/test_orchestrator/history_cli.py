@@ -0,0 +1,109 @@
+"""Command-line queries over the test history index (run-history.py)"""
+
+import sys
+import time
+import argparse
+import sqlite3
+from pathlib import Path
+from typing import List, Optional
+
+from .config import HISTORY_DB_PATH
+from .history import HistoryIndex
+from .orchestration import scan_existing_report_dirs
+
+
+def print_rows(rows: List) -> None:
+    """Print query rows (sqlite3.Row or dicts) as a fixed-width table"""
+    if not rows:
+        print("(no rows)")
+        return
+    columns = rows[0].keys()
+    cells = [[_format_cell(row[column]) for column in columns] for row in rows]
+    widths = [max(len(column), *(len(line[i]) for line in cells)) for i, column in enumerate(columns)]
+    print("  ".join(column.ljust(width) for column, width in zip(columns, widths)))
+    print("  ".join("-" * width for width in widths))
+    for line in cells:
+        print("  ".join(cell.ljust(width) for cell, width in zip(line, widths)))
+
+
+def _format_cell(value) -> str:
+    """One table cell: floats rounded, text flattened and cut to 60 characters"""
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    return " ".join(str(value).split())[:60]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """History query entry point
+
+    Returns:
+        Exit code
+    """
+    parser = argparse.ArgumentParser(
+        description='Query the SQLite index of all test runs in testing/reports/'
+    )
+    parser.add_argument('--db', default=str(HISTORY_DB_PATH),
+                        help=f'Index file (default: {HISTORY_DB_PATH})')
+    parser.add_argument('--no-update', action='store_true',
+                        help='Query the index as is, without indexing new or changed report directories first')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    update = commands.add_parser('update', help='Index new and changed report directories (backfills on first use)')
+    update.add_argument('--rebuild', action='store_true', help='Re-index every report directory')
+
+    runs = commands.add_parser('runs', help='Recent runs with pass counts, cost, commit and PM decision')
+    runs.add_argument('--limit', type=int, default=20)
+
+    rates = commands.add_parser('pass-rates', help='Tests with the lowest pass rate across runs')
+    rates.add_argument('--min-runs', type=int, default=2, help='Ignore tests executed in fewer runs (default: 2)')
+    rates.add_argument('--limit', type=int, default=20)
+
+    slowest = commands.add_parser('slowest', help='Tests with the highest average duration')
+    slowest.add_argument('--runs', type=int, default=10, help='Most recent runs to average over (default: 10)')
+    slowest.add_argument('--limit', type=int, default=20)
+
+    test = commands.add_parser('test', help="One test's result in every run, and since when it has been failing")
+    test.add_argument('test_id', help='Test ID, e.g. gh-search-code-tests:3')
+
+    sql = commands.add_parser('sql', help='Run a read-only SQL query (tables: runs, tests, attempts, phases)')
+    sql.add_argument('query')
+
+    args = parser.parse_args(argv)
+
+    history = HistoryIndex(Path(args.db))
+    try:
+        if args.command == 'update' or not args.no_update:
+            start = time.monotonic()
+            counts = history.update(scan_existing_report_dirs(), rebuild=args.command == 'update' and args.rebuild)
+            if args.command == 'update' or counts['indexed'] or counts['pruned']:
+                print(f"Indexed {counts['indexed']} run(s), {counts['unchanged']} unchanged, "
+                      f"{counts['pruned']} removed ({time.monotonic() - start:.1f}s)\n")
+
+        if args.command == 'runs':
+            print_rows(history.runs(args.limit))
+        elif args.command == 'pass-rates':
+            print_rows(history.pass_rates(args.min_runs, args.limit))
+        elif args.command == 'slowest':
+            print_rows(history.slowest(args.limit, args.runs))
+        elif args.command == 'test':
+            rows = history.test_history(args.test_id)
+            if not rows:
+                print(f"No results for {args.test_id} (IDs look like gh-search-code-tests:3)")
+                return 1
+            print(f"{args.test_id}: {rows[-1]['test_name']}\n")
+            print_rows([{'run': row['run'], 'commit': row['commit_id'], 'status': row['status'],
+                         'seconds': row['duration_seconds'], 'carried_from': row['carried_from'],
+                         'failure_reason': row['failure_reason']} for row in rows])
+            since = history.failing_since(args.test_id)
+            print(f"\n{'Failing since ' + since if since else 'Not currently failing'}")
+        elif args.command == 'sql':
+            try:
+                print_rows(history.query(args.query))
+            except sqlite3.Error as e:
+                print(f"SQL error: {e}", file=sys.stderr)
+                return 1
+    finally:
+        history.close()
+    return 0
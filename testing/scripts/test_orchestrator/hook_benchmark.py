@@ -0,0 +1,160 @@
+"""SessionStart hook latency and context-size benchmark
+
+The hook runs once per claude process, so every test and agent call pays
+its latency and carries its injected context. This runs hooks/session-start.sh
+repeatedly in each payload mode, uncached, with a cold cache (build and
+write) and with a warm cache (the normal case), and reports latency and
+payload size. An older hook script can be measured alongside for comparison.
+"""
+
+import os
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+from typing import List, Dict, Optional
+
+from .config import REPO_ROOT
+from .benchmark import percentile
+
+HOOK_SCRIPT = REPO_ROOT / "hooks" / "session-start.sh"
+
+# Rough characters per token for the context estimate
+CHARS_PER_TOKEN = 4
+
+
+def run_hook(script: Path, env: Dict[str, str]) -> Dict:
+    """Run the hook once
+
+    Returns:
+        Dictionary with 'seconds', 'stdout', 'returncode' and 'stderr'
+    """
+    start = time.perf_counter()
+    result = subprocess.run(['bash', str(script)], capture_output=True, text=True, env=env, cwd=str(REPO_ROOT))
+    return {
+        'seconds': time.perf_counter() - start,
+        'stdout': result.stdout,
+        'returncode': result.returncode,
+        'stderr': result.stderr,
+    }
+
+
+def injected_context(stdout: str) -> Optional[str]:
+    """Context a hook payload injects, or None if the payload is not valid JSON
+
+    Accepts the hookSpecificOutput format and the older top-level
+    additional_context key.
+    """
+    try:
+        payload = json.loads(stdout)
+    except ValueError:
+        return None
+    if not isinstance(payload, dict):
+        return None
+    context = payload.get('hookSpecificOutput', {}).get('additionalContext', payload.get('additional_context'))
+    return context if isinstance(context, str) else None
+
+
+def measure(name: str, script: Path, mode: str, cache: str, runs: int) -> Dict:
+    """Time one hook configuration
+
+    Args:
+        name: Label for the table
+        script: Hook script to run
+        mode: GH_CLI_SEARCH_HOOK_MODE value
+        cache: 'off' (GH_CLI_SEARCH_HOOK_NO_CACHE), 'cold' (empty cache before
+            every run) or 'warm' (cache filled by an untimed first run)
+        runs: Timed runs
+
+    Returns:
+        Result dictionary for the table and the JSON output
+    """
+    with tempfile.TemporaryDirectory(prefix="hook-bench-") as cache_home:
+        env = dict(os.environ, XDG_CACHE_HOME=cache_home, GH_CLI_SEARCH_HOOK_MODE=mode,
+                   CLAUDE_PLUGIN_ROOT=str(REPO_ROOT))
+        env.pop('GH_CLI_SEARCH_HOOK_NO_CACHE', None)
+        if cache == 'off':
+            env['GH_CLI_SEARCH_HOOK_NO_CACHE'] = "1"
+        elif cache == 'warm':
+            run_hook(script, env)
+
+        timings = []
+        last = None
+        for _ in range(runs):
+            if cache == 'cold':
+                for path in Path(cache_home).rglob("*"):
+                    if path.is_file():
+                        path.unlink()
+            last = run_hook(script, env)
+            timings.append(last['seconds'])
+
+    context = injected_context(last['stdout']) if last['returncode'] == 0 else None
+    return {
+        'name': name,
+        'mode': mode,
+        'cache': cache,
+        'runs': runs,
+        'mean_ms': sum(timings) / len(timings) * 1000,
+        'p50_ms': percentile(timings, 0.5) * 1000,
+        'p95_ms': percentile(timings, 0.95) * 1000,
+        'payload_bytes': len(last['stdout'].encode()),
+        'context_chars': len(context) if context is not None else 0,
+        'context_tokens': len(context) // CHARS_PER_TOKEN if context is not None else 0,
+        'valid': context is not None,
+        'error': last['stderr'].strip() if last['returncode'] else "",
+    }
+
+
+def print_table(results: List[Dict]) -> None:
+    """Print benchmark results as a markdown table"""
+    print("| Hook | Mode | Cache | Mean | p50 | p95 | Payload | Context | ~Tokens | Valid JSON |")
+    print("|------|------|-------|------|-----|-----|---------|---------|---------|------------|")
+    for r in results:
+        print(f"| {r['name']} | {r['mode']} | {r['cache']} | {r['mean_ms']:.1f}ms | {r['p50_ms']:.1f}ms | "
+              f"{r['p95_ms']:.1f}ms | {r['payload_bytes']:,}B | {r['context_chars']:,} chars | "
+              f"{r['context_tokens']:,} | {'yes' if r['valid'] else 'NO'} |")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Hook benchmark entry point
+
+    Returns:
+        Exit code: 1 if a hook produced invalid JSON or failed, otherwise 0
+    """
+    parser = argparse.ArgumentParser(
+        description='Benchmark SessionStart hook latency and injected context size'
+    )
+    parser.add_argument('--runs', type=int, default=50,
+                        help='Timed runs per configuration (default: 50)')
+    parser.add_argument('--modes', default='full,index',
+                        help='Comma-separated payload modes (default: full,index)')
+    parser.add_argument('--compare', type=Path, metavar='SCRIPT',
+                        help='Also time another hook script, e.g. an older version saved as '
+                             'hooks/old.sh with `git show <rev>:hooks/session-start.sh` (it must sit '
+                             'in hooks/ to find the skills)')
+    parser.add_argument('--output', type=Path,
+                        help='Also write the results as JSON to this file')
+    args = parser.parse_args(argv)
+    if args.runs < 1:
+        parser.error("--runs must be at least 1")
+
+    modes = [m.strip() for m in args.modes.split(',') if m.strip()]
+    configs = [("session-start.sh", HOOK_SCRIPT, mode, cache) for mode in modes for cache in ('off', 'cold', 'warm')]
+    if args.compare:
+        configs.insert(0, (args.compare.name, args.compare.resolve(), 'full', 'off'))
+    print(f"Benchmarking {len(configs)} hook configuration(s), {args.runs} runs each\n")
+
+    results = [measure(name, script, mode, cache, args.runs) for name, script, mode, cache in configs]
+    print_table(results)
+    for result in results:
+        if result['error']:
+            print(f"\n{result['name']} ({result['mode']}, {result['cache']}): {result['error']}")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps({'runs': args.runs, 'results': results}, indent=2) + "\n")
+        print(f"\nResults: {args.output}")
+
+    return 0 if all(r['valid'] for r in results if r['name'] == HOOK_SCRIPT.name) else 1
@@ -0,0 +1,87 @@
+"""Append-only JSONL journal of test results
+
+Every completed TestResult is appended to `results.jsonl` in the report
+directory and fsync'd immediately, so the results of a run survive a crash
+and can be consumed while the run is still going. The markdown reports are
+rendered from this journal.
+"""
+
+import os
+import json
+from pathlib import Path
+from threading import Lock
+from typing import List, Dict, Optional, Tuple
+
+from .models import TestResult
+
+RESULTS_JOURNAL_FILENAME = "results.jsonl"
+
+
+class ResultsJournal:
+    """Writer for a report directory's results journal
+
+    Usage:
+        with ResultsJournal(report_dir) as journal:
+            journal.append(result)
+    """
+
+    def __init__(self, report_dir: Path):
+        self.path = report_dir / RESULTS_JOURNAL_FILENAME
+        self._lock = Lock()
+        self._file = open(self.path, 'a')
+
+    def append(self, result: TestResult) -> None:
+        """Append one result as a JSON line and flush it to disk
+
+        Args:
+            result: Completed test result
+        """
+        line = json.dumps(result.to_dict()) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        """Close the journal file"""
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self) -> 'ResultsJournal':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def load_results_journal(report_dir: Path) -> Optional[Dict[str, List[TestResult]]]:
+    """Load the results journal of a report directory
+
+    A test journaled more than once keeps its last entry. A partially
+    written final line (from a crash mid-write) is ignored.
+
+    Args:
+        report_dir: Report directory of a test run
+
+    Returns:
+        Dictionary mapping group names to results sorted by test number,
+        or None if the directory has no journal
+    """
+    path = report_dir / RESULTS_JOURNAL_FILENAME
+    try:
+        lines = path.read_text().splitlines()
+    except FileNotFoundError:
+        return None
+
+    latest: Dict[Tuple[str, int], TestResult] = {}
+    for line in lines:
+        try:
+            result = TestResult.from_dict(json.loads(line))
+        except (ValueError, KeyError, TypeError):
+            continue
+        latest[(result.group, result.test_num)] = result
+
+    all_results: Dict[str, List[TestResult]] = {}
+    for (group_name, _), result in sorted(latest.items()):
+        all_results.setdefault(group_name, []).append(result)
+    return all_results
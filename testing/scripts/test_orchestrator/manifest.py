@@ -0,0 +1,135 @@
+"""Cached index of all scenario tests
+
+The manifest stores every parsed scenario file as JSON, keyed by file path
+and validated by (mtime, size) with a content-hash fallback, so unchanged
+files are never re-parsed. Each test carries a stable ID ('group:test_num')
+and a hash of its scenario block for keying caches and history.
+"""
+
+import os
+import json
+import hashlib
+from pathlib import Path
+from threading import get_ident
+from typing import List, Dict, Optional
+
+from .config import SCENARIOS_DIR, SCENARIO_MANIFEST_PATH
+from .rules import compile_criteria
+from .scenarios import parse_scenario_text
+
+# Bump when parse_scenario_text() output changes to invalidate cached entries
+MANIFEST_VERSION = 1
+
+
+class ScenarioManifest:
+    """Parsed scenario files, refreshed from disk only when they change
+
+    Usage:
+        manifest = ScenarioManifest()
+        manifest.refresh()
+        for group_name, tests in manifest.groups().items():
+            ...
+    """
+
+    def __init__(self, scenarios_dir: Path = SCENARIOS_DIR, cache_path: Optional[Path] = SCENARIO_MANIFEST_PATH):
+        self.scenarios_dir = scenarios_dir
+        self.cache_path = cache_path
+        self.reparsed: List[str] = []  # Groups parsed from scratch on the last refresh
+        self._files: Dict[str, Dict] = {}
+        self._groups: Optional[Dict[str, List[Dict]]] = None
+        self._load_cache()
+
+    def _load_cache(self) -> None:
+        if self.cache_path is None:
+            return
+        try:
+            data = json.loads(self.cache_path.read_text())
+        except (OSError, ValueError):
+            return
+        if data.get('version') == MANIFEST_VERSION:
+            self._files = data.get('files', {})
+
+    def _save_cache(self) -> None:
+        if self.cache_path is None:
+            return
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_suffix(f".tmp{os.getpid()}-{get_ident()}")
+        tmp_path.write_text(json.dumps({'version': MANIFEST_VERSION, 'files': self._files}, indent=1))
+        os.replace(tmp_path, self.cache_path)
+
+    def refresh(self) -> None:
+        """Re-scan the scenarios directory and re-parse changed files"""
+        files: Dict[str, Dict] = {}
+        self.reparsed = []
+        dirty = False
+
+        for path in sorted(self.scenarios_dir.glob("*-tests.md")):
+            stat = path.stat()
+            entry = self._files.get(str(path))
+            if entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+                files[str(path)] = entry
+                continue
+
+            content = path.read_text()
+            content_hash = hashlib.sha256(content.encode()).hexdigest()
+            dirty = True
+            if entry and entry['content_hash'] == content_hash:
+                # Touched but not edited
+                entry.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+                files[str(path)] = entry
+                continue
+
+            tests, warnings = parse_scenario_text(content, path.stem)
+            files[str(path)] = {
+                'group': path.stem,
+                'mtime_ns': stat.st_mtime_ns,
+                'size': stat.st_size,
+                'content_hash': content_hash,
+                'tests': tests,
+                'warnings': warnings,
+            }
+            self.reparsed.append(path.stem)
+
+        if dirty or files.keys() != self._files.keys():
+            self._files = files
+            self._save_cache()
+        self._groups = None
+
+    def groups(self) -> Dict[str, List[Dict]]:
+        """Test definitions by group, with compiled rules
+
+        Returns:
+            Dictionary mapping group names (scenario file stems) to test
+            dictionaries, in scenario file order
+        """
+        if self._groups is None:
+            self._groups = {}
+            for entry in sorted(self._files.values(), key=lambda e: e['group']):
+                tests = [dict(test) for test in entry['tests']]
+                for test in tests:
+                    test['rules'] = compile_criteria(test['criteria'])
+                self._groups[entry['group']] = tests
+        return self._groups
+
+    def warnings(self) -> Dict[str, List[str]]:
+        """Lint warnings by group (only groups that have any)"""
+        return {entry['group']: entry['warnings'] for entry in self._files.values() if entry['warnings']}
+
+    def get(self, test_id: str) -> Optional[Dict]:
+        """Look up a test by its stable ID ('group:test_num')"""
+        group_name, _, _ = test_id.rpartition(':')
+        for test in self.groups().get(group_name, []):
+            if test['id'] == test_id:
+                return test
+        return None
+
+
+def load_scenario_manifest() -> ScenarioManifest:
+    """Load the scenario manifest, re-parsing only changed scenario files
+
+    Returns:
+        Up-to-date ScenarioManifest
+    """
+    manifest = ScenarioManifest()
+    manifest.refresh()
+    return manifest
@@ -1,11 +1,28 @@
 """Data models for test orchestration"""
 
+from pathlib import Path
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Dict, Tuple
+
+from .outputs import read_output_blob
 
 
 class TestResult:
-    """Test execution result with metadata"""
+    """Test execution result with metadata
+
+    Uses __slots__ since a suite keeps every result in memory; the full
+    output lives on disk (output_path) and only a preview is kept here.
+    """
+
+    __slots__ = (
+        'group', 'test_num', 'test_name', 'user_request', 'command_generated',
+        'status', 'failure_reason', 'output', 'output_path', 'output_chars', 'stdout_chars',
+        'criteria', 'unchecked_criteria', 'platform', 'duration_seconds',
+        'start_time', 'end_time', 'cached', 'early_exit', 'error_kind',
+        'attempts', 'carried_from', 'truncated', 'phase_seconds',
+        'batch_size', 'batch_fallback', 'session_request', 'usage',
+        'samples', 'verdict', 'prior_runs', 'fingerprint',
+    )
 
     def __init__(self, group: str, test_num: int, test_name: str, user_request: str):
         self.group = group
@@ -15,9 +32,89 @@ class TestResult:
         self.command_generated = ""
         self.status = "PENDING"
         self.failure_reason = ""
-        self.output = ""
+        self.output = ""  # Head/tail preview of stdout + stderr (see outputs.make_preview)
+        self.output_path = ""  # Gzipped complete output, if stored
+        self.output_chars = 0  # Length of the complete output
+        self.stdout_chars: Optional[int] = None  # Length of stdout at the start of the complete output
         self.criteria: List[str] = []
+        self.unchecked_criteria: List[str] = []  # Criteria with no compiled rule
         self.platform = "All"
         self.duration_seconds = 0.0
         self.start_time: Optional[datetime] = None
         self.end_time: Optional[datetime] = None
+        self.cached = False
+        self.early_exit = False  # Process stopped once a complete command was emitted
+        self.error_kind = ""  # '', 'timeout', 'rate_limit', 'error' or 'empty'
+        self.attempts: List[Dict] = []  # One entry per claude invocation (see retry.record_attempt)
+        self.carried_from = ""  # Report directory name if reused from an earlier run
+        self.truncated = False  # Complete output unavailable; only a shortened copy survived
+        self.phase_seconds: Dict[str, float] = {}  # Time per phase (spawn, ttfb, validation, ...), see tracing.py
+        self.batch_size = 0  # Requests in the batched claude run that answered this test (0: run alone)
+        self.batch_fallback = False  # Re-run alone after its batch failed or was malformed
+        self.session_request = 0  # Position of this request in its persistent claude session (0: no session)
+        self.usage: Dict[str, float] = {}  # Tokens, cost and API time over all attempts (see usage.py)
+        self.samples: List[Dict] = []  # One entry per sample in flakiness mode (see sampling.py)
+        self.verdict = ""  # Flakiness verdict over the samples ('' when not sampled, see flakiness.py)
+        self.prior_runs = 0  # Agreeing earlier runs counted towards the verdict (see flakiness.history_prior)
+        self.fingerprint = ""  # Scenario text and skill versions the result came from (see cache.test_fingerprint)
+
+    def full_output(self) -> str:
+        """Complete output, loaded from the output store when it was stored
+
+        Returns:
+            The stored output, or the in-memory preview if there is no blob
+        """
+        if self.output_path:
+            stored = read_output_blob(Path(self.output_path))
+            if stored is not None:
+                return stored
+        return self.output
+
+    def stored_streams(self) -> Optional[Tuple[str, str]]:
+        """stdout and stderr as claude produced them, split from the output store
+
+        Returns:
+            (stdout, stderr), or None if the complete output was not stored or
+            was stored before the stdout length was recorded
+        """
+        if not self.output_path or self.stdout_chars is None:
+            return None
+        stored = read_output_blob(Path(self.output_path))
+        if stored is None:
+            return None
+        # Stored as stdout + "\n" + stderr (see execution.complete_test_result)
+        return stored[:self.stdout_chars], stored[self.stdout_chars + 1:]
+
+    def to_dict(self) -> Dict:
+        """Serialize every field to JSON-compatible values
+
+        Returns:
+            Dictionary with datetimes as ISO 8601 strings
+        """
+        data = {field: getattr(self, field) for field in self.__slots__}
+        for field in ('start_time', 'end_time'):
+            if data[field] is not None:
+                data[field] = data[field].isoformat()
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'TestResult':
+        """Rebuild a TestResult serialized with to_dict()
+
+        Unknown keys are ignored and missing ones keep their defaults, so
+        journals written by older or newer versions still load.
+
+        Args:
+            data: Dictionary from to_dict()
+
+        Returns:
+            The reconstructed TestResult
+        """
+        result = cls(data['group'], data['test_num'], data['test_name'], data['user_request'])
+        for field, value in data.items():
+            if field not in cls.__slots__:
+                continue
+            if field in ('start_time', 'end_time') and value is not None:
+                value = datetime.fromisoformat(value)
+            setattr(result, field, value)
+        return result
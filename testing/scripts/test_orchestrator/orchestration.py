@@ -1,19 +1,45 @@
 """Test orchestration and main execution loop"""
 
+import os
 import re
+import sys
+import sqlite3
 import argparse
+import contextlib
+import tempfile
 import subprocess
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Tuple, Optional, Set
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
-from .config import REPO_ROOT, SCENARIOS_DIR, REPORTS_BASE, MAX_TEST_ITERATIONS
+from .config import (
+    REPO_ROOT, REPORTS_BASE, MAX_TEST_ITERATIONS,
+    RESPONSE_CACHE_DIR, RESPONSE_CACHE_MAX_BYTES, FAKE_CLAUDE_SCRIPT, SESSION_MAX_REQUESTS, HISTORY_DB_PATH
+)
 from .models import TestResult
-from .scenarios import parse_scenario_file
-from .execution import process_single_test
+from .cache import ResponseCache
+from .manifest import load_scenario_manifest
+from .execution import process_single_test, carry_over_test_result, request_shutdown, shutdown_event
+from .async_execution import run_tests_async
+from .batching import build_batches, process_batch
+from .sampling import run_sampled_tests
+from .sharding import (
+    SHARD_STRATEGIES, parse_shard, shard_suffix, assign_shards, write_shard_manifest, read_shard_manifest, merge_shards
+)
+from .sessions import SessionPool
+from .concurrency import AIMDController, AdaptiveLimiter
+from .retry import RetryPolicy
+from .selection import get_changed_files, select_groups
+from .scheduling import load_historical_durations, order_longest_first, test_key
 from .reporting import write_group_report, write_master_report
-from .agents import run_test_reviewer, run_product_manager, run_developer_agent
+from .digest import write_failure_digest, DIGEST_FILENAME
+from .revalidation import revalidate_report
+from .tracing import tracer, TRACE_FILENAME
+from .journal import ResultsJournal, load_results_journal, RESULTS_JOURNAL_FILENAME
+from .history import HistoryIndex
+from .usage import UsageBudget, BudgetExhausted, sum_usage, format_usage, report_dir_usage, load_agent_usage
+from .agents import run_test_reviewer, run_product_manager, run_developer_agent, GroupReviewPipeline
 
 
 def get_current_commit_id() -> str:
@@ -65,66 +91,378 @@ def scan_existing_report_dirs() -> List[Path]:
     return [entry for _, _, entry in report_dirs]
 
 
-def run_test_suite(report_dir: Path, workers: int) -> Dict[str, List[TestResult]]:
+def resolve_report_dir(value: str) -> Optional[Path]:
+    """Resolve a report directory given as a path or a name under REPORTS_BASE
+
+    Args:
+        value: Command-line value (e.g., '2025-11-15_2')
+
+    Returns:
+        The report directory, or None if it doesn't exist
+    """
+    for candidate in (Path(value), REPORTS_BASE / value):
+        if candidate.is_dir():
+            return candidate.resolve()
+    return None
+
+
+def next_report_dir(date_str: str, suffix: str = "") -> Path:
+    """First unused report directory for a date
+
+    Args:
+        date_str: Date as yyyy-mm-dd
+        suffix: Name suffix (shard runs), which keeps the directory out of
+            scan_existing_report_dirs()
+
+    Returns:
+        Path of the form REPORTS_BASE/yyyy-mm-dd_N<suffix> (not created)
+    """
+    count = 1
+    while (REPORTS_BASE / f"{date_str}_{count}{suffix}").exists():
+        count += 1
+    return REPORTS_BASE / f"{date_str}_{count}{suffix}"
+
+
+def shard_value(value: str) -> Tuple[int, int]:
+    """argparse type for --shard"""
+    try:
+        return parse_shard(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def run_test_suite(report_dir: Path, workers: int, cache: Optional[ResponseCache] = None,
+                   previous_results: Optional[Dict[str, List[TestResult]]] = None,
+                   previous_report_dir: Optional[Path] = None,
+                   rerun_groups: Optional[Set[str]] = None,
+                   expected_durations: Optional[Dict[str, float]] = None,
+                   engine: str = "threads",
+                   early_exit: bool = False,
+                   adaptive: bool = False,
+                   retry: Optional[RetryPolicy] = None,
+                   groups: Optional[Dict[str, List[Dict]]] = None,
+                   resume: bool = False,
+                   batch_size: int = 1,
+                   session_requests: int = SESSION_MAX_REQUESTS,
+                   budget: Optional[UsageBudget] = None,
+                   earlier_report_dirs: Optional[List[Path]] = None,
+                   group_reviews: Optional[GroupReviewPipeline] = None,
+                   samples: int = 1,
+                   sample_history: Optional[Dict[str, List[Tuple[str, str]]]] = None,
+                   shard: Optional[Tuple[int, int]] = None,
+                   shard_strategy: str = "hash") -> Dict[str, List[TestResult]]:
     """Execute the test suite and return results
 
+    Every test from every group is submitted to one suite-wide worker pool,
+    longest-expected-first. Each result is appended to the run's results
+    journal (results.jsonl) as it completes, and each group report is
+    rendered from the journal as soon as its last test completes.
+
+    When previous_results and rerun_groups are given (incremental mode), only
+    tests in rerun_groups and tests that did not pass last time are executed;
+    every other test's previous result is carried over.
+
+    With resume, results already in report_dir's journal are kept and only
+    the remaining tests (plus infrastructure errors and tests whose request
+    or criteria changed since) are executed.
+
+    With samples > 1 (flakiness mode), each test is run up to `samples`
+    times, without the response cache, until a sequential test decides
+    whether it is a stable pass, a stable failure or flaky (see sampling.py).
+
+    With a shard (index, count), only the tests assigned to that shard are
+    run (see sharding.py) and the partition is recorded in SHARD.json;
+    groups with no tests in the shard are left out of its reports.
+
+    With a budget, each finished test's cost is charged to it and no test
+    starts once it is spent; the tests left are reported as not run (like
+    an interrupted run, so it can be resumed).
+
+    On Ctrl-C, pending tests are cancelled and in-flight ones killed; the
+    results recorded so far are written to partial group and master reports
+    before KeyboardInterrupt is re-raised, so the run can be resumed.
+
     Args:
         report_dir: Directory to write reports to
         workers: Number of parallel worker threads
+        cache: Optional response cache shared across iterations
+        previous_results: Results of the previous test run (incremental mode)
+        previous_report_dir: Report directory of the previous test run
+        rerun_groups: Groups to re-run in full (incremental mode)
+        expected_durations: Historical per-test durations used for dispatch order
+        engine: "threads" (run-single-test.sh per worker thread), "asyncio"
+            (claude launched directly from one event loop) or "sessions"
+            (worker threads taking claude sessions started ahead of time)
+        early_exit: Stop each claude process once a complete gh command is emitted
+        adaptive: Adjust in-flight test count (AIMD) up to `workers` based on
+            latency, timeouts and rate-limit errors
+        retry: Optional retry policy for transient failures
+        groups: Test definitions by group to run instead of the scenario
+            manifest (used by the benchmark suite)
+        resume: Continue an interrupted run in report_dir
+        batch_size: Tests from the same group answered per claude invocation
+            (threads engine only; 1 runs every test on its own)
+        session_requests: Requests per session before it is replaced (sessions
+            engine; above 1 is experimental and results are not clean runs)
+        budget: Spending limit shared by every test run and agent of this invocation
+        earlier_report_dirs: Earlier test runs of this invocation, for the
+            per-iteration usage table
+        group_reviews: Pipeline that starts a reviewer pass for each group as
+            soon as its (complete) group report is written
+        samples: Maximum runs per test (flakiness mode; threads and sessions
+            engines, 1 runs every test once)
+        sample_history: Earlier (status, fingerprint) results by test key,
+            used as a prior in flakiness mode (see flakiness.history_prior)
+        shard: (index, count) of the shard to run, 1-based; None runs the whole suite
+        shard_strategy: 'hash' (stable test ID hash) or 'duration' (bin-packing
+            on expected_durations)
 
     Returns:
         Dictionary mapping group names to lists of test results
     """
-    # Get all scenario files
-    scenario_files = sorted(SCENARIOS_DIR.glob("*-tests.md"))
-    all_results = {}
-
-    for scenario_file in scenario_files:
-        group_name = scenario_file.stem  # e.g., 'gh-search-code-tests'
+    tracer.reset()
+    shutdown_event.clear()
+    completed = (load_results_journal(report_dir) or {}) if resume else {}
+    journal = ResultsJournal(report_dir)
+
+    # Load all scenario tests (unchanged files come from the manifest cache)
+    manifest = load_scenario_manifest() if groups is None else None
+    all_results: Dict[str, List[TestResult]] = {}
+    pending: Dict[str, int] = {}
+    group_dirs: Dict[str, Path] = {}
+    jobs = []
+    incremental = previous_results is not None and rerun_groups is not None
+
+    lint_warnings = manifest.warnings() if manifest else {}
+    suite = manifest.groups() if manifest else groups
+
+    # Partition the whole suite so every shard runner computes the same assignment
+    assignment = None
+    if shard:
+        keys = [test_key(group_name, test['test_num']) for group_name, tests in suite.items() for test in tests]
+        assignment = assign_shards(keys, shard[1], shard_strategy, expected_durations)
+        write_shard_manifest(report_dir, shard[0], shard[1], shard_strategy, assignment, get_current_commit_id())
+        print(f"Shard {shard[0]}/{shard[1]} ({shard_strategy}): "
+              f"{sum(1 for index in assignment.values() if index == shard[0])} of {len(keys)} tests\n")
+
+    for group_name, tests in suite.items():  # e.g., 'gh-search-code-tests'
+        if assignment:
+            tests = [test for test in tests if assignment[test_key(group_name, test['test_num'])] == shard[0]]
+            if not tests:
+                continue
         print(f"Processing {group_name}...")
-
-        # Parse tests
-        tests = parse_scenario_file(scenario_file)
-        print(f"  Found {len(tests)} tests")
+        print(f"  Found {len(tests)} tests{' (re-parsed)' if manifest and group_name in manifest.reparsed else ''}")
+        for warning in lint_warnings.get(group_name, []):
+            print(f"  ⚠ Lint: {warning}")
 
         # Create group directory
         group_dir = report_dir / group_name
         group_dir.mkdir(exist_ok=True)
+        group_dirs[group_name] = group_dir
 
-        # Execute tests in parallel
+        # In incremental mode, carry over passing results for untouched groups
         results = []
-        with ThreadPoolExecutor(max_workers=workers) as executor:
-            # Submit all tests
-            future_to_test = {
-                executor.submit(process_single_test, test, group_name, group_dir): test
-                for test in tests
-            }
-
-            # Collect results as they complete
-            for future in as_completed(future_to_test):
-                try:
-                    result = future.result()
+        if incremental and group_name not in rerun_groups:
+            previous_by_num = {r.test_num: r for r in previous_results.get(group_name, [])}
+            tests_to_run = []
+            for test in tests:
+                previous = previous_by_num.get(test['test_num'])
+                if previous and previous.status in ["PASS", "SKIPPED"]:
+                    result = carry_over_test_result(previous, group_dir, previous_report_dir.name)
+                    journal.append(result)
                     results.append(result)
-                except Exception as e:
-                    test = future_to_test[future]
-                    print(f"  Test {test['test_num']} raised exception: {e}")
+                else:
+                    tests_to_run.append(test)
+            tests = tests_to_run
+
+        # When resuming, keep results the interrupted run already recorded
+        if completed.get(group_name):
+            completed_by_num = {r.test_num: r for r in completed[group_name]}
+            tests_to_run = []
+            for test in tests:
+                previous = completed_by_num.get(test['test_num'])
+                if (previous and previous.status != "INFRA_ERROR"
+                        and previous.user_request == test['user_request'] and previous.criteria == test['criteria']):
+                    results.append(previous)
+                else:
+                    tests_to_run.append(test)
+            print(f"  Resumed {len(tests) - len(tests_to_run)} completed tests")
+            tests = tests_to_run
+
+        all_results[group_name] = results
+        pending[group_name] = len(tests)
+        jobs.extend((group_name, group_dir, test) for test in tests)
 
-        # Sort results by test number for consistent ordering
-        results.sort(key=lambda r: r.test_num)
+    # Groups with a FAIL produced by this invocation; only these get a group review
+    # (carried-over, resumed and all-pass groups have nothing new to analyze)
+    failed_groups: Set[str] = set()
 
-        # Write group report
-        write_group_report(group_dir, group_name, results)
+    def complete_group(group_name: str, partial: bool = False) -> None:
+        # Render from the journal (sorted by test number) so reports match what consumers read
+        results = load_results_journal(report_dir).get(group_name, [])
         all_results[group_name] = results
+        with tracer.span("group report", category="report", args={'group': group_name}):
+            write_group_report(group_dirs[group_name], group_name, results)
+        tracer.instant(f"group complete: {group_name}")
 
         passed = sum(1 for r in results if r.status in ["PASS", "SKIPPED"])
-        print(f"  Group complete: {passed}/{len(results)} passed\n")
+        if partial:
+            print(f"  Group partial: {group_name} {passed}/{len(results)} passed, {pending[group_name]} not run")
+        else:
+            print(f"  Group complete: {group_name} {passed}/{len(results)} passed")
+            if group_reviews and group_name in failed_groups:
+                group_reviews.submit(group_name)
+
+    # Groups with nothing to run (fully carried over) are complete already
+    for group_name, count in pending.items():
+        if count == 0:
+            complete_group(group_name)
+
+    jobs = order_longest_first(jobs, expected_durations or {})
+    batch_note = f", up to {batch_size} tests per claude run" if batch_size > 1 else \
+        f", up to {samples} samples per test" if samples > 1 else ""
+    print(f"\nExecuting {len(jobs)} tests across {len(pending)} groups with {workers} workers ({engine} engine{batch_note})\n")
+
+    def record_result(group_name: str, test: Dict, result: Optional[TestResult], error: Optional[BaseException]) -> None:
+        if isinstance(error, BudgetExhausted):
+            return  # Not run; stays pending
+        if error is not None:
+            print(f"  [{group_name}] Test {test['test_num']} raised exception: {error}")
+        else:
+            journal.append(result)
+            all_results[group_name].append(result)
+            if result.status == "FAIL":
+                failed_groups.add(group_name)
+            if budget and not result.samples:  # Sampled tests are charged per sample
+                budget.add(result.usage)
+
+        pending[group_name] -= 1
+        if pending[group_name] == 0:
+            complete_group(group_name)
+
+    # Adaptive mode starts low and grows towards `workers`
+    controller = AIMDController(initial=min(4, workers), maximum=workers) if adaptive else None
+    limiter = AdaptiveLimiter(controller) if controller else None
+    # One spare session per worker starts in the background while tests run
+    sessions = SessionPool(session_requests, spares=workers) if engine == "sessions" else None
+
+    # The limiter slot is held per attempt, so retry backoff doesn't block capacity
+    def run_job(batch: List) -> List[TestResult]:
+        group_name, group_dir, test = batch[0]
+        with tracer.track():
+            if budget and budget.exceeded:
+                raise BudgetExhausted(budget.describe())
+            if len(batch) == 1:
+                results = [process_single_test(test, group_name, group_dir, cache, early_exit, retry,
+                                               sessions=sessions, slot=limiter)]
+            else:
+                results = process_batch(batch, cache, early_exit, retry, slot=limiter)
+        if limiter:
+            for result in results:
+                limiter.record(result)
+        return results
+
+    def run_sample(group_name: str, sample_dir: Path, test: Dict) -> TestResult:
+        # Identical answers from the cache would make every sample agree
+        with tracer.track():
+            if budget and budget.exceeded:
+                raise BudgetExhausted(budget.describe())
+            result = process_single_test(test, group_name, sample_dir, None, early_exit, retry,
+                                         sessions=sessions, slot=limiter)
+        if budget:
+            # Charged as each sample finishes, so later waves see the spending
+            budget.add(result.usage)
+        if limiter:
+            limiter.record(result)
+        return result
+
+    interrupted = False
+    if engine == "asyncio":
+        try:
+            run_tests_async(jobs, workers, record_result, cache, early_exit, controller, retry, budget)
+        except KeyboardInterrupt:
+            # asyncio.run() has already cancelled the tasks, killing their processes
+            interrupted = True
+    elif samples > 1:
+        try:
+            run_sampled_tests(jobs, workers, record_result, run_sample, samples, budget, sample_history)
+        except KeyboardInterrupt:
+            interrupted = True
+        if sessions:
+            sessions.close()
+            print(f"\n{sessions.summary()}")
+    else:
+        # Execute all tests from all groups in one pool
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            future_to_batch = {
+                executor.submit(run_job, batch): batch
+                for batch in build_batches(jobs, batch_size)
+            }
 
-    # Write master report
-    write_master_report(report_dir, all_results)
+            # Collect results as they complete
+            try:
+                for future in as_completed(future_to_batch):
+                    batch = future_to_batch[future]
+                    try:
+                        results = future.result()
+                    except Exception as e:
+                        for group_name, _, test in batch:
+                            record_result(group_name, test, None, e)
+                        continue
+                    tests_by_num = {test['test_num']: test for _, _, test in batch}
+                    for result in results:
+                        record_result(result.group, tests_by_num[result.test_num], result, None)
+            except KeyboardInterrupt:
+                interrupted = True
+                executor.shutdown(wait=False, cancel_futures=True)
+                request_shutdown()
+        if sessions:
+            sessions.close()
+            print(f"\n{sessions.summary()}")
 
+    print()
+    journal.close()
+    journaled = load_results_journal(report_dir) or {}
+    all_results = {group_name: journaled.get(group_name, []) for group_name in all_results}
+
+    stopped_by_budget = budget is not None and budget.exceeded and sum(pending.values()) > 0
+    if interrupted or stopped_by_budget:
+        # Flush partial group reports; complete groups were written already
+        for group_name, count in pending.items():
+            if count > 0 and all_results[group_name]:
+                complete_group(group_name, partial=True)
+        recorded = sum(len(results) for results in all_results.values())
+        reason = "Interrupted" if interrupted else f"Budget exhausted ({budget.describe()})"
+        print(f"{reason}: {recorded} results recorded in {report_dir / RESULTS_JOURNAL_FILENAME}, "
+              f"{sum(pending.values())} tests not run")
+
+    budget_note = ""
+    if budget:
+        budget_note = f"{budget.describe()} spent by this invocation"
+        if stopped_by_budget:
+            budget_note += f"; limit reached, {sum(pending.values())} tests not run"
+    usage_history = [(d.name, report_dir_usage(d)) for d in (earlier_report_dirs or []) + [report_dir]]
+
+    # Write master report and the execution trace
+    with tracer.span("master report", category="report"):
+        write_master_report(report_dir, all_results, controller.timeline if controller else None,
+                            usage_history, budget_note)
+    tracer.write(report_dir / TRACE_FILENAME)
+
+    if interrupted:
+        raise KeyboardInterrupt
     return all_results
 
 
+def charge_agent(budget: Optional[UsageBudget], report_dir: Path, agent: str) -> None:
+    """Charge an agent step recorded in report_dir to the budget"""
+    if budget is None:
+        return
+    for step in load_agent_usage(report_dir):
+        if step.get('agent') == agent:
+            budget.add(step.get('usage'))
+
+
 def main():
     """Main execution with iteration loop"""
     # Parse command-line arguments
@@ -137,11 +475,86 @@ def main():
         default=8,
         help='Number of parallel test workers (default: 8)'
     )
+    parser.add_argument(
+        '--engine',
+        choices=['threads', 'asyncio', 'sessions'],
+        default='threads',
+        help='Execution engine: worker threads running run-single-test.sh (default), '
+             'asyncio launching claude directly, or worker threads taking stream-json '
+             'claude sessions started ahead of time'
+    )
+    parser.add_argument(
+        '--backend',
+        choices=['claude', 'fake'],
+        default='claude',
+        help='claude CLI (default) or fake_claude.py, an offline stand-in configured '
+             'with FAKE_CLAUDE_* environment variables (disables the response cache)'
+    )
+    parser.add_argument(
+        '--early-exit',
+        action='store_true',
+        help='Stream test output and stop claude as soon as a complete gh command block is emitted'
+    )
+    parser.add_argument(
+        '--adaptive',
+        action='store_true',
+        help='Adapt in-flight test count (AIMD) to latency, timeouts and rate limits; '
+             '--workers becomes the upper bound'
+    )
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=1,
+        help='Answer up to N tests from the same group per claude invocation, falling back to '
+             'single runs for malformed batches (threads engine only; default: 1, no batching)'
+    )
+    parser.add_argument(
+        '--session-requests',
+        type=int,
+        default=SESSION_MAX_REQUESTS,
+        help=f'Requests a session answers before it is replaced (sessions engine; default: '
+             f'{SESSION_MAX_REQUESTS}, a fresh conversation per test). Above 1 is experimental: later '
+             f'requests see earlier ones, so their results are marked as not clean runs'
+    )
+    parser.add_argument(
+        '--samples',
+        type=int,
+        default=1,
+        metavar='K',
+        help='Flakiness mode: run each test up to K times, stopping early once a sequential '
+             'test calls it stable or flaky, and report pass@k (threads and sessions engines; '
+             'disables the response cache; default: 1)'
+    )
+    parser.add_argument(
+        '--max-retries',
+        type=int,
+        default=2,
+        help='Retries per test for timeouts, rate limits, non-zero exits and empty output (default: 2)'
+    )
+    parser.add_argument(
+        '--retry-budget',
+        type=int,
+        default=10,
+        help='Maximum retries across one test run (default: 10)'
+    )
+    parser.add_argument(
+        '--budget',
+        type=float,
+        metavar='USD',
+        help='Stop scheduling tests and agents once this invocation has spent USD dollars '
+             '(as reported by claude); unfinished runs can be resumed'
+    )
     parser.add_argument(
         '--no-review',
         action='store_true',
         help='Skip automatic test-reviewer and product-manager agent execution'
     )
+    parser.add_argument(
+        '--pipelined-review',
+        action='store_true',
+        help='Review each group in the background as soon as its tests finish, then merge '
+             'the group notes into REVIEWER-NOTES.md'
+    )
     parser.add_argument(
         '--no-pm',
         action='store_true',
@@ -152,6 +565,54 @@ def main():
         action='store_true',
         help='Skip developer agent (PM decides rerun but no fixes implemented)'
     )
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help='On re-runs, only execute groups whose skills/scenarios changed plus previous failures'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Disable the response cache (always run claude, store nothing)'
+    )
+    parser.add_argument(
+        '--refresh',
+        action='store_true',
+        help='Ignore cached responses but store fresh ones for later runs'
+    )
+    parser.add_argument(
+        '--revalidate',
+        metavar='REPORT_DIR',
+        help='Re-validate the stored outputs of a previous report directory against the current '
+             'validator and scenarios, without running claude'
+    )
+    parser.add_argument(
+        '--shard',
+        type=shard_value,
+        metavar='I/N',
+        help='Run only shard I of N of the suite (e.g. 2/4) into a shard-local report directory, '
+             'without review; combine the shards with --merge-shards'
+    )
+    parser.add_argument(
+        '--shard-strategy',
+        choices=SHARD_STRATEGIES,
+        default='hash',
+        help='Partition tests by a stable hash of their ID (default) or bin-pack them by '
+             'historical duration (balanced, but every runner needs the same history index)'
+    )
+    parser.add_argument(
+        '--merge-shards',
+        nargs='+',
+        metavar='SHARD_DIR',
+        help='Combine the report directories of a sharded run into one report directory '
+             'with the same group and master reports as a single-host run (no agents run)'
+    )
+    parser.add_argument(
+        '--resume',
+        metavar='REPORT_DIR',
+        help='Continue an interrupted test run in REPORT_DIR, running only the tests missing '
+             'from its results.jsonl, then regenerate its reports'
+    )
     parser.add_argument(
         '--verbose',
         action='store_true',
@@ -159,6 +620,80 @@ def main():
     )
     args = parser.parse_args()
 
+    if args.revalidate:
+        source_dir = resolve_report_dir(args.revalidate)
+        if source_dir is None:
+            parser.error(f"report directory not found: {args.revalidate}")
+        print(f"Re-validating stored outputs from {source_dir}")
+        revalidate_report(source_dir)
+        return
+
+    if args.merge_shards:
+        shard_dirs = []
+        for value in args.merge_shards:
+            shard_dir = resolve_report_dir(value)
+            if shard_dir is None:
+                parser.error(f"report directory not found: {value}")
+            shard_dirs.append(shard_dir)
+        earlier_runs = scan_existing_report_dirs()
+        report_dir = next_report_dir(datetime.now().strftime('%Y-%m-%d'))
+        print(f"Merging {len(shard_dirs)} shard(s) into {report_dir}")
+        try:
+            all_results, warnings = merge_shards(shard_dirs, report_dir)
+        except ValueError as e:
+            parser.error(str(e))
+        for warning in warnings:
+            print(f"⚠️  {warning}")
+        write_failure_digest(report_dir, all_results, earlier_runs[-1] if earlier_runs else None)
+        try:
+            with contextlib.closing(HistoryIndex(HISTORY_DB_PATH)) as history:
+                history.index_run(report_dir, read_shard_manifest(shard_dirs[0])['commit'])
+        except sqlite3.Error as e:
+            print(f"⚠️  History index unavailable ({e})")
+        total = sum(len(results) for results in all_results.values())
+        passed = sum(sum(1 for r in results if r.status in ["PASS", "SKIPPED"]) for results in all_results.values())
+        print(f"\nMerged {total} results from {len(all_results)} groups ({passed} passed)")
+        print(f"Report location: {report_dir}/REPORT.md")
+        print(f"Failure digest: {report_dir}/{DIGEST_FILENAME}")
+        return
+
+    if args.batch_size < 1:
+        parser.error("--batch-size must be at least 1")
+    if args.batch_size > 1 and args.engine != 'threads':
+        parser.error("--batch-size requires the threads engine")
+    if args.samples < 1:
+        parser.error("--samples must be at least 1")
+    if args.samples > 1 and (args.engine == 'asyncio' or args.batch_size > 1):
+        parser.error("--samples requires the threads or sessions engine without --batch-size")
+    if args.budget is not None and args.budget <= 0:
+        parser.error("--budget must be positive")
+    if args.session_requests < 1:
+        parser.error("--session-requests must be at least 1")
+    if args.early_exit and args.engine == 'sessions':
+        # Stopping a session mid-answer would leave it out of step, so it would be discarded
+        parser.error("--early-exit is not supported by the sessions engine")
+
+    resume_dir = None
+    if args.resume:
+        resume_dir = resolve_report_dir(args.resume)
+        if resume_dir is None:
+            parser.error(f"report directory not found: {args.resume}")
+        if not (resume_dir / RESULTS_JOURNAL_FILENAME).exists():
+            parser.error(f"{resume_dir} has no {RESULTS_JOURNAL_FILENAME} to resume from")
+        # A shard run resumes as the same shard
+        shard_manifest = read_shard_manifest(resume_dir)
+        if shard_manifest:
+            resumed_shard = (shard_manifest['index'], shard_manifest['count'])
+            if args.shard and args.shard != resumed_shard:
+                parser.error(f"{resume_dir} is shard {resumed_shard[0]}/{resumed_shard[1]}")
+            args.shard = resumed_shard
+            args.shard_strategy = shard_manifest['strategy']
+
+    if args.backend == 'fake':
+        # Seen by run-single-test.sh, the asyncio engine and the agents
+        os.environ['CLAUDE_BIN'] = str(FAKE_CLAUDE_SCRIPT)
+        os.environ.setdefault('FAKE_CLAUDE_STATE_DIR', tempfile.mkdtemp(prefix='fake-claude-'))
+
     overall_start_time = datetime.now()
     start_commit_id = get_current_commit_id()
 
@@ -167,12 +702,36 @@ def main():
     print(f"Start time: {overall_start_time.strftime('%Y-%m-%d %H:%M:%S')}")
     print(f"Git commit: {start_commit_id}")
     print(f"Parallel workers: {args.workers}")
-    print(f"Automated review: {'Disabled' if args.no_review else 'Enabled'}")
+    print(f"Execution engine: {args.engine}"
+          f"{(' (fresh session per test)' if args.session_requests == 1 else ' (replaced after ' + str(args.session_requests) + ' requests)') if args.engine == 'sessions' else ''}")
+    if args.engine == 'sessions' and args.session_requests > 1:
+        print("WARNING: --session-requests above 1 is experimental; answers from reused sessions "
+              "see earlier requests and are not clean runs")
+    print(f"Backend: {args.backend}{' (' + os.environ.get('CLAUDE_BIN') + ')' if args.backend == 'fake' else ''}")
+    print(f"Adaptive concurrency: {'Enabled (max ' + str(args.workers) + ')' if args.adaptive else 'Disabled'}")
+    print(f"Retries: {args.max_retries} per test, {args.retry_budget} per run")
+    print(f"Early exit: {'Enabled' if args.early_exit else 'Disabled'}")
+    print(f"Budget: {'$' + format(args.budget, '.2f') if args.budget else 'None'}")
+    print(f"Batching: {'Up to ' + str(args.batch_size) + ' tests per claude run' if args.batch_size > 1 else 'Disabled'}")
+    print(f"Flakiness sampling: {'Up to ' + str(args.samples) + ' samples per test' if args.samples > 1 else 'Disabled'}")
+    if args.shard:
+        print(f"Shard: {args.shard[0]}/{args.shard[1]} ({args.shard_strategy}; agents skipped, and merged runs are not reviewed either)")
+        args.no_review = True
+    print(f"Automated review: {'Disabled' if args.no_review else 'Enabled (pipelined per group)' if args.pipelined_review else 'Enabled'}")
     print(f"Product manager: {'Disabled' if args.no_review or args.no_pm else 'Enabled'}")
     print(f"Developer agent: {'Disabled' if args.no_review or args.no_pm or args.no_dev else 'Enabled'}")
+    print(f"Incremental re-runs: {'Enabled' if args.incremental else 'Disabled'}")
+    print(f"Response cache: {'Disabled' if args.no_cache or args.backend == 'fake' or args.samples > 1 else 'Refresh' if args.refresh else 'Enabled'}")
     print(f"Verbose mode: {'Enabled' if args.verbose else 'Disabled'}")
+    if resume_dir:
+        print(f"Resuming: {resume_dir}")
     print()
 
+    cache = None
+    # Fake responses must never be served to real runs, and each sample must really run claude
+    if not args.no_cache and args.backend == 'claude' and args.samples == 1:
+        cache = ResponseCache(RESPONSE_CACHE_DIR, RESPONSE_CACHE_MAX_BYTES, read=not args.refresh)
+
     # Scan for existing report directories (from all previous script runs)
     all_report_dirs = scan_existing_report_dirs()
     if all_report_dirs:
@@ -181,12 +740,35 @@ def main():
             print(f"  - {report_dir.name}")
         print()
 
+    # Bring the history index up to date (the first use backfills every report directory)
+    try:
+        history = HistoryIndex(HISTORY_DB_PATH)
+        counts = history.update(all_report_dirs)
+        if counts['indexed']:
+            print(f"History index: {counts['indexed']} run(s) indexed into {HISTORY_DB_PATH}\n")
+    except sqlite3.Error as e:
+        print(f"⚠️  History index unavailable ({e}), reading durations from report directories\n")
+        history = None
+
+    if resume_dir:
+        # The resumed run is the current one, not an earlier run
+        all_report_dirs = [d for d in all_report_dirs if d.resolve() != resume_dir]
+
     # Track all report directories (existing + new ones created in this run)
     date_str = overall_start_time.strftime('%Y-%m-%d')
 
     iteration = 1
     should_continue = True
 
+    # Spending limit and the report directories of this invocation (for usage totals)
+    budget = UsageBudget(args.budget) if args.budget else None
+    session_dirs: List[Path] = []
+
+    # Previous iteration state for incremental re-runs
+    previous_results = None
+    previous_report_dir = None
+    previous_commit_id = start_commit_id
+
     while should_continue and iteration <= MAX_TEST_ITERATIONS:
         print("\n" + "=" * 60)
         print(f"TEST RUN {iteration}/{MAX_TEST_ITERATIONS}")
@@ -194,25 +776,102 @@ def main():
 
         iteration_start_time = datetime.now()
 
-        # Find next available report directory number
-        count = 1
-        while (REPORTS_BASE / f"{date_str}_{count}").exists():
-            count += 1
-        report_dir = REPORTS_BASE / f"{date_str}_{count}"
+        if resume_dir and iteration == 1:
+            report_dir = resume_dir
+        else:
+            report_dir = next_report_dir(date_str, shard_suffix(*args.shard) if args.shard else "")
         all_report_dirs.append(report_dir)
 
         report_dir.mkdir(parents=True, exist_ok=True)
+        session_dirs.append(report_dir)
         print(f"Report directory: {report_dir}\n")
 
+        # Decide which groups to re-run (incremental mode, iteration 2+)
+        rerun_groups = None
+        if args.incremental and previous_results is not None:
+            changed_files = get_changed_files(previous_commit_id)
+            if changed_files is None:
+                print("Incremental: unable to determine changed files, running full suite\n")
+            else:
+                rerun_groups = select_groups(changed_files, list(previous_results.keys()))
+                print(f"Incremental: {len(changed_files)} changed file(s) since {previous_commit_id}")
+                print(f"Re-running groups: {', '.join(sorted(rerun_groups)) if rerun_groups else 'none'} (plus previous failures)\n")
+
+        iteration_commit_id = get_current_commit_id()
+        retry = RetryPolicy(args.max_retries, args.retry_budget)
+
+        # Dispatch order uses durations from earlier runs (longest first)
+        expected_durations = None
+        if history:
+            try:
+                expected_durations = history.expected_durations(exclude=report_dir.name)
+            except sqlite3.Error as e:
+                print(f"⚠️  History index unavailable ({e}), reading durations from report directories")
+        if expected_durations is None:
+            expected_durations = load_historical_durations(all_report_dirs[:-1])
+
+        # Flakiness mode starts tests with a consistent history (of the same test) from one sample
+        sample_history = None
+        if history and args.samples > 1:
+            try:
+                sample_history = history.recent_outcomes(exclude=report_dir.name)
+            except sqlite3.Error as e:
+                print(f"⚠️  History index unavailable ({e}), sampling every test from scratch")
+
+        # Per-group reviews start while later groups are still running
+        group_reviews = None
+        if args.pipelined_review and not args.no_review:
+            group_reviews = GroupReviewPipeline(report_dir, start_commit_id, budget)
+
         # Run test suite
-        all_results = run_test_suite(report_dir, args.workers)
+        try:
+            all_results = run_test_suite(
+                report_dir, args.workers, cache,
+                previous_results=previous_results if rerun_groups is not None else None,
+                previous_report_dir=previous_report_dir,
+                rerun_groups=rerun_groups,
+                expected_durations=expected_durations,
+                engine=args.engine,
+                early_exit=args.early_exit,
+                adaptive=args.adaptive,
+                retry=retry,
+                resume=report_dir == resume_dir,
+                batch_size=args.batch_size,
+                session_requests=args.session_requests,
+                budget=budget,
+                earlier_report_dirs=session_dirs[:-1],
+                group_reviews=group_reviews,
+                samples=args.samples,
+                sample_history=sample_history,
+                shard=args.shard,
+                shard_strategy=args.shard_strategy
+            )
+        except KeyboardInterrupt:
+            if group_reviews:
+                group_reviews.cancel()
+            print(f"\nTest run interrupted. Partial reports: {report_dir}/REPORT.md")
+            print(f"Resume with: {sys.argv[0]} --resume {report_dir.name}")
+            sys.exit(130)
+        previous_results = all_results
+        previous_report_dir = report_dir
+        previous_commit_id = iteration_commit_id
+
+        # Compact failure digest for the agents, compared with the run before this one
+        with tracer.span("digest", category="report"):
+            write_failure_digest(report_dir, all_results, all_report_dirs[-2] if len(all_report_dirs) > 1 else None)
+        if history and not args.shard:  # A shard is part of a run; the merged run gets indexed
+            try:
+                history.index_run(report_dir, iteration_commit_id)
+            except sqlite3.Error as e:
+                print(f"⚠️  History index unavailable ({e}), run not indexed")
 
         # Calculate summary statistics
         iteration_end_time = datetime.now()
         duration = iteration_end_time - iteration_start_time
         total_tests = sum(len(results) for results in all_results.values())
         total_passed = sum(sum(1 for r in results if r.status in ["PASS", "SKIPPED"]) for results in all_results.values())
-        total_failed = total_tests - total_passed
+        total_infra = sum(sum(1 for r in results if r.status == "INFRA_ERROR") for results in all_results.values())
+        total_failed = total_tests - total_passed - total_infra
         pass_rate = (total_passed / total_tests * 100) if total_tests > 0 else 0
 
         # Print test run summary
@@ -223,17 +882,33 @@ def main():
         print(f"Total Tests: {total_tests}")
         print(f"Passed: {total_passed} ({pass_rate:.1f}%)")
         print(f"Failed: {total_failed}")
+        print(f"Infrastructure errors: {total_infra} (retries used: {retry.used}/{retry.budget})")
         print(f"\nExecution Time: {duration.total_seconds():.1f} seconds ({duration.total_seconds()/60:.1f} minutes)")
-        print(f"Average: {duration.total_seconds()/total_tests:.1f} seconds per test")
+        avg_seconds = duration.total_seconds() / total_tests if total_tests > 0 else 0
+        print(f"Average: {avg_seconds:.1f} seconds per test")
+        if cache:
+            print(f"Response cache: {cache.hits} hits, {cache.misses} misses")
+        print(f"Usage: {format_usage(sum_usage(r for results in all_results.values() for r in results))}")
+        if budget:
+            print(f"Budget: {budget.describe()} spent")
         print(f"\nReport location: {report_dir}/REPORT.md")
+        print(f"Failure digest: {report_dir}/{DIGEST_FILENAME}")
 
         # Run review and decision process unless disabled
         if args.no_review:
             print("\nSkipping review and PM (--no-review flag set)")
             should_continue = False
+        elif budget and budget.exceeded:
+            print(f"\n💸 Budget exhausted ({budget.describe()}), skipping review and PM")
+            print(f"Tests not run (if any) can be finished with: {sys.argv[0]} --resume {report_dir.name} --budget <USD>")
+            if group_reviews:
+                group_reviews.wait()  # Let reviews already running finish; queued ones are skipped
+            should_continue = False
         else:
-            # Run test reviewer
-            reviewer_success = run_test_reviewer(report_dir, all_report_dirs, start_commit_id, args.verbose)
+            # Run test reviewer (merging the group reviews in pipelined mode)
+            group_notes = group_reviews.wait() if group_reviews else None
+            reviewer_success = run_test_reviewer(report_dir, all_report_dirs, start_commit_id, args.verbose, group_notes)
+            charge_agent(budget, report_dir, "test-reviewer")
 
             if not reviewer_success:
                 print("\n⚠️  Test reviewer failed, halting test run loop")
@@ -241,9 +916,18 @@ def main():
             elif args.no_pm:
                 print("\nSkipping product manager (--no-pm flag set)")
                 should_continue = False
+            elif budget and budget.exceeded:
+                print(f"\n💸 Budget exhausted ({budget.describe()}), skipping product manager")
+                should_continue = False
             else:
                 # Run product manager to decide next step
                 pm_decision = run_product_manager(report_dir, all_report_dirs, start_commit_id, MAX_TEST_ITERATIONS, args.verbose)
+                charge_agent(budget, report_dir, "product-manager")
+                if history:
+                    try:
+                        history.record_decision(report_dir.name, pm_decision)
+                    except sqlite3.Error as e:
+                        print(f"⚠️  History index unavailable ({e}), decision not recorded")
 
                 action = pm_decision.get('action', 'halt')
 
@@ -252,13 +936,17 @@ def main():
                     print(f"Reasoning: {pm_decision.get('reasoning', 'No reasoning provided')}")
 
                     # Run developer agent to implement fixes before next test run (unless --no-dev)
-                    if args.no_dev:
+                    if budget and budget.exceeded:
+                        print(f"\n💸 Budget exhausted ({budget.describe()}), halting before the next test run")
+                        should_continue = False
+                    elif args.no_dev:
                         print("\nSkipping developer agent (--no-dev flag set)")
                         print("⚠️  WARNING: Re-running tests without implementing fixes!")
                         iteration += 1
                         should_continue = True
                     else:
                         developer_success = run_developer_agent(report_dir, args.verbose)
+                        charge_agent(budget, report_dir, "developer")
 
                         if not developer_success:
                             print("\n⚠️  Developer agent failed, halting test run loop")
@@ -283,6 +971,12 @@ def main():
 
                     should_continue = False
 
+            # Rewrite this run's trace to include the agent spans
+            tracer.write(report_dir / TRACE_FILENAME)
+
+    if history:
+        history.close()
+
     # Final summary
     overall_end_time = datetime.now()
     overall_duration = overall_end_time - overall_start_time
@@ -292,6 +986,10 @@ def main():
     print("=" * 60)
     print(f"Total test runs: {iteration}")
     print(f"Total execution time: {overall_duration.total_seconds():.1f} seconds ({overall_duration.total_seconds()/60:.1f} minutes)")
+    run_usage = [report_dir_usage(d) for d in session_dirs]
+    tests_cost = sum(u['tests'].get('cost_usd', 0) for u in run_usage)
+    agents_cost = sum(u['agents'].get('cost_usd', 0) for u in run_usage)
+    print(f"Total cost: ${tests_cost + agents_cost:.4f} (tests ${tests_cost:.4f}, agents ${agents_cost:.4f})")
 
     if iteration == 1:
         print(f"\nFinal report: {all_report_dirs[0]}/REPORT.md")
@@ -0,0 +1,76 @@
+"""Bounded test output capture and the compressed on-disk output store
+
+Test processes write to unbuffered temporary files instead of pipes, and
+at most OUTPUT_CAPTURE_MAX_BYTES per stream is read back. The complete
+captured output of each test is stored gzipped next to its report, and only
+a head/tail preview stays on the TestResult, so memory use follows the
+number of in-flight tests rather than the total output of the suite.
+"""
+
+import gzip
+from pathlib import Path
+from typing import IO, Optional
+
+from .config import OUTPUT_CAPTURE_MAX_BYTES, OUTPUT_PREVIEW_HEAD_CHARS, OUTPUT_PREVIEW_TAIL_CHARS
+
+OUTPUT_BLOB_SUFFIX = ".output.gz"
+
+
+def read_capped(stream: IO[bytes], limit: int = OUTPUT_CAPTURE_MAX_BYTES) -> str:
+    """Read a captured stream from the start, up to `limit` bytes
+
+    Args:
+        stream: Temporary file a process wrote its output to
+        limit: Maximum bytes to read
+
+    Returns:
+        Decoded text, with a marker line if the stream was longer
+    """
+    stream.seek(0)
+    data = stream.read(limit + 1)
+    text = data[:limit].decode(errors='replace')
+    if len(data) > limit:
+        text += f"\n[output capture limit of {limit} bytes reached; the rest was discarded]\n"
+    return text
+
+
+def make_preview(text: str, head: int = OUTPUT_PREVIEW_HEAD_CHARS, tail: int = OUTPUT_PREVIEW_TAIL_CHARS) -> str:
+    """Shorten text to its first `head` and last `tail` characters
+
+    Args:
+        text: Complete output
+        head: Characters kept from the start
+        tail: Characters kept from the end
+
+    Returns:
+        The text itself if short enough, otherwise head + omission marker + tail
+    """
+    if len(text) <= head + tail:
+        return text
+    omitted = len(text) - head - tail
+    return f"{text[:head]}\n... [{omitted} characters omitted] ...\n{text[-tail:]}"
+
+
+def output_blob_path(group_dir: Path, test_num: int) -> Path:
+    """Location of a test's complete output (next to its report)"""
+    return group_dir / f"{test_num}{OUTPUT_BLOB_SUFFIX}"
+
+
+def write_output_blob(path: Path, text: str) -> None:
+    """Store a test's complete output gzip-compressed
+
+    Args:
+        path: Blob path from output_blob_path()
+        text: Complete output
+    """
+    with gzip.open(path, 'wt', encoding='utf-8', compresslevel=6) as f:
+        f.write(text)
+
+
+def read_output_blob(path: Path) -> Optional[str]:
+    """Load a stored output, or None if the blob is missing or unreadable"""
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            return f.read()
+    except (OSError, EOFError):
+        return None
@@ -1,10 +1,28 @@
 """Test result reporting and output generation"""
 
+import os
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Tuple, Optional
 
+from .config import SAMPLING_STABLE_PASS_RATE, SAMPLING_FLAKY_PASS_RATE, SAMPLING_ALPHA, SAMPLING_BETA, SAMPLING_PASS_AT_K
 from .models import TestResult
+from .flakiness import (
+    VERDICTS, VERDICT_FLAKY, VERDICT_UNCERTAIN, wilson_interval, pass_at_k, sample_counts, describe_samples
+)
+from .outputs import make_preview
+from .cache import skill_for_group
+from .usage import USAGE_FIELDS, add_usage, sum_usage, format_usage
+
+
+def output_link(report_dir: Path, test_result: TestResult) -> str:
+    """Relative link from a report directory to a result's stored output"""
+    return os.path.relpath(test_result.output_path, report_dir)
+
+
+def output_preview(test_result: TestResult) -> str:
+    """Bounded output for reports (results from older journals hold complete outputs)"""
+    return test_result.output if test_result.output_chars else make_preview(test_result.output)
 
 
 def write_test_report(report_dir: Path, test_result: TestResult) -> None:
@@ -19,7 +37,28 @@ def write_test_report(report_dir: Path, test_result: TestResult) -> None:
     with open(report_path, 'w') as f:
         f.write(f"# Test {test_result.test_num}: {test_result.test_name}\n\n")
         f.write(f"**Status:** {test_result.status}\n\n")
-        f.write(f"**Duration:** {test_result.duration_seconds:.2f}s\n\n")
+        if test_result.samples:
+            f.write(f"**Verdict:** {test_result.verdict} ({describe_samples(test_result)})\n\n")
+        f.write(f"**Duration:** {test_result.duration_seconds:.2f}s{' (total over samples)' if test_result.samples else ''}\n\n")
+        if test_result.phase_seconds:
+            phases = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in test_result.phase_seconds.items())
+            f.write(f"**Phases:** {phases}\n\n")
+        if test_result.usage:
+            f.write(f"**Usage:** {format_usage(test_result.usage)}\n\n")
+        if test_result.cached:
+            f.write(f"**Cached:** Yes (response reused from an identical earlier run)\n\n")
+        if test_result.early_exit:
+            f.write(f"**Early Exit:** Yes (claude stopped once a complete command was emitted)\n\n")
+        if test_result.batch_size > 1:
+            f.write(f"**Batch:** Answered in a batch of {test_result.batch_size} requests in one claude run "
+                    f"(duration is an equal share)\n\n")
+        elif test_result.batch_fallback:
+            f.write(f"**Batch:** Run alone after its batch failed or returned malformed answers\n\n")
+        if test_result.session_request > 1:
+            f.write(f"**Session:** Request {test_result.session_request} in a reused claude session "
+                    f"(experimental; not a clean run: earlier requests and answers were in its context)\n\n")
+        if test_result.carried_from:
+            f.write(f"**Carried Over:** Not re-run; result from {test_result.carried_from}\n\n")
         f.write(f"**User Request:** \"{test_result.user_request}\"\n\n")
         f.write(f"**Command Generated:**\n```bash\n{test_result.command_generated}\n```\n\n")
 
@@ -28,10 +67,35 @@ def write_test_report(report_dir: Path, test_result: TestResult) -> None:
             f.write(f"- {criterion}\n")
         f.write("\n")
 
-        if test_result.status == "FAIL":
+        if test_result.unchecked_criteria:
+            f.write(f"**Unchecked Criteria (no automated rule):**\n")
+            for criterion in test_result.unchecked_criteria:
+                f.write(f"- {criterion}\n")
+            f.write("\n")
+
+        if test_result.status in ["FAIL", "INFRA_ERROR"]:
             f.write(f"**Failure Reason:**\n{test_result.failure_reason}\n\n")
 
-        f.write(f"**Full Output:**\n```\n{test_result.output[:2000]}{'...' if len(test_result.output) > 2000 else ''}\n```\n")
+        if len(test_result.attempts) > 1:
+            f.write(f"**Attempts:**\n")
+            for attempt in test_result.attempts:
+                outcome = f"{attempt['error_kind']} - {attempt['error']}" if attempt['error_kind'] else "ok"
+                f.write(f"- Attempt {attempt['attempt']}: {attempt['duration_seconds']:.1f}s, {outcome}\n")
+            f.write("\n")
+
+        if test_result.samples:
+            f.write(f"**Samples:** (status, command and output above are from the first sample with the majority outcome)\n\n")
+            f.write(f"| Sample | Status | Duration | Command | Report |\n")
+            f.write(f"|--------|--------|----------|---------|--------|\n")
+            for sample in test_result.samples:
+                f.write(f"| {sample['sample']} | {sample['status']} | {sample['duration_seconds']:.1f}s | "
+                        f"`{sample['command_generated']}` | [{sample['report']}](./{sample['report']}) |\n")
+            f.write("\n")
+
+        if test_result.output_path:
+            f.write(f"**Output File:** [{Path(test_result.output_path).name}]({output_link(report_dir, test_result)}) "
+                    f"({test_result.output_chars} characters, gzip)\n\n")
+        f.write(f"**Full Output:**\n```\n{output_preview(test_result)}\n```\n")
 
 
 def write_group_report(report_dir: Path, group_name: str, results: List[TestResult]) -> None:
@@ -46,6 +110,7 @@ def write_group_report(report_dir: Path, group_name: str, results: List[TestResu
 
     passed = sum(1 for r in results if r.status == "PASS" or r.status == "SKIPPED")
     failed = sum(1 for r in results if r.status == "FAIL")
+    infra_errors = sum(1 for r in results if r.status == "INFRA_ERROR")
     total = len(results)
     pass_rate = (passed / total * 100) if total > 0 else 0
 
@@ -64,36 +129,170 @@ def write_group_report(report_dir: Path, group_name: str, results: List[TestResu
         f.write(f"- **Total Tests:** {total}\n")
         f.write(f"- **Passed:** {passed} ({pass_rate:.1f}%)\n")
         f.write(f"- **Failed:** {failed}\n")
+        f.write(f"- **Infrastructure Errors:** {infra_errors}\n")
         f.write(f"- **Total Duration:** {total_duration:.1f}s ({total_duration/60:.1f}m)\n")
         f.write(f"- **Average Duration:** {avg_duration:.1f}s per test\n")
-        f.write(f"- **Duration Range:** {min_duration:.1f}s - {max_duration:.1f}s\n\n")
+        f.write(f"- **Duration Range:** {min_duration:.1f}s - {max_duration:.1f}s\n")
+        f.write(f"- **Usage:** {format_usage(sum_usage(results))}\n\n")
 
         f.write(f"## Test Results\n\n")
         for result in results:
-            status_icon = "✓" if result.status in ["PASS", "SKIPPED"] else "✗"
+            status_icon = "✓" if result.status in ["PASS", "SKIPPED"] else "⚠" if result.status == "INFRA_ERROR" else "✗"
             f.write(f"### Test {result.test_num}: {result.test_name}\n")
             f.write(f"- **Status:** {status_icon} {result.status}\n")
-            f.write(f"- **Duration:** {result.duration_seconds:.1f}s\n")
+            f.write(f"- **Duration:** {result.duration_seconds:.1f}s{' (cached)' if result.cached else ''}\n")
+            if result.samples:
+                f.write(f"- **Verdict:** {result.verdict} ({describe_samples(result)})\n")
+            if result.carried_from:
+                f.write(f"- **Carried Over:** from {result.carried_from}\n")
             f.write(f"- **User Request:** \"{result.user_request}\"\n")
             f.write(f"- **Command Generated:** `{result.command_generated}`\n")
-            if result.status == "FAIL":
+            if result.status in ["FAIL", "INFRA_ERROR"]:
                 f.write(f"- **Issue:** {result.failure_reason}\n")
             f.write(f"- **Report:** [./{result.test_num}.md](./{result.test_num}.md)\n\n")
 
 
-def write_master_report(report_dir: Path, all_results: Dict[str, List[TestResult]]) -> None:
+def write_batch_comparison(f, results: List[TestResult]) -> None:
+    """Write the per-batch vs per-test cost section of the master report
+
+    Args:
+        f: Open master report file
+        results: Results executed in this run (not carried over)
+    """
+    batched = [r for r in results if r.batch_size > 1]
+    fallbacks = [r for r in results if r.batch_fallback]
+    if not batched and not fallbacks:
+        return
+    single = [r for r in results if r.batch_size <= 1 and not r.cached]
+
+    # Each batched result holds 1/batch_size of its batch's invocation and wall time
+    batch_runs = round(sum(1 / r.batch_size for r in batched))
+    batch_seconds = sum(r.duration_seconds for r in batched)
+    single_seconds = sum(r.duration_seconds for r in single)
+
+    f.write(f"\n## Batched Execution\n\n")
+    f.write(f"| Mode | claude Runs | Tests | Time per Run | Time per Test |\n")
+    f.write(f"|------|-------------|-------|--------------|---------------|\n")
+    if batched:
+        f.write(f"| Batched | {batch_runs} | {len(batched)} | {batch_seconds / batch_runs:.1f}s | "
+                f"{batch_seconds / len(batched):.1f}s |\n")
+    if single:
+        f.write(f"| Single | {len(single)} | {len(single)} | {single_seconds / len(single):.1f}s | "
+                f"{single_seconds / len(single):.1f}s |\n")
+    f.write(f"\n- **Fallbacks:** {len(fallbacks)} tests re-run alone after a failed or malformed batch "
+            f"(included under Single)\n")
+
+
+def write_flakiness_summary(f, results: List[TestResult]) -> None:
+    """Write the flakiness section of the master report (--samples)
+
+    Args:
+        f: Open master report file
+        results: Every result of the run
+    """
+    sampled = [r for r in results if r.samples]
+    if not sampled:
+        return
+    sample_total = sum(len(r.samples) for r in sampled)
+
+    f.write(f"\n## Flakiness\n\n")
+    f.write(f"Each test ran until a sequential test could call it stable or flaky. Verdicts at "
+            f"{SAMPLING_ALPHA:.0%}/{SAMPLING_BETA:.0%} error rates, stable meaning a pass or fail rate of "
+            f"{SAMPLING_STABLE_PASS_RATE:.0%} and flaky {SAMPLING_FLAKY_PASS_RATE:.0%}; uncertain tests "
+            f"reached the sample limit first. pass@{SAMPLING_PASS_AT_K} is the chance that at least one of "
+            f"{SAMPLING_PASS_AT_K} runs passes.\n\n")
+    f.write(f"- **Samples:** {sample_total} for {len(sampled)} tests ({sample_total / len(sampled):.2f} per test)\n")
+    for verdict in VERDICTS:
+        f.write(f"- **{verdict}:** {sum(1 for r in sampled if r.verdict == verdict)}\n")
+
+    unstable = [r for r in sampled if r.verdict in [VERDICT_FLAKY, VERDICT_UNCERTAIN]]
+    if unstable:
+        f.write(f"\n| Test | Verdict | Status | Samples | pass@1 | 95% CI | pass@{SAMPLING_PASS_AT_K} |\n")
+        f.write(f"|------|---------|--------|---------|--------|--------|--------|\n")
+        for result in sorted(unstable, key=lambda r: (VERDICTS.index(r.verdict), r.group, r.test_num)):
+            passes, decided = sample_counts(result)
+            low, high = wilson_interval(passes, decided)
+            at_k = pass_at_k(passes, decided, SAMPLING_PASS_AT_K)
+            f.write(f"| [{result.group} {result.test_num}](./{result.group}/{result.test_num}.md) | {result.verdict} | "
+                    f"{result.status} | {passes}/{decided} | {passes / decided if decided else 0:.2f} | "
+                    f"{low:.2f}-{high:.2f} | {'-' if at_k is None else format(at_k, '.2f')} |\n")
+
+
+def write_usage_summary(f, all_results: Dict[str, List[TestResult]],
+                        usage_history: Optional[List[Tuple[str, Dict[str, Dict[str, float]]]]] = None,
+                        budget_note: str = "") -> None:
+    """Write the token and cost section of the master report
+
+    Args:
+        f: Open master report file
+        all_results: Dictionary mapping group names to test results
+        usage_history: (report directory name, report_dir_usage()) for every
+            test run of this invocation, this one last
+        budget_note: --budget status line, if a budget is set
+    """
+    executed = [r for results in all_results.values() for r in results if not r.carried_from]
+    total = sum_usage(executed)
+    if not total and not budget_note:
+        return
+
+    f.write(f"\n## Cost and Usage\n\n")
+    f.write(f"- **Tests:** {format_usage(total)}\n")
+    f.write(f"- **Tests Reporting Usage:** {sum(1 for r in executed if r.usage)}/{len(executed)} "
+            f"(cached and carried-over tests cost nothing in this run)\n")
+    if budget_note:
+        f.write(f"- **Budget:** {budget_note}\n")
+
+    f.write(f"\n### By Group and Skill\n\n")
+    f.write(f"Each group exercises one skill. Context per test (input, cache write and cache read tokens) is "
+            f"what the prompt plus the loaded skill costs; cache writes are first loads.\n\n")
+    f.write(f"| Group | Skill | Tests | Input | Cache Write | Cache Read | Output | Cost | Cost/Test | Context/Test | API Time |\n")
+    f.write(f"|-------|-------|-------|-------|-------------|------------|--------|------|-----------|--------------|----------|\n")
+    rows = []
+    for group_name, results in all_results.items():
+        paid = [r for r in results if r.usage and not r.carried_from]
+        if paid:
+            rows.append((group_name, len(paid), sum_usage(paid)))
+    for group_name, count, usage in sorted(rows, key=lambda row: -row[2].get('cost_usd', 0)):
+        context = sum(usage.get(field, 0) for field in USAGE_FIELDS[:3])
+        f.write(f"| {group_name} | {skill_for_group(group_name)} | {count} | {usage.get('input_tokens', 0):,.0f} | "
+                f"{usage.get('cache_creation_input_tokens', 0):,.0f} | {usage.get('cache_read_input_tokens', 0):,.0f} | "
+                f"{usage.get('output_tokens', 0):,.0f} | ${usage.get('cost_usd', 0):.4f} | "
+                f"${usage.get('cost_usd', 0) / count:.4f} | {context / count:,.0f} | {usage.get('api_seconds', 0):.1f}s |\n")
+
+    if usage_history and len(usage_history) > 1:
+        f.write(f"\n### By Iteration\n\n")
+        f.write(f"Agent usage of this run is recorded in `agent-usage.jsonl` once the agents finish.\n\n")
+        f.write(f"| Run | Tests | Agents | Total | Input + Context Tokens | Output Tokens |\n")
+        f.write(f"|-----|-------|--------|-------|------------------------|---------------|\n")
+        for name, usage in usage_history:
+            combined = add_usage(dict(usage['tests']), usage['agents'])
+            context = sum(combined.get(field, 0) for field in USAGE_FIELDS[:3])
+            f.write(f"| {name} | ${usage['tests'].get('cost_usd', 0):.4f} | ${usage['agents'].get('cost_usd', 0):.4f} | "
+                    f"${combined.get('cost_usd', 0):.4f} | {context:,.0f} | {combined.get('output_tokens', 0):,.0f} |\n")
+
+
+def write_master_report(report_dir: Path, all_results: Dict[str, List[TestResult]],
+                        concurrency_timeline: Optional[List[Dict]] = None,
+                        usage_history: Optional[List[Tuple[str, Dict[str, Dict[str, float]]]]] = None,
+                        budget_note: str = "") -> None:
     """Write master consolidated report
 
     Args:
         report_dir: Directory to write report to
         all_results: Dictionary mapping group names to test results
+        concurrency_timeline: Limit changes from adaptive concurrency, if enabled
+        usage_history: Usage of every test run of this invocation, this one
+            last (see write_usage_summary)
+        budget_note: --budget status line, if a budget is set
     """
     report_path = report_dir / "REPORT.md"
 
     total_tests = sum(len(results) for results in all_results.values())
     total_passed = sum(sum(1 for r in results if r.status in ["PASS", "SKIPPED"]) for results in all_results.values())
     total_failed = sum(sum(1 for r in results if r.status == "FAIL") for results in all_results.values())
+    total_infra = sum(sum(1 for r in results if r.status == "INFRA_ERROR") for results in all_results.values())
     pass_rate = (total_passed / total_tests * 100) if total_tests > 0 else 0
+    fail_rate = (total_failed / total_tests * 100) if total_tests > 0 else 0
 
     # Calculate timing statistics
     all_test_results = [r for results in all_results.values() for r in results]
@@ -111,22 +310,34 @@ def write_master_report(report_dir: Path, all_results: Dict[str, List[TestResult
         f.write(f"- **Total Test Groups:** {len(all_results)}\n")
         f.write(f"- **Total Tests:** {total_tests}\n")
         f.write(f"- **Passed:** {total_passed} ({pass_rate:.1f}%)\n")
-        f.write(f"- **Failed:** {total_failed} ({100-pass_rate:.1f}%)\n")
+        f.write(f"- **Failed:** {total_failed} ({fail_rate:.1f}%)\n")
+        f.write(f"- **Infrastructure Errors:** {total_infra} (timeouts, rate limits, crashes - not counted as failures)\n")
         f.write(f"- **Total Duration:** {total_duration:.1f}s ({total_duration/60:.1f}m)\n")
         f.write(f"- **Average Duration:** {avg_duration:.1f}s per test\n")
-        f.write(f"- **Duration Range:** {min_duration:.1f}s - {max_duration:.1f}s\n\n")
+        f.write(f"- **Duration Range:** {min_duration:.1f}s - {max_duration:.1f}s\n")
+        f.write(f"- **Cached Responses:** {sum(1 for r in all_test_results if r.cached)}\n")
+        f.write(f"- **Early Exits:** {sum(1 for r in all_test_results if r.early_exit)}\n")
+        f.write(f"- **Carried Over (not re-run):** {sum(1 for r in all_test_results if r.carried_from)}\n")
+        reused_session = sum(1 for r in all_test_results if r.session_request > 1)
+        if reused_session:
+            f.write(f"- **Reused Sessions:** {reused_session} tests answered by a session that had already "
+                    f"answered other requests (experimental; not clean runs)\n")
+        f.write("\n")
 
         f.write(f"## Results by Group\n\n")
         for group_name, results in sorted(all_results.items()):
             total = len(results)
             passed = sum(1 for r in results if r.status in ["PASS", "SKIPPED"])
             failed = sum(1 for r in results if r.status == "FAIL")
+            infra_errors = sum(1 for r in results if r.status == "INFRA_ERROR")
             group_rate = (passed / total * 100) if total > 0 else 0
 
             f.write(f"### {group_name}\n")
             f.write(f"- **Tests:** {total}\n")
             f.write(f"- **Passed:** {passed}\n")
             f.write(f"- **Failed:** {failed}\n")
+            if infra_errors:
+                f.write(f"- **Infrastructure Errors:** {infra_errors}\n")
             f.write(f"- **Pass Rate:** {group_rate:.1f}%\n")
             f.write(f"- **Report:** [./{group_name}/REPORT.md](./{group_name}/REPORT.md)\n\n")
 
@@ -149,13 +360,54 @@ def write_master_report(report_dir: Path, all_results: Dict[str, List[TestResult
                         f.write(f"- {criterion}\n")
                     f.write("\n")
                     f.write(f"**Failure Reason:**\n{result.failure_reason}\n\n")
-                    f.write(f"**Full Output:**\n```\n{result.output[:2000]}{'...' if len(result.output) > 2000 else ''}\n```\n\n")
+                    f.write(f"**Full Output:**\n```\n{output_preview(result)}\n```\n\n")
                     f.write(f"**Full Report:** [./{group_name}/{result.test_num}.md](./{group_name}/{result.test_num}.md)\n\n")
                     f.write("---\n\n")
 
         if not has_failures:
             f.write("No test failures - all tests passed!\n\n")
 
+        if total_infra:
+            f.write(f"## Infrastructure Errors\n\n")
+            f.write(f"These tests did not produce a usable response after retries. They are not skill failures.\n\n")
+            for group_name, results in sorted(all_results.items()):
+                for result in results:
+                    if result.status == "INFRA_ERROR":
+                        f.write(f"- **{group_name} Test {result.test_num}: {result.test_name}** - {result.failure_reason} "
+                                f"([report](./{group_name}/{result.test_num}.md))\n")
+            f.write("\n")
+
         f.write(f"## Test Execution Details\n\n")
         f.write(f"- **Scenario Files Processed:** {len(all_results)}\n")
         f.write(f"- **Tests Executed:** {total_tests}\n")
+        total_criteria = sum(len(r.criteria) for r in all_test_results)
+        total_unchecked = sum(len(r.unchecked_criteria) for r in all_test_results)
+        f.write(f"- **Criteria Without Automated Rule:** {total_unchecked}/{total_criteria} (listed in individual test reports)\n")
+
+        # Phase totals over tests executed in this run (carried-over results ran elsewhere)
+        phase_totals: Dict[str, float] = {}
+        executed = [r for r in all_test_results if not r.carried_from]
+        for result in executed:
+            for name, seconds in result.phase_seconds.items():
+                phase_totals[name] = phase_totals.get(name, 0.0) + seconds
+        if phase_totals:
+            phase_sum = sum(phase_totals.values())
+            f.write(f"\n## Time by Phase\n\n")
+            f.write(f"Summed over {len(executed)} executed tests. Per-worker timeline: [trace.json](./trace.json) "
+                    f"(open in chrome://tracing or https://ui.perfetto.dev).\n\n")
+            f.write(f"| Phase | Total | Share | Mean per Test |\n")
+            f.write(f"|-------|-------|-------|---------------|\n")
+            for name, seconds in sorted(phase_totals.items(), key=lambda item: -item[1]):
+                share = seconds / phase_sum * 100 if phase_sum > 0 else 0
+                f.write(f"| {name} | {seconds:.1f}s | {share:.1f}% | {seconds / len(executed):.2f}s |\n")
+
+        write_batch_comparison(f, executed)
+        write_flakiness_summary(f, all_test_results)
+        write_usage_summary(f, all_results, usage_history, budget_note)
+
+        if concurrency_timeline:
+            f.write(f"\n## Concurrency Timeline\n\n")
+            f.write(f"| Elapsed | Limit | Reason |\n")
+            f.write(f"|---------|-------|--------|\n")
+            for entry in concurrency_timeline:
+                f.write(f"| {entry['elapsed']:.1f}s | {entry['limit']} | {entry['reason']} |\n")
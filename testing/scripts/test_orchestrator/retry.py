@@ -0,0 +1,85 @@
+"""Retry policy for transient (infrastructure) test failures"""
+
+import random
+from threading import Lock
+from datetime import datetime
+
+from .models import TestResult
+
+
+class RetryPolicy:
+    """Per-run retry limits with jittered exponential backoff
+
+    Any classified failure (timeout, rate limit, non-zero exit, empty output)
+    is treated as transient. Retries are capped per test and across the whole
+    run, so a broken environment can't multiply the suite's cost.
+    """
+
+    def __init__(self, max_retries: int, budget: int, base_delay: float = 2.0, max_delay: float = 30.0):
+        self.max_retries = max_retries
+        self.budget = budget
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.used = 0
+        self._lock = Lock()
+
+    def should_retry(self, error_kind: str, attempt: int) -> bool:
+        """Decide whether to retry, consuming budget if so
+
+        Args:
+            error_kind: Classification from execution.classify_failure()
+            attempt: Number of the attempt that just finished (1-based)
+
+        Returns:
+            True if the test should be run again
+        """
+        if not error_kind or attempt > self.max_retries:
+            return False
+        with self._lock:
+            if self.used >= self.budget:
+                return False
+            self.used += 1
+        return True
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Seconds to wait before the next attempt (full jitter)
+
+        Args:
+            attempt: Number of the attempt that just finished (1-based)
+
+        Returns:
+            Random delay in [0, min(max_delay, base_delay * 2^(attempt-1))]
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+def summarize_error(stderr: str) -> str:
+    """Condense stderr into a single line for reports
+
+    Args:
+        stderr: A process's stderr
+
+    Returns:
+        Non-empty stderr lines joined with ' | ', truncated to 200 characters
+    """
+    return " | ".join(line.strip() for line in stderr.strip().splitlines() if line.strip())[:200]
+
+
+def record_attempt(test_result: TestResult, start_time: datetime, end_time: datetime,
+                   error_kind: str, stderr: str) -> None:
+    """Append one attempt's metadata to a test result
+
+    Args:
+        test_result: Result being executed
+        start_time: When the attempt started
+        end_time: When the attempt finished
+        error_kind: Classification from execution.classify_failure()
+        stderr: The attempt's stderr (summarized for errors)
+    """
+    test_result.attempts.append({
+        'attempt': len(test_result.attempts) + 1,
+        'start_time': start_time.isoformat(),
+        'duration_seconds': (end_time - start_time).total_seconds(),
+        'error_kind': error_kind,
+        'error': summarize_error(stderr) if error_kind else ""
+    })
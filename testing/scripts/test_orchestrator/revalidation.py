@@ -0,0 +1,303 @@
+"""Offline re-validation of a previous test run's stored outputs
+
+Re-runs command extraction and validation against the current scenario files
+and validator using the outputs saved in an existing report directory, so
+changes to validation.py, rules.py or Expected Criteria can be checked without
+spawning claude. Only results whose stdout and stderr can be recovered exactly
+from the output store are re-validated; anything else would change verdicts
+for reasons unrelated to the validator.
+"""
+
+import re
+import copy
+import time
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple
+
+from .config import print_lock
+from .models import TestResult
+from .manifest import load_scenario_manifest
+from .execution import create_test_result, complete_test_result
+from .reporting import write_test_report, write_group_report, write_master_report
+from .outputs import read_output_blob
+from .journal import ResultsJournal, load_results_journal, RESULTS_JOURNAL_FILENAME
+
+# Subdirectory of the original report directory that receives the new reports
+REVALIDATION_DIRNAME = "revalidation"
+
+# Reports written before the output store kept at most this many characters of output
+STORED_OUTPUT_LIMIT = 2000
+
+TEST_HEADER_PATTERN = re.compile(r'^# Test (\d+): (.*)$', re.MULTILINE)
+STATUS_PATTERN = re.compile(r'^\*\*Status:\*\* (\w+)', re.MULTILINE)
+DURATION_PATTERN = re.compile(r'^\*\*Duration:\*\*\s*([\d.]+)s', re.MULTILINE)
+CARRIED_OVER_PATTERN = re.compile(r'^\*\*Carried Over:\*\* Not re-run; result from (\S+)', re.MULTILINE)
+REQUEST_PATTERN = re.compile(r'^\*\*User Request:\*\* "(.*)"$', re.MULTILINE)
+COMMAND_PATTERN = re.compile(r'^\*\*Command Generated:\*\*\n```bash\n(.*?)\n```', re.MULTILINE | re.DOTALL)
+FAILURE_REASON_PATTERN = re.compile(r'^\*\*Failure Reason:\*\*\n(.*?)\n\n', re.MULTILINE | re.DOTALL)
+OUTPUT_FILE_PATTERN = re.compile(r'^\*\*Output File:\*\* \[[^\]]*\]\(([^)]+)\) \((\d+) characters', re.MULTILINE)
+OUTPUT_MARKER = "**Full Output:**\n```\n"
+OUTPUT_END = "\n```\n"
+
+
+def parse_test_report(report_path: Path, group_name: str) -> Optional[TestResult]:
+    """Rebuild a TestResult from an individual test report
+
+    Args:
+        report_path: Path to a per-test report (e.g., 'gh-search-code-tests/3.md')
+        group_name: Name of the test group
+
+    Returns:
+        TestResult with stored status, command and output, or None if unparseable.
+        Outputs cut off by the report writer are flagged via `truncated`.
+    """
+    content = report_path.read_text()
+    header = TEST_HEADER_PATTERN.search(content)
+    status = STATUS_PATTERN.search(content)
+    request = REQUEST_PATTERN.search(content)
+    output_start = content.find(OUTPUT_MARKER)
+    if not (header and status and request) or output_start == -1:
+        return None
+
+    result = TestResult(
+        group=group_name,
+        test_num=int(header.group(1)),
+        test_name=header.group(2).strip(),
+        user_request=request.group(1)
+    )
+    result.status = status.group(1)
+
+    duration = DURATION_PATTERN.search(content)
+    result.duration_seconds = float(duration.group(1)) if duration else 0.0
+    result.cached = '**Cached:**' in content
+    result.early_exit = '**Early Exit:**' in content
+    carried = CARRIED_OVER_PATTERN.search(content)
+    result.carried_from = carried.group(1) if carried else ""
+
+    command = COMMAND_PATTERN.search(content)
+    result.command_generated = command.group(1) if command else ""
+    reason = FAILURE_REASON_PATTERN.search(content)
+    result.failure_reason = reason.group(1) if reason and result.status in ["FAIL", "INFRA_ERROR"] else ""
+
+    output = content[output_start + len(OUTPUT_MARKER):]
+    if output.endswith(OUTPUT_END):
+        output = output[:-len(OUTPUT_END)]
+
+    output_file = OUTPUT_FILE_PATTERN.search(content)
+    if output_file:
+        # Complete output is in the output store; the report holds a preview
+        blob_path = (report_path.parent / output_file.group(1)).resolve()
+        stored = read_output_blob(blob_path)
+        result.output_chars = int(output_file.group(2))
+        if stored is not None:
+            result.output_path = str(blob_path)
+            output = stored
+        result.truncated = stored is None and result.output_chars > len(output)
+    else:
+        result.truncated = len(output) == STORED_OUTPUT_LIMIT + 3 and output.endswith('...')
+        if result.truncated:
+            output = output[:STORED_OUTPUT_LIMIT]
+    result.output = output
+
+    return result
+
+
+def load_report_results(report_dir: Path) -> Dict[str, List[TestResult]]:
+    """Load all stored test results from a report directory
+
+    Uses the results journal when the run has one (full outputs, no
+    markdown parsing), otherwise parses the individual test reports.
+
+    Args:
+        report_dir: Report directory of a previous test run
+
+    Returns:
+        Dictionary mapping group names to results sorted by test number
+    """
+    journaled = load_results_journal(report_dir)
+    if journaled is not None:
+        return journaled
+
+    all_results: Dict[str, List[TestResult]] = {}
+    for group_dir in sorted(report_dir.glob("*-tests")):
+        if not group_dir.is_dir():
+            continue
+        results = []
+        for report_path in group_dir.glob("*.md"):
+            if not report_path.stem.isdigit():
+                continue
+            result = parse_test_report(report_path, group_dir.name)
+            if result:
+                results.append(result)
+        results.sort(key=lambda r: r.test_num)
+        all_results[group_dir.name] = results
+    return all_results
+
+
+def revalidate_result(stored: TestResult, test: Optional[Dict], group_dir: Path) -> Tuple[TestResult, str]:
+    """Validate one stored output against the current test definition
+
+    Infrastructure errors, tests whose scenario was removed or whose user
+    request changed, and results without a complete stored output (runs
+    from before the output store recorded stdout separately) are copied
+    unchanged.
+
+    Args:
+        stored: Result loaded from the original run
+        test: Current test definition, or None if it no longer exists
+        group_dir: Directory for the re-validated group reports
+
+    Returns:
+        Tuple of (result, reason it was not re-validated, or '' if it was);
+        the report is written to group_dir
+    """
+    streams = stored.stored_streams()
+    if stored.status == "INFRA_ERROR":
+        skip_reason = "infrastructure error"
+    elif test is None or test['user_request'] != stored.user_request:
+        skip_reason = "test changed or removed"
+    elif streams is None:
+        skip_reason = "not revalidatable (no stored output)"
+    else:
+        skip_reason = ""
+    if skip_reason:
+        result = copy.copy(stored)
+        write_test_report(group_dir, result)
+        return result, skip_reason
+
+    result = create_test_result(test, stored.group)
+    result.duration_seconds = stored.duration_seconds
+    result.start_time = stored.start_time
+    result.end_time = stored.end_time
+    result.attempts = stored.attempts
+    result.cached = stored.cached
+    result.early_exit = stored.early_exit
+    result.carried_from = stored.carried_from
+    stdout, stderr = streams
+    return complete_test_result(result, test, stored.group, group_dir, stdout, stderr), ""
+
+
+def write_diff_report(revalidation_dir: Path, source_dir: Path,
+                      original: Dict[str, List[TestResult]],
+                      revalidated: Dict[str, List[TestResult]],
+                      skipped: Dict[Tuple[str, int], str]) -> Dict[str, int]:
+    """Write DIFF.md comparing original and re-validated results
+
+    Args:
+        revalidation_dir: Directory to write the diff to
+        source_dir: Original report directory
+        original: Results parsed from the original reports
+        revalidated: Results after re-validation
+        skipped: Reason by (group_name, test_num) for results copied without re-validation
+
+    Returns:
+        Counts of 'fixed', 'regressed', 'changed' and 'skipped' tests
+    """
+    fixed, regressed, changed, not_revalidated = [], [], [], []
+    for group_name, results in sorted(revalidated.items()):
+        original_by_num = {r.test_num: r for r in original.get(group_name, [])}
+        for result in results:
+            before = original_by_num[result.test_num]
+            if (group_name, result.test_num) in skipped:
+                not_revalidated.append((group_name, before, result))
+            elif before.status == "FAIL" and result.status == "PASS":
+                fixed.append((group_name, before, result))
+            elif before.status == "PASS" and result.status == "FAIL":
+                regressed.append((group_name, before, result))
+            elif (before.failure_reason != result.failure_reason
+                  or before.command_generated != result.command_generated):
+                changed.append((group_name, before, result))
+
+    with open(revalidation_dir / "DIFF.md", 'w') as f:
+        f.write(f"# Re-validation Diff: {source_dir.name}\n\n")
+        f.write(f"Stored outputs from [{source_dir.name}](../REPORT.md) re-validated against the current "
+                f"scenario files and validator. No claude processes were run.\n\n")
+
+        f.write(f"## Summary\n\n")
+        f.write(f"- **Fixed (FAIL → PASS):** {len(fixed)}\n")
+        f.write(f"- **Regressed (PASS → FAIL):** {len(regressed)}\n")
+        f.write(f"- **Same Status, Different Reason or Command:** {len(changed)}\n")
+        f.write(f"- **Not Re-validated:** {len(not_revalidated)} (infrastructure errors, changed or removed tests, "
+                f"outputs not stored)\n\n")
+
+        sections = [
+            ("Regressed", regressed),
+            ("Fixed", fixed),
+            ("Changed", changed),
+        ]
+        for title, entries in sections:
+            f.write(f"## {title}\n\n")
+            if not entries:
+                f.write("None\n\n")
+                continue
+            for group_name, before, after in entries:
+                f.write(f"### {group_name} Test {after.test_num}: {after.test_name}\n")
+                f.write(f"- **Status:** {before.status} → {after.status}\n")
+                if before.command_generated != after.command_generated:
+                    f.write(f"- **Command:** `{before.command_generated}` → `{after.command_generated}`\n")
+                if before.failure_reason != after.failure_reason:
+                    f.write(f"- **Before:** {before.failure_reason or 'All criteria met'}\n")
+                    f.write(f"- **After:** {after.failure_reason or 'All criteria met'}\n")
+                f.write(f"- **Report:** [./{group_name}/{after.test_num}.md](./{group_name}/{after.test_num}.md)\n\n")
+
+        if not_revalidated:
+            f.write(f"## Not Re-validated\n\n")
+            for group_name, before, after in not_revalidated:
+                reason = skipped[(group_name, after.test_num)]
+                f.write(f"- **{group_name} Test {after.test_num}: {after.test_name}** - {reason} (kept {before.status})\n")
+            f.write("\n")
+
+    return {'fixed': len(fixed), 'regressed': len(regressed), 'changed': len(changed),
+            'skipped': len(not_revalidated)}
+
+
+def revalidate_report(source_dir: Path) -> Path:
+    """Re-validate all stored outputs of a previous test run
+
+    Args:
+        source_dir: Report directory of a previous test run
+
+    Returns:
+        Directory containing the new reports and DIFF.md
+    """
+    start = time.monotonic()
+    revalidation_dir = source_dir / REVALIDATION_DIRNAME
+    revalidation_dir.mkdir(exist_ok=True)
+
+    original = load_report_results(source_dir)
+    revalidated: Dict[str, List[TestResult]] = {}
+    skipped: Dict[Tuple[str, int], str] = {}
+
+    scenario_groups = load_scenario_manifest().groups()
+    # Start a fresh journal; an earlier re-validation's results are replaced
+    (revalidation_dir / RESULTS_JOURNAL_FILENAME).unlink(missing_ok=True)
+    journal = ResultsJournal(revalidation_dir)
+    for group_name, stored_results in original.items():
+        tests = scenario_groups.get(group_name, [])
+        tests_by_num = {test['test_num']: test for test in tests}
+
+        group_dir = revalidation_dir / group_name
+        group_dir.mkdir(exist_ok=True)
+        results = []
+        for stored in stored_results:
+            result, skip_reason = revalidate_result(stored, tests_by_num.get(stored.test_num), group_dir)
+            journal.append(result)
+            results.append(result)
+            if skip_reason:
+                skipped[(group_name, result.test_num)] = skip_reason
+        write_group_report(group_dir, group_name, results)
+        revalidated[group_name] = results
+
+    journal.close()
+    write_master_report(revalidation_dir, revalidated)
+    counts = write_diff_report(revalidation_dir, source_dir, original, revalidated, skipped)
+
+    total = sum(len(results) for results in revalidated.values())
+    with print_lock:
+        print(f"\nRe-validated {total} stored outputs in {time.monotonic() - start:.2f}s")
+        print(f"Fixed: {counts['fixed']}, Regressed: {counts['regressed']}, "
+              f"Changed: {counts['changed']}, Not re-validated: {counts['skipped']}")
+        print(f"\nReport location: {revalidation_dir}/REPORT.md")
+        print(f"Diff: {revalidation_dir}/DIFF.md")
+
+    return revalidation_dir
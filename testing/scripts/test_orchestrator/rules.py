@@ -0,0 +1,341 @@
+"""Compiled validation rules for scenario Expected Criteria
+
+Each free-text criterion is compiled once (at scenario parse time) into zero
+or more typed rules. A criterion that yields no rules is kept as an
+UnparsedRule so it shows up as unchecked instead of silently passing.
+"""
+
+import re
+import shlex
+from typing import List, Optional
+
+# Criterion parsing patterns (applied once per criterion at compile time)
+SUBCOMMAND_PATTERN = re.compile(r'gh search (\w+)')
+FLAG_PATTERN = re.compile(r'`(-[^\s`]+|--[^\s`]+)`')
+BACKTICK_PATTERN = re.compile(r'`([^`]+)`')
+QUOTED_QUERY_PATTERN = re.compile(r'query[^`]*`"([^"]+)"`')
+FORMAT_PATTERN = re.compile(r'format:\s*`([^`]+)`', re.IGNORECASE)
+OR_PATTERN = re.compile(r'\s+or\s+', re.IGNORECASE)
+
+# Short flags of `gh search` and their long forms, so either spelling matches
+FLAG_ALIASES = {
+    '-R': '--repo',
+    '-B': '--base',
+    '-H': '--head',
+    '-L': '--limit',
+    '-w': '--web',
+    '-q': '--jq',
+    '-t': '--template',
+}
+
+
+def normalize_tokens(text: str) -> List[str]:
+    """Split a command (or a flag with its value) into comparable tokens
+
+    Quotes are removed, `--flag=value` becomes `--flag value` and short
+    flags are replaced by their long forms.
+
+    Args:
+        text: Command or criterion fragment
+
+    Returns:
+        Normalized tokens
+    """
+    text = text.replace('\\\n', ' ')  # Line continuations
+    try:
+        raw_tokens = shlex.split(text)
+    except ValueError:
+        # Unbalanced quotes: fall back to whitespace, dropping the quotes
+        raw_tokens = [token.strip('"\'') for token in text.split()]
+    tokens = []
+    for token in raw_tokens:
+        if token.startswith('--') and '=' in token:
+            tokens.extend(token.split('=', 1))
+        else:
+            tokens.append(FLAG_ALIASES.get(token, token))
+    return tokens
+
+
+class Rule:
+    """Base class for a compiled criterion check"""
+
+    kind = "rule"
+
+    def __init__(self, criterion: str):
+        self.criterion = criterion
+
+    def evaluate(self, command: str, command_lower: str, output: str) -> Optional[str]:
+        """Check the rule against a generated command
+
+        Args:
+            command: Extracted command string
+            command_lower: Lowercased command (shared across rules)
+            output: Claude's full output text
+
+        Returns:
+            Failure message, or None if the rule is satisfied
+        """
+        raise NotImplementedError
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.criterion!r})"
+
+
+class SubcommandRule(Rule):
+    """Command must use a specific `gh search <type>` subcommand"""
+
+    kind = "subcommand"
+
+    def __init__(self, criterion: str, search_type: str, label: str):
+        super().__init__(criterion)
+        self.search_type = search_type
+        self.label = label
+
+    def evaluate(self, command: str, command_lower: str, output: str) -> Optional[str]:
+        if self.search_type not in command_lower:
+            return f"Missing: {self.label}"
+        return None
+
+
+class FlagRule(Rule):
+    """Command must contain a specific flag or qualifier (case-sensitive)"""
+
+    kind = "flag"
+
+    def __init__(self, criterion: str, flag: str):
+        super().__init__(criterion)
+        self.flag = flag
+
+    def evaluate(self, command: str, command_lower: str, output: str) -> Optional[str]:
+        if self.flag not in command:
+            return f"Missing flag: {self.flag}"
+        return None
+
+
+class AlternativesRule(Rule):
+    """Any one of several flags/qualifiers is acceptable
+
+    Only compiled when every OR branch names its flag or qualifier, so a
+    command that matches none of them uses no valid spelling. Flags are
+    compared as normalized tokens (see normalize_tokens), so quoting,
+    `--flag=value` and short aliases don't matter.
+    """
+
+    kind = "alternatives"
+
+    def __init__(self, criterion: str, alternatives: List[str]):
+        super().__init__(criterion)
+        self.labels = alternatives
+        # Query qualifiers (contain ':') match case-insensitively anywhere in the
+        # query, flags as an exact run of tokens (flag and value)
+        self.alternatives = []
+        for alt in alternatives:
+            tokens = normalize_tokens(alt)
+            if not tokens:
+                continue
+            if ':' in tokens[0]:
+                self.alternatives.append((" ".join(tokens).lower(), None))
+            else:
+                self.alternatives.append(("", tokens))
+
+    def matches(self, command: str, command_lower: str) -> bool:
+        """Whether any alternative appears in the command"""
+        tokens = normalize_tokens(command)
+        query_text = " ".join(tokens).lower()
+        for qualifier, flag_tokens in self.alternatives:
+            if flag_tokens is None:
+                if qualifier in query_text:
+                    return True
+            elif any(tokens[i:i + len(flag_tokens)] == flag_tokens
+                     for i in range(len(tokens) - len(flag_tokens) + 1)):
+                return True
+        return False
+
+    def evaluate(self, command: str, command_lower: str, output: str) -> Optional[str]:
+        if not self.matches(command, command_lower):
+            return f"Missing one of: {', '.join(self.labels)}"
+        return None
+
+
+class IncludePrsOrSeparateRule(Rule):
+    """Either `--include-prs` or separate issue and PR searches in the output"""
+
+    kind = "include_prs_or_separate"
+
+    def evaluate(self, command: str, command_lower: str, output: str) -> Optional[str]:
+        # Check full output: extract_command() only returns the first command
+        has_include_prs = '--include-prs' in command
+        has_separate_commands = 'gh search issues' in output and 'gh search prs' in output
+        if not (has_include_prs or has_separate_commands):
+            return "Missing flag: --include-prs"
+        return None
+
+
+class QuotedQueryRule(Rule):
+    """Query must contain a specific quoted term"""
+
+    kind = "quoted_query"
+
+    def __init__(self, criterion: str, term: str):
+        super().__init__(criterion)
+        self.term = term
+
+    def evaluate(self, command: str, command_lower: str, output: str) -> Optional[str]:
+        if self.term not in command_lower:
+            return f"Query not properly formatted: {self.criterion}"
+        return None
+
+
+class SeparatorRule(Rule):
+    """Command must use the `--` separator before the query"""
+
+    kind = "separator"
+
+    def evaluate(self, command: str, command_lower: str, output: str) -> Optional[str]:
+        if ' -- ' not in command:
+            return "Missing `--` flag before query"
+        return None
+
+
+class FormatRule(Rule):
+    """Command must follow the shape of an example format
+
+    Simplified check: only verifies a search command when the format is one.
+    """
+
+    kind = "format"
+
+    def __init__(self, criterion: str, expected: str):
+        super().__init__(criterion)
+        self.expected = expected
+        self.requires_search = 'search' in expected
+
+    def evaluate(self, command: str, command_lower: str, output: str) -> Optional[str]:
+        if self.requires_search and 'search' not in command_lower:
+            return "Does not match expected format"
+        return None
+
+
+class UnparsedRule(Rule):
+    """Criterion the compiler could not turn into a check"""
+
+    kind = "unparsed"
+
+    def evaluate(self, command: str, command_lower: str, output: str) -> Optional[str]:
+        return None
+
+
+def or_branches(criterion: str) -> List[str]:
+    """Split a criterion on 'or' outside backtick spans
+
+    Args:
+        criterion: Criterion text from the scenario file
+
+    Returns:
+        Branch texts (the whole criterion if it has no OR)
+    """
+    # Blank out backtick spans so an 'or' inside a flag value is not a split point
+    masked = BACKTICK_PATTERN.sub(lambda m: '`' + '_' * len(m.group(1)) + '`', criterion)
+    branches = []
+    start = 0
+    for separator in OR_PATTERN.finditer(masked):
+        branches.append(criterion[start:separator.start()])
+        start = separator.end()
+    branches.append(criterion[start:])
+    return branches
+
+
+def compile_criterion(criterion: str) -> List[Rule]:
+    """Compile one Expected Criteria line into rules
+
+    Args:
+        criterion: Criterion text from the scenario file
+
+    Returns:
+        Rules in evaluation order, or [UnparsedRule] if nothing applies
+    """
+    rules: List[Rule] = []
+    criterion_lower = criterion.lower()
+
+    # Required subcommand
+    if 'uses `gh search' in criterion_lower:
+        search_type = SUBCOMMAND_PATTERN.search(criterion_lower)
+        if search_type:
+            rules.append(SubcommandRule(criterion, search_type.group(1), search_type.group(0)))
+
+    # Flags - OR conditions list alternatives, otherwise the first flag is required
+    if ' or ' in criterion_lower or '(both are valid)' in criterion_lower:
+        if 'either uses' in criterion_lower and 'include-prs' in criterion_lower and 'separate commands' in criterion_lower:
+            rules.append(IncludePrsOrSeparateRule(criterion))
+        elif all(BACKTICK_PATTERN.search(branch) for branch in or_branches(criterion)):
+            rules.append(AlternativesRule(criterion, BACKTICK_PATTERN.findall(criterion)))
+        else:
+            # A branch without a flag or qualifier can't be checked, and failing on the
+            # others could reject a valid answer: report the criterion as unchecked
+            rules.append(UnparsedRule(criterion))
+    else:
+        flag_match = FLAG_PATTERN.search(criterion)
+        if flag_match:
+            rules.append(FlagRule(criterion, flag_match.group(1)))
+
+    # Quoted query terms
+    if 'quoted' in criterion_lower and 'must be quoted' in criterion_lower:
+        term_match = QUOTED_QUERY_PATTERN.search(criterion_lower)
+        if term_match:
+            rules.append(QuotedQueryRule(criterion, term_match.group(1)))
+
+    # `--` separator
+    if criterion.strip().startswith('Uses `--` flag'):
+        rules.append(SeparatorRule(criterion))
+
+    # Example format
+    if 'format:' in criterion_lower:
+        format_match = FORMAT_PATTERN.search(criterion)
+        if format_match:
+            rules.append(FormatRule(criterion, format_match.group(1).lower()))
+
+    return rules or [UnparsedRule(criterion)]
+
+
+def compile_criteria(criteria: List[str]) -> List[Rule]:
+    """Compile all criteria of a test into a flat rule program
+
+    Args:
+        criteria: Expected Criteria lines
+
+    Returns:
+        Rules in criterion order
+    """
+    return [rule for criterion in criteria for rule in compile_criterion(criterion)]
+
+
+def evaluate_rules(rules: List[Rule], command: str, output: str) -> List[str]:
+    """Run a rule program against a generated command
+
+    Args:
+        rules: Compiled rules
+        command: Extracted command string
+        output: Claude's full output text
+
+    Returns:
+        Failure messages in rule order (empty if all rules pass)
+    """
+    command_lower = command.lower()
+    failures = []
+    for rule in rules:
+        failure = rule.evaluate(command, command_lower, output)
+        if failure:
+            failures.append(failure)
+    return failures
+
+
+def unparsed_criteria(rules: List[Rule]) -> List[str]:
+    """List criteria that compiled to no checks
+
+    Args:
+        rules: Compiled rules
+
+    Returns:
+        Criterion texts that are not validated
+    """
+    return [rule.criterion for rule in rules if isinstance(rule, UnparsedRule)]
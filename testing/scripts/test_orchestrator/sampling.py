@@ -0,0 +1,220 @@
+"""Flakiness mode (--samples): run each test several times and aggregate
+
+Samples of a test run in waves. Every sample of a wave is submitted to the
+worker pool at once; when the wave finishes, the sequential test in
+flakiness.py either reaches a verdict or sizes the next wave, up to the
+--samples limit. A test with a consistent history starts with a single
+sample; only a sample that disagrees with the history drops it and
+escalates to full sampling. Each sample gets its own report and output under
+<group>/samples/<sample>/, and the test's report in the group directory
+describes all of them.
+"""
+
+import copy
+from collections import deque
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import List, Dict, Tuple, Optional, Callable
+
+from .config import SAMPLES_DIRNAME, print_lock
+from .models import TestResult
+from .execution import request_shutdown
+from .cache import test_fingerprint
+from .flakiness import SequentialTest, VERDICT_UNCERTAIN, describe_samples, history_prior
+from .reporting import write_test_report
+from .scheduling import test_key
+from .usage import UsageBudget, BudgetExhausted, add_usage
+
+
+def sample_dir(group_dir: Path, sample: int) -> Path:
+    """Directory holding the reports and outputs of one sample of a group's tests"""
+    path = group_dir / SAMPLES_DIRNAME / str(sample)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def aggregate_samples(samples: List[Tuple[int, TestResult]], verdict: str, group_dir: Path,
+                      prior_runs: int = 0) -> TestResult:
+    """Combine a test's samples into its result and write its report
+
+    The status is the majority outcome of the usable samples (a tie counts
+    as a failure), and output, command and failure reason come from the
+    first sample with that outcome. Duration, usage, attempts and phases
+    are totals over all samples. A test whose samples all hit
+    infrastructure errors stays INFRA_ERROR.
+
+    Args:
+        samples: (sample number, result) pairs, in sample order
+        verdict: Flakiness verdict (see flakiness.py)
+        group_dir: Directory for group reports
+        prior_runs: Earlier runs counted towards the verdict
+
+    Returns:
+        The aggregated TestResult
+    """
+    results = [result for _, result in samples]
+    passes = sum(1 for r in results if r.status in ["PASS", "SKIPPED"])
+    fails = sum(1 for r in results if r.status == "FAIL")
+    if passes + fails == 0:
+        status = "INFRA_ERROR"
+    else:
+        status = "PASS" if passes > fails else "FAIL"
+    representative = next((r for r in results if r.status == status or (status == "PASS" and r.status == "SKIPPED")),
+                          results[-1])
+
+    aggregated = copy.copy(representative)
+    aggregated.verdict = verdict
+    aggregated.prior_runs = prior_runs
+    aggregated.samples = [
+        {
+            'sample': number,
+            'status': result.status,
+            'duration_seconds': result.duration_seconds,
+            'command_generated': result.command_generated,
+            'failure_reason': result.failure_reason,
+            'report': f"{SAMPLES_DIRNAME}/{number}/{result.test_num}.md",
+        }
+        for number, result in samples
+    ]
+    aggregated.start_time = min(r.start_time for r in results if r.start_time) if any(r.start_time for r in results) else None
+    aggregated.end_time = max(r.end_time for r in results if r.end_time) if any(r.end_time for r in results) else None
+    aggregated.duration_seconds = sum(r.duration_seconds for r in results)
+    aggregated.usage = {}
+    aggregated.attempts = []
+    aggregated.phase_seconds = {}
+    for result in results:
+        add_usage(aggregated.usage, result.usage)
+        aggregated.attempts.extend(result.attempts)
+        for name, seconds in result.phase_seconds.items():
+            aggregated.phase_seconds[name] = aggregated.phase_seconds.get(name, 0.0) + seconds
+
+    write_test_report(group_dir, aggregated)
+    with print_lock:
+        print(f"  [{aggregated.group}] Test {aggregated.test_num}: {aggregated.test_name[:50]}... "
+              f"{aggregated.status}, {verdict} ({len(samples)} samples: {describe_samples(aggregated)})")
+    return aggregated
+
+
+class _SampledTest:
+    """Sampling state of one test"""
+
+    def __init__(self, group_name: str, group_dir: Path, test: Dict, prior: Tuple[int, int] = (0, 0)):
+        self.group_name = group_name
+        self.group_dir = group_dir
+        self.test = test
+        self.prior = prior  # (passes, fails) from history, dropped once a sample disagrees
+        self.samples: List[Tuple[int, TestResult]] = []
+        self.submitted = 0
+        self.outstanding = 0  # Samples of the current wave queued or running
+        self.error: Optional[BaseException] = None
+
+
+def run_sampled_tests(jobs: List[Tuple[str, Path, Dict]], workers: int,
+                      on_result: Callable[[str, Dict, Optional[TestResult], Optional[BaseException]], None],
+                      run_sample: Callable[[str, Path, Dict], TestResult],
+                      max_samples: int,
+                      budget: Optional[UsageBudget] = None,
+                      history: Optional[Dict[str, List[Tuple[str, str]]]] = None) -> None:
+    """Run every test up to max_samples times, stopping each one at its verdict
+
+    Tests start in the given order (longest-first from the scheduler), but
+    a started test's next wave goes ahead of tests not yet started, so
+    groups finish and get reported as early as they would without sampling.
+    At most `workers` samples run at once.
+
+    Args:
+        jobs: List of (group_name, group_dir, test) tuples
+        workers: Maximum number of concurrent samples
+        on_result: Called as on_result(group_name, test, result, error) as each test is decided
+        run_sample: Runs one sample, as run_sample(group_name, sample_dir, test)
+        max_samples: Samples per test at most (--samples)
+        budget: Spending limit; no sample starts once it is spent, and started
+            tests are aggregated from the samples they have
+        history: Earlier (status, fingerprint) results by test key, newest
+            first, used as a prior (see flakiness.history_prior)
+    """
+    sprt = SequentialTest()
+    pending_jobs = deque(jobs)
+    ready: deque = deque()  # Tests with samples waiting for a worker, one entry per sample
+    futures = {}
+
+    def finish(state: _SampledTest) -> None:
+        # A budget stop keeps the samples taken so far; any other error fails the test
+        if not state.samples or (state.error and not isinstance(state.error, BudgetExhausted)):
+            on_result(state.group_name, state.test, None, state.error)
+            return
+        state.samples.sort(key=lambda pair: pair[0])
+        on_result(state.group_name, state.test,
+                  aggregate_samples(state.samples, verdict(state) or VERDICT_UNCERTAIN, state.group_dir,
+                                    sum(state.prior)), None)
+
+    def counts(state: _SampledTest) -> Tuple[int, int]:
+        passes = sum(1 for _, r in state.samples if r.status in ["PASS", "SKIPPED"])
+        return passes, sum(1 for _, r in state.samples if r.status == "FAIL")
+
+    def evidence(state: _SampledTest) -> Tuple[int, int]:
+        # The test's own samples plus its history prior
+        passes, fails = counts(state)
+        return passes + state.prior[0], fails + state.prior[1]
+
+    def verdict(state: _SampledTest) -> str:
+        # History alone never decides: at least one sample of this run must agree
+        passes, fails = counts(state)
+        return sprt.verdict(*evidence(state)) if passes + fails else ""
+
+    def queue(state: _SampledTest, wave: int, front: bool = False) -> None:
+        state.outstanding += wave
+        if front:
+            ready.extendleft([state] * wave)
+        else:
+            ready.extend([state] * wave)
+
+    def wave_done(state: _SampledTest) -> None:
+        passes, fails = counts(state)
+        if (state.prior[0] and fails) or (state.prior[1] and passes):
+            state.prior = (0, 0)  # Disagrees with its history: sample from scratch
+        remaining = max_samples - state.submitted
+        if (state.error or remaining == 0 or verdict(state)
+                or (budget and budget.exceeded)):
+            finish(state)
+            return
+        # Finish started tests first
+        queue(state, sprt.samples_needed(*evidence(state), remaining), front=True)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        try:
+            while True:
+                while len(futures) < workers:
+                    if not ready and pending_jobs and not (budget and budget.exceeded):
+                        group_name, group_dir, test = pending_jobs.popleft()
+                        prior = history_prior((history or {}).get(test_key(group_name, test['test_num']), []),
+                                              test_fingerprint(test, group_name))
+                        state = _SampledTest(group_name, group_dir, test, prior)
+                        queue(state, sprt.samples_needed(*prior, max_samples))
+                    if not ready:
+                        break
+                    state = ready.popleft()
+                    state.submitted += 1
+                    number = state.submitted
+                    future = executor.submit(run_sample, state.group_name, sample_dir(state.group_dir, number), state.test)
+                    futures[future] = (state, number)
+                if not futures:
+                    break
+
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    state, number = futures.pop(future)
+                    state.outstanding -= 1
+                    try:
+                        state.samples.append((number, future.result()))
+                    except BudgetExhausted as e:
+                        state.error = state.error or e
+                    except Exception as e:
+                        if not state.error or isinstance(state.error, BudgetExhausted):
+                            state.error = e
+                    if state.outstanding == 0:  # Wave complete
+                        wave_done(state)
+        except KeyboardInterrupt:
+            executor.shutdown(wait=False, cancel_futures=True)
+            request_shutdown()
+            raise
@@ -1,51 +1,149 @@
 """Scenario file parsing for test definitions"""
 
 import re
+import hashlib
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Tuple, Optional
+
+from .rules import compile_criteria
+from .scheduling import test_key
+
+TEST_HEADER_PATTERN = re.compile(r'^## Test (\d+):(.*)$')
+
+# Single-line fields; the first occurrence in a test wins
+FIELD_MARKERS = {
+    'description': '**Description:**',
+    'user_request': '**User Request:**',
+    'platform': '**Platform:**',
+}
+CRITERIA_MARKER = '**Expected Criteria:**'
+
+
+def _parse_request(value: str) -> Optional[str]:
+    """Extract the quoted request from a User Request value (up to the first closing quote)"""
+    if not value.startswith('"'):
+        return None
+    end = value.find('"', 2)
+    return value[1:end] if end != -1 else None
+
+
+def _finish_test(current: Dict, lines: List[str], group_name: str,
+                 seen_nums: Dict[int, int], warnings: List[str]) -> Dict:
+    """Turn an accumulated test block into a test definition dictionary"""
+    test_num = current['test_num']
+    label = f"Test {test_num}"
+
+    if test_num in seen_nums:
+        warnings.append(f"{label}: duplicate test number (also on line {seen_nums[test_num]})")
+    seen_nums[test_num] = current['line']
+    for field, count in sorted(current['field_counts'].items()):
+        if count > 1:
+            warnings.append(f"{label}: {count} {FIELD_MARKERS.get(field, CRITERIA_MARKER)} lines (first one used)")
+    if not current['user_request']:
+        warnings.append(f"{label}: missing or unquoted {FIELD_MARKERS['user_request']}")
+    if not current['criteria']:
+        warnings.append(f"{label}: no {CRITERIA_MARKER} list")
+
+    return {
+        'id': test_key(group_name, test_num),
+        'test_num': test_num,
+        'test_name': current['test_name'],
+        'description': current['description'],
+        'user_request': current['user_request'],
+        'criteria': current['criteria'],
+        'platform': current['platform'],
+        'content_hash': hashlib.sha256("\n".join(lines).strip().encode()).hexdigest(),
+    }
+
+
+def parse_scenario_text(content: str, group_name: str) -> Tuple[List[Dict], List[str]]:
+    """Parse scenario markdown in a single pass over its lines
+
+    Args:
+        content: Scenario file content
+        group_name: Scenario group name used for test IDs
+
+    Returns:
+        Tuple of (test dictionaries without compiled rules, lint warnings)
+    """
+    tests: List[Dict] = []
+    warnings: List[str] = []
+    seen_nums: Dict[int, int] = {}
+    current: Optional[Dict] = None
+    block_lines: List[str] = []
+    # Criteria list state: 'header' right after the marker, 'items' inside the list
+    criteria_state = None
+
+    for line_number, line in enumerate(content.split('\n'), start=1):
+        header = TEST_HEADER_PATTERN.match(line)
+        if header:
+            if current:
+                tests.append(_finish_test(current, block_lines, group_name, seen_nums, warnings))
+            current = {
+                'test_num': int(header.group(1)),
+                'test_name': header.group(2).strip(),
+                'line': line_number,
+                'description': '',
+                'user_request': '',
+                'platform': 'All',
+                'criteria': [],
+                'field_counts': {},
+            }
+            block_lines = [line]
+            criteria_state = None
+            continue
+        if current is None:
+            continue
+        block_lines.append(line)
+
+        if not current['test_name'] and line.strip():
+            current['test_name'] = line.strip()
+
+        # Criteria list: blank lines may follow the marker, then one '- ' item per line
+        if criteria_state == 'header' and not line.strip():
+            continue
+        if criteria_state and line.startswith('- ') and line[2:].strip():
+            if current['field_counts']['criteria'] == 1:
+                current['criteria'].append(line.strip()[2:])
+            criteria_state = 'items'
+            continue
+        criteria_state = None
+
+        if line.startswith(CRITERIA_MARKER) and not line[len(CRITERIA_MARKER):].strip():
+            current['field_counts']['criteria'] = current['field_counts'].get('criteria', 0) + 1
+            criteria_state = 'header'
+            continue
+
+        for field, marker in FIELD_MARKERS.items():
+            if line.startswith(marker):
+                value = line[len(marker):].strip()
+                if field == 'user_request':
+                    value = _parse_request(value)
+                if not value:
+                    continue
+                current['field_counts'][field] = current['field_counts'].get(field, 0) + 1
+                if current['field_counts'][field] == 1:
+                    current[field] = value
+                break
+
+    if current:
+        tests.append(_finish_test(current, block_lines, group_name, seen_nums, warnings))
+
+    return tests, warnings
 
 
 def parse_scenario_file(filepath: Path) -> List[Dict]:
     """Parse a scenario file and extract test definitions
 
+    Prefer ScenarioManifest (manifest.py), which caches parsed files.
+
     Args:
         filepath: Path to the scenario markdown file
 
     Returns:
-        List of test dictionaries with test metadata and criteria
+        List of test dictionaries with test metadata, criteria and compiled rules
     """
-    tests = []
-    content = filepath.read_text()
-
-    # Split by test headers
-    test_blocks = re.split(r'^## Test (\d+):', content, flags=re.MULTILINE)[1:]
-
-    for i in range(0, len(test_blocks), 2):
-        test_num = int(test_blocks[i].strip())
-        test_content = test_blocks[i + 1]
-
-        # Extract test name (first line after test number)
-        lines = test_content.strip().split('\n')
-        test_name = lines[0].strip()
-
-        # Extract fields
-        description_match = re.search(r'\*\*Description:\*\*\s*(.+)', test_content)
-        request_match = re.search(r'\*\*User Request:\*\*\s*"(.+?)"', test_content)
-        platform_match = re.search(r'\*\*Platform:\*\*\s*(.+)', test_content)
-
-        # Extract criteria
-        criteria = []
-        criteria_section = re.search(r'\*\*Expected Criteria:\*\*\s*\n((?:- .+\n?)+)', test_content)
-        if criteria_section:
-            criteria = [line.strip()[2:] for line in criteria_section.group(1).strip().split('\n') if line.strip().startswith('-')]
-
-        tests.append({
-            'test_num': test_num,
-            'test_name': test_name,
-            'description': description_match.group(1) if description_match else '',
-            'user_request': request_match.group(1) if request_match else '',
-            'criteria': criteria,
-            'platform': platform_match.group(1).strip() if platform_match else 'All'
-        })
-
+    tests, _ = parse_scenario_text(filepath.read_text(), filepath.stem)
+    for test in tests:
+        test['rules'] = compile_criteria(test['criteria'])
     return tests
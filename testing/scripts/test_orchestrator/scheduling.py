@@ -0,0 +1,89 @@
+"""Suite-wide test scheduling using historical test durations"""
+
+import re
+from pathlib import Path
+from statistics import mean
+from typing import List, Dict, Tuple
+
+from .journal import load_results_journal
+
+# Number of most recent report directories to average durations over
+HISTORY_WINDOW = 3
+
+DURATION_PATTERN = re.compile(r'^\*\*Duration:\*\*\s*([\d.]+)s', re.MULTILINE)
+
+
+def test_key(group_name: str, test_num: int) -> str:
+    """Build the key used to look up a test's history
+
+    Args:
+        group_name: Scenario group name
+        test_num: Test number within the group
+
+    Returns:
+        Key of the form 'group:test_num'
+    """
+    return f"{group_name}:{test_num}"
+
+
+def load_historical_durations(report_dirs: List[Path]) -> Dict[str, float]:
+    """Average per-test durations from recent individual test reports
+
+    Cached and carried-over results are ignored since their durations don't
+    reflect a real claude invocation. Runs with a results journal are read
+    from it; older runs fall back to parsing the markdown reports.
+
+    Args:
+        report_dirs: Report directories sorted chronologically
+
+    Returns:
+        Dictionary mapping test keys to average duration in seconds
+    """
+    samples: Dict[str, List[float]] = {}
+
+    for report_dir in report_dirs[-HISTORY_WINDOW:]:
+        journaled = load_results_journal(report_dir)
+        if journaled is not None:
+            for results in journaled.values():
+                for result in results:
+                    if not result.cached and not result.carried_from:
+                        samples.setdefault(test_key(result.group, result.test_num), []).append(result.duration_seconds)
+            continue
+
+        for test_report in report_dir.glob("*/*.md"):
+            if not test_report.stem.isdigit():
+                continue
+            try:
+                content = test_report.read_text()
+            except OSError:
+                continue
+            if '**Cached:**' in content or '**Carried Over:**' in content:
+                continue
+            match = DURATION_PATTERN.search(content)
+            if match:
+                key = test_key(test_report.parent.name, int(test_report.stem))
+                samples.setdefault(key, []).append(float(match.group(1)))
+
+    return {key: mean(values) for key, values in samples.items()}
+
+
+def order_longest_first(jobs: List[Tuple[str, Path, Dict]], durations: Dict[str, float]) -> List[Tuple[str, Path, Dict]]:
+    """Order jobs longest-expected-first (LPT) to minimize suite makespan
+
+    Tests without history are assumed to take the average known duration.
+    Ties keep scenario order so runs without history behave as before.
+
+    Args:
+        jobs: List of (group_name, group_dir, test) tuples
+        durations: Historical durations from load_historical_durations()
+
+    Returns:
+        Jobs sorted by expected duration, longest first
+    """
+    default = mean(durations.values()) if durations else 0.0
+
+    def expected(job: Tuple[str, Path, Dict]) -> float:
+        group_name, _, test = job
+        return durations.get(test_key(group_name, test['test_num']), default)
+
+    return sorted(jobs, key=expected, reverse=True)
@@ -0,0 +1,91 @@
+"""Change-aware test selection for incremental test runs"""
+
+import subprocess
+from typing import List, Set, Optional
+
+from .config import REPO_ROOT, SHARED_SKILLS
+
+
+# Paths whose changes can affect every group (prompt template, validator, hooks)
+GLOBAL_PATH_PREFIXES = [
+    "testing/scripts/",
+    "hooks/",
+]
+
+
+def get_changed_files(base_commit: str) -> Optional[List[str]]:
+    """List files changed in the working tree since a commit
+
+    Includes committed, staged, unstaged and untracked changes so edits the
+    developer agent left uncommitted are still picked up.
+
+    Args:
+        base_commit: Commit to diff against
+
+    Returns:
+        List of repo-relative paths, or None if git could not answer
+    """
+    if not base_commit or base_commit == 'unknown':
+        return None
+
+    try:
+        diff = subprocess.run(
+            ['git', 'diff', '--name-only', base_commit],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            timeout=10
+        )
+        untracked = subprocess.run(
+            ['git', 'ls-files', '--others', '--exclude-standard'],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            timeout=10
+        )
+    except Exception:
+        return None
+
+    if diff.returncode != 0 or untracked.returncode != 0:
+        return None
+
+    files = diff.stdout.splitlines() + untracked.stdout.splitlines()
+    return sorted(set(f.strip() for f in files if f.strip()))
+
+
+def select_groups(changed_files: List[str], group_names: List[str]) -> Set[str]:
+    """Map changed files to the scenario groups that must be re-run
+
+    - skills/<name>/... re-runs <name>-tests (shared skills re-run everything)
+    - testing/scenarios/<group>.md re-runs that group
+    - test scripts and hooks re-run everything
+    - anything else (reports, agent definitions, docs) re-runs nothing
+
+    Args:
+        changed_files: Repo-relative paths from get_changed_files()
+        group_names: All scenario group names in the suite
+
+    Returns:
+        Set of group names to re-run
+    """
+    all_groups = set(group_names)
+    selected = set()
+
+    for path in changed_files:
+        if any(path.startswith(prefix) for prefix in GLOBAL_PATH_PREFIXES):
+            return all_groups
+
+        parts = path.split('/')
+        if parts[0] == 'skills' and len(parts) >= 3:
+            skill_name = parts[1]
+            if skill_name in SHARED_SKILLS:
+                return all_groups
+            group = f"{skill_name}-tests"
+            if group in all_groups:
+                selected.add(group)
+        elif path.startswith('testing/scenarios/') and path.endswith('.md'):
+            group = parts[-1][:-len('.md')]
+            if group in all_groups:
+                selected.add(group)
+
+    return selected
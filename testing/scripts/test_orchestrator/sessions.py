@@ -0,0 +1,310 @@
+"""Pre-started claude sessions (--engine sessions)
+
+Instead of starting claude when a test begins, each worker thread takes a
+headless session (`claude -p --input-format stream-json --output-format
+stream-json`) that was started in the background while earlier tests ran,
+so process start-up, plugin and hook loading overlap with other work
+instead of adding to every test's latency.
+
+By default a session answers exactly one request and is then closed, so
+every test gets a fresh conversation, just like the threads engine:
+
+- spare sessions are started ahead of time (one per worker), and a
+  replacement is started as soon as one is taken;
+- only the events between sending a request and its result event are taken
+  as that test's answer;
+- a spare with output pending (or a dead process) fails its health check
+  and is discarded instead of used.
+
+`max_requests` > 1 is an experimental mode that reuses a session for later
+requests. The CLI has no way to clear a conversation, so those requests see
+the earlier requests and answers: their prompts start with
+SESSION_PROMPT_PREAMBLE and their results are marked as not clean runs.
+"""
+
+import os
+import json
+import time
+import selectors
+import tempfile
+import threading
+import subprocess
+from typing import List, Tuple
+
+from .config import TEST_PROMPT_TEMPLATE, TEST_TIMEOUT_SECONDS, SESSION_PROMPT_PREAMBLE, SESSION_MAX_REQUESTS, claude_bin
+from .execution import (
+    StreamJsonDecoder, trace_stream_phases, with_exit_status, shutdown_event,
+    _start_process, _finish_process, _terminate
+)
+from .outputs import read_capped
+from .usage import report_usage
+from .tracing import tracer
+
+
+def build_session_command() -> List[str]:
+    """Build the command line for a persistent claude session
+
+    Same tools and permissions as build_test_command(), with prompts read
+    from stdin as stream-json user messages.
+
+    Returns:
+        Argument list for the claude process
+    """
+    return [
+        claude_bin(),
+        '-p',
+        '--input-format', 'stream-json',
+        '--output-format', 'stream-json', '--verbose',
+        '--allowedTools', 'Read,Skill',
+        '--permission-mode', 'bypassPermissions'
+    ]
+
+
+def build_session_prompt(user_request: str, reused: bool = False) -> str:
+    """Build the prompt sent to a session for one test
+
+    Args:
+        user_request: The user's test request string
+        reused: The session already answered earlier requests
+
+    Returns:
+        The test prompt, preceded by SESSION_PROMPT_PREAMBLE for reused sessions
+    """
+    prompt = TEST_PROMPT_TEMPLATE.format(user_request=user_request)
+    return SESSION_PROMPT_PREAMBLE + prompt if reused else prompt
+
+
+class ClaudeSession:
+    """One long-lived claude process answering requests sequentially"""
+
+    def __init__(self):
+        self.requests = 0  # Requests sent so far
+        self.failed = False
+        self._buffer = b""  # Partial stdout line
+        self._stale = False  # Output arrived after a result event
+        self._stderr_file = tempfile.TemporaryFile()
+        try:
+            with tracer.span("spawn"):
+                self.process = _start_process(build_session_command(), stdin=subprocess.PIPE, stderr=self._stderr_file)
+        except Exception:
+            self._stderr_file.close()
+            raise
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self.process.stdout, selectors.EVENT_READ)
+
+    def healthy(self) -> bool:
+        """Check the process is alive and has no output nobody asked for"""
+        if self.failed or self._stale or self._buffer or self.process.poll() is not None:
+            return False
+        return not self._selector.select(timeout=0)
+
+    def send(self, prompt: str, timeout: float = TEST_TIMEOUT_SECONDS) -> Tuple[str, str]:
+        """Send one request and wait for its result event
+
+        Args:
+            prompt: Complete prompt for the request
+            timeout: Seconds to wait for the result
+
+        Returns:
+            Tuple of (response, stderr), with an ERROR: message in stderr
+            on failure (the session is then marked failed)
+        """
+        self.requests += 1
+        message = {'type': 'user', 'message': {'role': 'user', 'content': prompt}}
+        decoder = StreamJsonDecoder()
+        sent_at = tracer.now()
+        error = ""
+        try:
+            self.process.stdin.write((json.dumps(message) + "\n").encode())
+            self.process.stdin.flush()
+            deadline = time.monotonic() + timeout
+            while decoder.result is None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    error = f"ERROR: Test timed out after {timeout:.0f} seconds"
+                    break
+                if not self._selector.select(timeout=remaining):
+                    continue
+                data = os.read(self.process.stdout.fileno(), 65536)
+                if not data:
+                    error = self._exit_error()
+                    break
+                self._read_lines(data, decoder)
+        except OSError as e:
+            # Broken pipe: the process died between requests
+            error = self._exit_error() if self.process.poll() is not None else f"ERROR: {str(e)}"
+        finally:
+            trace_stream_phases(decoder, sent_at, tracer.now())
+            report_usage(decoder.usage)
+
+        if not error and decoder.is_error:
+            error = f"ERROR: claude reported an error: {decoder.result or 'no details'}"
+        if error:
+            self.failed = True
+            return decoder.text, error
+        return decoder.result + "\n", ""
+
+    def _read_lines(self, data: bytes, decoder: StreamJsonDecoder) -> None:
+        """Feed complete stdout lines to the decoder, up to the result event"""
+        self._buffer += data
+        *lines, self._buffer = self._buffer.split(b"\n")
+        for index, line in enumerate(lines):
+            decoder.feed(line.decode(errors='replace') + "\n")
+            if decoder.result is not None:
+                # Anything after the result belongs to no request
+                self._stale = any(rest.strip() for rest in lines[index + 1:])
+                return
+
+    def _exit_error(self) -> str:
+        """Describe a session whose process has exited"""
+        try:
+            returncode = self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            return "ERROR: Session closed its output but did not exit"
+        stderr = with_exit_status(read_capped(self._stderr_file), returncode)
+        return stderr if returncode != 0 else f"ERROR: Session ended before answering\n{stderr}"
+
+    def close(self) -> None:
+        """Stop the session: end of input for healthy sessions, a signal otherwise"""
+        try:
+            if self.failed:
+                _terminate(self.process)
+            else:
+                try:
+                    self.process.stdin.close()
+                    self.process.wait(timeout=5)
+                except (OSError, subprocess.TimeoutExpired):
+                    _terminate(self.process)
+        finally:
+            _finish_process(self.process)
+            self._selector.close()
+            self.process.stdout.close()
+            self._stderr_file.close()
+
+
+class SessionPool:
+    """Fresh claude sessions for the worker threads, started ahead of use
+
+    Keeps up to `spares` idle sessions ready; each one taken is replaced in
+    the background. Reused sessions (max_requests > 1) return to the pool
+    after a request, so the pool never grows beyond spares plus workers.
+
+    Usage:
+        pool = SessionPool(spares=8)
+        stdout, stderr, request_number = pool.run(user_request)
+        ...
+        pool.close()
+    """
+
+    def __init__(self, max_requests: int = SESSION_MAX_REQUESTS, spares: int = 0):
+        self.max_requests = max_requests
+        self.spares = spares
+        self.started = 0  # Sessions started
+        self.requests = 0  # Requests sent
+        self.discarded = 0  # Sessions dropped after a failure or failed health check
+        self._idle: List[ClaudeSession] = []
+        self._spawning = 0  # Spare sessions being started in the background
+        self._spawners: List[threading.Thread] = []
+        self._closed = False
+        self._lock = threading.Lock()
+        self._refill()
+
+    def _refill(self) -> None:
+        """Start background sessions until `spares` are idle or on their way"""
+        with self._lock:
+            if self._closed or shutdown_event.is_set():
+                return
+            needed = self.spares - len(self._idle) - self._spawning
+            self._spawning += max(needed, 0)
+            for _ in range(needed):
+                spawner = threading.Thread(target=self._spawn_spare, daemon=True)
+                self._spawners.append(spawner)
+                spawner.start()
+
+    def _spawn_spare(self) -> None:
+        """Start one spare session (runs in a background thread)"""
+        try:
+            session = ClaudeSession()
+        except Exception:
+            # The worker that needs it will start its own session and report the error
+            with self._lock:
+                self._spawning -= 1
+            return
+        with self._lock:
+            self._spawning -= 1
+            self.started += 1
+            closed = self._closed
+            if not closed:
+                self._idle.append(session)
+        if closed:
+            session.close()
+
+    def _acquire(self) -> ClaudeSession:
+        """Take a healthy idle session, or start one if none is ready"""
+        while True:
+            with self._lock:
+                session = self._idle.pop(0) if self._idle else None
+            if session is None:
+                break
+            if session.healthy():
+                self._refill()
+                return session
+            session.close()
+            with self._lock:
+                self.discarded += 1
+
+        session = ClaudeSession()
+        with self._lock:
+            self.started += 1
+        self._refill()
+        return session
+
+    def _release(self, session: ClaudeSession) -> None:
+        """Return a reused session to the pool, or close it if it is spent or failed"""
+        if session.failed or session.requests >= self.max_requests or shutdown_event.is_set():
+            session.close()
+            if session.failed:
+                with self._lock:
+                    self.discarded += 1
+            return
+        with self._lock:
+            self._idle.append(session)
+
+    def run(self, user_request: str) -> Tuple[str, str, int]:
+        """Answer one test request in a pooled session
+
+        Args:
+            user_request: The user's test request string
+
+        Returns:
+            Tuple of (stdout, stderr, request number within its session;
+            above 1 means the answer is not from a clean run)
+        """
+        try:
+            session = self._acquire()
+        except Exception as e:
+            return "", f"ERROR: {str(e)}", 0
+        stdout, stderr = session.send(build_session_prompt(user_request, reused=session.requests > 0))
+        with self._lock:
+            self.requests += 1
+        request_number = session.requests
+        self._release(session)
+        return stdout, stderr, request_number
+
+    def close(self) -> None:
+        """Close every idle session, including spares still starting up"""
+        with self._lock:
+            self._closed = True
+            spawners = list(self._spawners)
+        for spawner in spawners:
+            spawner.join()
+        with self._lock:
+            sessions, self._idle = self._idle, []
+        for session in sessions:
+            session.close()
+
+    def summary(self) -> str:
+        """One-line usage summary for the console"""
+        per_session = self.requests / self.started if self.started else 0.0
+        return (f"Sessions: {self.started} started for {self.requests} requests "
+                f"({per_session:.1f} per session), {self.discarded} discarded")
@@ -0,0 +1,230 @@
+"""Deterministic suite sharding across machines (--shard) and shard merging
+
+Each runner executes one shard of the suite into a shard-local report
+directory (`<date>_<n>-shard-<i>-of-<N>`), which records the partition in
+SHARD.json. `--merge-shards` then combines the shard directories into a
+regular report directory whose group and master reports are rendered from
+the merged results journal, exactly as for a single-host run.
+"""
+
+import json
+import shutil
+import hashlib
+from pathlib import Path
+from statistics import mean
+from typing import List, Dict, Tuple, Optional
+
+from .models import TestResult
+from .scheduling import test_key
+from .journal import ResultsJournal, load_results_journal, RESULTS_JOURNAL_FILENAME
+from .reporting import write_group_report, write_master_report
+from .tracing import TRACE_FILENAME
+
+# File written next to REPORT.md in a shard's report directory
+SHARD_FILENAME = "SHARD.json"
+
+SHARD_STRATEGIES = ['hash', 'duration']
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """Parse a --shard value
+
+    Args:
+        value: "i/N" with 1 <= i <= N
+
+    Returns:
+        (index, count) tuple
+
+    Raises:
+        ValueError: If the value is malformed or out of range
+    """
+    index, _, count = value.partition('/')
+    if not index.isdigit() or not count.isdigit() or not 1 <= int(index) <= int(count):
+        raise ValueError(f"expected i/N with 1 <= i <= N, got '{value}'")
+    return int(index), int(count)
+
+
+def shard_suffix(index: int, count: int) -> str:
+    """Report directory name suffix of a shard run"""
+    return f"-shard-{index}-of-{count}"
+
+
+def assign_shards(keys: List[str], count: int, strategy: str = 'hash',
+                  durations: Optional[Dict[str, float]] = None) -> Dict[str, int]:
+    """Partition test keys into shards
+
+    'hash' puts each test in the shard given by a SHA-256 hash of its key,
+    so a test stays in its shard as others are added or removed. 'duration'
+    bin-packs tests longest-expected-first into the least loaded shard
+    (tests without history count as the average duration), which balances
+    wall time but only agrees across runners that share the same history.
+
+    Args:
+        keys: Keys of every test in the suite (see scheduling.test_key)
+        count: Number of shards
+        strategy: 'hash' or 'duration'
+        durations: Historical durations by test key (duration strategy)
+
+    Returns:
+        Dictionary mapping each key to its shard, 1 to count
+    """
+    if strategy == 'hash':
+        return {key: int(hashlib.sha256(key.encode()).hexdigest(), 16) % count + 1 for key in keys}
+
+    durations = durations or {}
+    default = mean(durations.values()) if durations else 1.0
+    loads = [0.0] * count
+    assignment = {}
+    for key in sorted(keys, key=lambda key: (-durations.get(key, default), key)):
+        shard = min(range(count), key=lambda i: (loads[i], i))
+        loads[shard] += durations.get(key, default)
+        assignment[key] = shard + 1
+    return assignment
+
+
+def partition_id(assignment: Dict[str, int]) -> str:
+    """Short fingerprint of a whole partition, equal on runners that agree on it"""
+    text = json.dumps(sorted(assignment.items()))
+    return hashlib.sha256(text.encode()).hexdigest()[:12]
+
+
+def write_shard_manifest(report_dir: Path, index: int, count: int, strategy: str,
+                         assignment: Dict[str, int], commit_id: str) -> None:
+    """Record which part of the suite a shard run executes (SHARD.json)
+
+    Args:
+        report_dir: Shard report directory
+        index: This shard, 1 to count
+        count: Number of shards
+        strategy: Partition strategy used
+        assignment: Partition of the whole suite from assign_shards()
+        commit_id: Git commit the shard ran at
+    """
+    manifest = {
+        'index': index,
+        'count': count,
+        'strategy': strategy,
+        'partition': partition_id(assignment),
+        'commit': commit_id,
+        'suite_size': len(assignment),
+        'tests': sorted(key for key, shard in assignment.items() if shard == index),
+    }
+    (report_dir / SHARD_FILENAME).write_text(json.dumps(manifest, indent=2) + "\n")
+
+
+def read_shard_manifest(report_dir: Path) -> Optional[Dict]:
+    """SHARD.json of a shard report directory, or None for other runs"""
+    try:
+        return json.loads((report_dir / SHARD_FILENAME).read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def _relocate(path: str, group_name: str, report_dir: Path) -> str:
+    """Point a stored output path from a shard directory into the merged one"""
+    if not path:
+        return path
+    parts = Path(path).parts
+    if group_name not in parts:
+        return path
+    start = len(parts) - 1 - parts[::-1].index(group_name)
+    return str(report_dir.joinpath(*parts[start:]))
+
+
+def _merge_traces(shard_dirs: List[Tuple[Dict, Path]], report_dir: Path) -> None:
+    """Combine the shard traces, one trace process per shard on a shared time axis"""
+    events = []
+    for manifest, shard_dir in shard_dirs:
+        try:
+            trace = json.loads((shard_dir / TRACE_FILENAME).read_text())
+        except (OSError, ValueError):
+            continue
+        for event in trace.get('traceEvents', []):
+            event['pid'] = manifest['index']
+            if event.get('name') == 'process_name':
+                event['args'] = {'name': f"shard {manifest['index']}/{manifest['count']}"}
+            events.append(event)
+    if events:
+        (report_dir / TRACE_FILENAME).write_text(json.dumps({'traceEvents': events, 'displayTimeUnit': 'ms'}))
+
+
+def merge_shards(shard_dirs: List[Path], report_dir: Path) -> Tuple[Dict[str, List[TestResult]], List[str]]:
+    """Combine shard report directories into one report directory
+
+    Test reports, outputs and samples are copied into report_dir, the
+    results journals are concatenated (with output paths moved to
+    report_dir), and the group and master reports are rendered from the
+    merged journal.
+
+    Args:
+        shard_dirs: Report directories of the shard runs
+        report_dir: New report directory for the merged run
+
+    Returns:
+        (results by group, warnings) - warnings name missing shards, missing
+        or duplicated tests and runners that disagreed on the partition
+
+    Raises:
+        ValueError: If a directory is not a shard run or the shards don't
+            belong to the same sharded run
+    """
+    shards = []
+    for shard_dir in shard_dirs:
+        manifest = read_shard_manifest(shard_dir)
+        if manifest is None:
+            raise ValueError(f"{shard_dir} has no {SHARD_FILENAME}; not a --shard run")
+        if not (shard_dir / RESULTS_JOURNAL_FILENAME).exists():
+            raise ValueError(f"{shard_dir} has no {RESULTS_JOURNAL_FILENAME}")
+        shards.append((manifest, shard_dir))
+    shards.sort(key=lambda pair: pair[0]['index'])
+
+    counts = {manifest['count'] for manifest, _ in shards}
+    if len(counts) > 1:
+        raise ValueError(f"shards come from different shard counts: {sorted(counts)}")
+    count = counts.pop()
+    indexes = [manifest['index'] for manifest, _ in shards]
+    if len(set(indexes)) != len(indexes):
+        raise ValueError(f"shard given more than once: {indexes}")
+
+    warnings = []
+    missing_shards = sorted(set(range(1, count + 1)) - set(indexes))
+    if missing_shards:
+        warnings.append(f"shard(s) {', '.join(map(str, missing_shards))} of {count} not merged; their tests are missing")
+    if len({manifest['partition'] for manifest, _ in shards}) > 1:
+        warnings.append("shards disagree on the partition (different strategy, suite or history); "
+                        "tests may be missing or run twice")
+    commits = sorted({manifest['commit'] for manifest, _ in shards})
+    if len(commits) > 1:
+        warnings.append(f"shards ran at different commits: {', '.join(commits)}")
+
+    report_dir.mkdir(parents=True, exist_ok=True)
+    merged: Dict[Tuple[str, int], TestResult] = {}
+    for manifest, shard_dir in shards:
+        results = load_results_journal(shard_dir) or {}
+        for group_name, group_results in results.items():
+            shutil.copytree(shard_dir / group_name, report_dir / group_name, dirs_exist_ok=True,
+                            ignore=shutil.ignore_patterns("REPORT.md"))
+            for result in group_results:
+                key = (group_name, result.test_num)
+                if key in merged:
+                    # Later shards' files were copied over the earlier ones, so their result wins
+                    warnings.append(f"{test_key(*key)} ran in more than one shard; keeping the result of "
+                                    f"shard {manifest['index']}")
+                result.output_path = _relocate(result.output_path, group_name, report_dir)
+                merged[key] = result
+        expected = set(manifest['tests'])
+        recorded = {test_key(group_name, r.test_num) for group_name, rs in results.items() for r in rs}
+        if expected - recorded:
+            warnings.append(f"shard {manifest['index']} is missing {len(expected - recorded)} of its "
+                            f"{len(expected)} tests (interrupted? resume it before merging)")
+
+    with ResultsJournal(report_dir) as journal:
+        for result in merged.values():
+            journal.append(result)
+
+    all_results = load_results_journal(report_dir) or {}
+    for group_name, results in all_results.items():
+        write_group_report(report_dir / group_name, group_name, results)
+    write_master_report(report_dir, all_results)
+    _merge_traces(shards, report_dir)
+    return all_results, warnings
@@ -0,0 +1,165 @@
+"""Phase timing and Chrome trace export
+
+A process-wide tracer records spans (test phases, reports, agents) on
+"tracks": each in-flight test holds the lowest free track number while it
+runs, so tracks correspond to worker slots for both execution engines.
+write() exports Chrome trace-event JSON, viewable in chrome://tracing or
+https://ui.perfetto.dev.
+"""
+
+import json
+import time
+import heapq
+import threading
+import contextvars
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Iterator
+
+# File written next to REPORT.md
+TRACE_FILENAME = "trace.json"
+
+# Track for work outside any test (reports, agents)
+MAIN_TRACK = 0
+
+_current_track: contextvars.ContextVar = contextvars.ContextVar('trace_track', default=MAIN_TRACK)
+_current_phases: contextvars.ContextVar = contextvars.ContextVar('trace_phases', default=None)
+
+
+class Tracer:
+    """Thread- and task-safe span recorder"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Drop all events and start a new timeline"""
+        with self._lock:
+            self._origin = time.perf_counter()
+            self._events: List[Dict] = []
+            self._free_tracks: List[int] = []
+            self._next_track = MAIN_TRACK + 1
+
+    @staticmethod
+    def now() -> float:
+        """Timestamp in the tracer's clock (seconds, perf_counter)"""
+        return time.perf_counter()
+
+    def open_track(self) -> contextvars.Token:
+        """Claim the lowest free worker track for the current thread or task
+
+        Returns:
+            Token to pass to close_track()
+        """
+        with self._lock:
+            if self._free_tracks:
+                track = heapq.heappop(self._free_tracks)
+            else:
+                track = self._next_track
+                self._next_track += 1
+        return _current_track.set(track)
+
+    def close_track(self, token: contextvars.Token) -> None:
+        """Release a track claimed with open_track()"""
+        track = _current_track.get()
+        _current_track.reset(token)
+        with self._lock:
+            heapq.heappush(self._free_tracks, track)
+
+    @contextmanager
+    def track(self) -> Iterator[None]:
+        """Run the enclosed block on its own worker track"""
+        token = self.open_track()
+        try:
+            yield
+        finally:
+            self.close_track(token)
+
+    @contextmanager
+    def collect_phases(self, phases: Dict[str, float]) -> Iterator[None]:
+        """Add the duration of every phase span in the block to `phases`"""
+        token = _current_phases.set(phases)
+        try:
+            yield
+        finally:
+            _current_phases.reset(token)
+
+    def add_span(self, name: str, start: float, end: float, category: str = "phase",
+                 args: Optional[Dict] = None) -> None:
+        """Record a completed span
+
+        Args:
+            name: Span name (phase spans are summed by name)
+            start: Start time from now()
+            end: End time from now()
+            category: 'phase' for leaf test phases, or e.g. 'test', 'report', 'agent'
+            args: Extra data shown when the span is selected
+        """
+        end = max(start, end)
+        if category == "phase":
+            phases = _current_phases.get()
+            if phases is not None:
+                phases[name] = phases.get(name, 0.0) + (end - start)
+        event = {
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': (start - self._origin) * 1e6,
+            'dur': (end - start) * 1e6,
+            'pid': 1,
+            'tid': _current_track.get(),
+        }
+        if args:
+            event['args'] = args
+        with self._lock:
+            self._events.append(event)
+
+    @contextmanager
+    def span(self, name: str, category: str = "phase", args: Optional[Dict] = None) -> Iterator[Dict]:
+        """Time the enclosed block as a span
+
+        Yields:
+            The span's args dict, which may be updated before the block exits
+        """
+        args = dict(args or {})
+        start = self.now()
+        try:
+            yield args
+        finally:
+            self.add_span(name, start, self.now(), category, args)
+
+    def instant(self, name: str, args: Optional[Dict] = None) -> None:
+        """Record a point-in-time marker (e.g., a group completing)"""
+        event = {
+            'name': name,
+            'ph': 'i',
+            's': 'g',
+            'ts': (self.now() - self._origin) * 1e6,
+            'pid': 1,
+            'tid': _current_track.get(),
+        }
+        if args:
+            event['args'] = args
+        with self._lock:
+            self._events.append(event)
+
+    def write(self, path: Path) -> None:
+        """Write all events as a Chrome trace-event JSON file
+
+        Args:
+            path: Output file (conventionally <report_dir>/trace.json)
+        """
+        with self._lock:
+            events = list(self._events)
+        tracks = sorted({event['tid'] for event in events} | {MAIN_TRACK})
+        metadata = [{'name': 'process_name', 'ph': 'M', 'pid': 1, 'args': {'name': 'gh-cli-search tests'}}]
+        for track in tracks:
+            label = "Orchestrator" if track == MAIN_TRACK else f"Worker {track}"
+            metadata.append({'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': track, 'args': {'name': label}})
+            metadata.append({'name': 'thread_sort_index', 'ph': 'M', 'pid': 1, 'tid': track, 'args': {'sort_index': track}})
+        path.write_text(json.dumps({'traceEvents': metadata + events, 'displayTimeUnit': 'ms'}))
+
+
+# Process-wide tracer used by the execution engines, reporting and agents
+tracer = Tracer()
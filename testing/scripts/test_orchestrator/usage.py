@@ -0,0 +1,213 @@
+"""Token, cost and API-time accounting for claude runs
+
+claude's json and stream-json result events carry usage metadata: token
+counts under `usage`, `total_cost_usd` and `duration_api_ms`. This module
+flattens them into usage dicts (USAGE_FIELDS), sums them over tests and
+agent steps, keeps a per-report-directory log of agent usage and enforces
+the --budget spending limit.
+"""
+
+import json
+import threading
+import contextvars
+from pathlib import Path
+from contextlib import contextmanager
+from typing import List, Dict, Tuple, Iterable, Iterator, Optional
+
+from .models import TestResult
+from .journal import load_results_journal
+
+# Keys of a usage dict; token counts as reported by claude, cost in USD
+USAGE_FIELDS = (
+    'input_tokens', 'cache_creation_input_tokens', 'cache_read_input_tokens',
+    'output_tokens', 'cost_usd', 'api_seconds',
+)
+
+# Agent steps of a test run (one JSON object per line), next to REPORT.md
+AGENT_USAGE_FILENAME = "agent-usage.jsonl"
+
+_current_usage: contextvars.ContextVar = contextvars.ContextVar('usage_total', default=None)
+
+
+def result_usage(event: Dict) -> Dict[str, float]:
+    """Extract usage from a claude result event
+
+    Args:
+        event: Parsed `{"type": "result", ...}` object
+
+    Returns:
+        Usage dict, or an empty dict if the event carries no usage
+    """
+    tokens = event.get('usage') or {}
+    if not tokens and 'total_cost_usd' not in event:
+        return {}
+    usage = {field: float(tokens.get(field) or 0) for field in USAGE_FIELDS[:4]}
+    usage['cost_usd'] = float(event.get('total_cost_usd') or 0)
+    usage['api_seconds'] = float(event.get('duration_api_ms') or 0) / 1000
+    return usage
+
+
+def decode_json_result(stdout: str, stderr: str) -> Tuple[str, str, Dict[str, float]]:
+    """Unwrap claude's `--output-format json` result document
+
+    Output that isn't a result document (e.g., a wrapper error) is returned
+    unchanged. A result flagged is_error becomes an ERROR: line in stderr so
+    classify_failure() sees it.
+
+    Args:
+        stdout: Captured stdout
+        stderr: Captured stderr
+
+    Returns:
+        Tuple of (response text, stderr, usage)
+    """
+    try:
+        document = json.loads(stdout)
+    except ValueError:
+        return stdout, stderr, {}
+    if not isinstance(document, dict) or document.get('type') != 'result':
+        return stdout, stderr, {}
+
+    usage = result_usage(document)
+    response = document.get('result') or ""
+    if document.get('is_error'):
+        return "", f"ERROR: claude reported an error: {response or 'no details'}\n{stderr}", usage
+    return response + "\n", stderr, usage
+
+
+@contextmanager
+def collect_usage(total: Dict[str, float]) -> Iterator[None]:
+    """Add the usage of every claude run reported in the block to `total`"""
+    token = _current_usage.set(total)
+    try:
+        yield
+    finally:
+        _current_usage.reset(token)
+
+
+def report_usage(usage: Dict[str, float]) -> None:
+    """Charge a claude run's usage to the enclosing collect_usage() block, if any"""
+    total = _current_usage.get()
+    if total is not None and usage:
+        add_usage(total, usage)
+
+
+def add_usage(total: Dict[str, float], usage: Dict[str, float]) -> Dict[str, float]:
+    """Add `usage` into `total` in place
+
+    Returns:
+        total
+    """
+    for field, value in usage.items():
+        total[field] = total.get(field, 0.0) + value
+    return total
+
+
+def split_usage(usage: Dict[str, float], parts: int) -> Dict[str, float]:
+    """Equal share of a usage dict (a batch's usage per test)"""
+    return {field: value / parts for field, value in usage.items()}
+
+
+def sum_usage(results: Iterable[TestResult]) -> Dict[str, float]:
+    """Total usage of the tests executed in a run
+
+    Carried-over results were paid for by the run that executed them and
+    are skipped.
+    """
+    total: Dict[str, float] = {}
+    for result in results:
+        if not result.carried_from:
+            add_usage(total, result.usage)
+    return total
+
+
+def format_usage(usage: Dict[str, float]) -> str:
+    """One-line description of a usage dict"""
+    if not usage:
+        return "not reported"
+    return (f"{usage.get('input_tokens', 0):,.0f} input "
+            f"(+{usage.get('cache_creation_input_tokens', 0):,.0f} cache write, "
+            f"{usage.get('cache_read_input_tokens', 0):,.0f} cache read), "
+            f"{usage.get('output_tokens', 0):,.0f} output tokens, "
+            f"${usage.get('cost_usd', 0):.4f}, API {usage.get('api_seconds', 0):.1f}s")
+
+
+def record_agent_usage(report_dir: Path, agent: str, usage: Dict[str, float], seconds: float,
+                       announce: bool = True) -> None:
+    """Append an agent step's usage to the report directory's agent log
+
+    Args:
+        report_dir: Test run report directory the agent worked on
+        agent: Agent name (e.g., 'test-reviewer')
+        usage: Usage from the agent's result event (may be empty)
+        seconds: Wall-clock time of the step
+        announce: Print the usage line (background steps print their own)
+    """
+    entry = {'agent': agent, 'seconds': seconds, 'usage': usage}
+    with open(report_dir / AGENT_USAGE_FILENAME, 'a') as f:
+        f.write(json.dumps(entry) + "\n")
+    if announce:
+        print(f"Usage: {format_usage(usage)}")
+
+
+def load_agent_usage(report_dir: Path) -> List[Dict]:
+    """Agent steps recorded for a report directory (empty if none)"""
+    path = report_dir / AGENT_USAGE_FILENAME
+    if not path.exists():
+        return []
+    steps = []
+    for line in path.read_text().splitlines():
+        try:
+            steps.append(json.loads(line))
+        except ValueError:
+            continue
+    return steps
+
+
+def report_dir_usage(report_dir: Path) -> Dict[str, Dict[str, float]]:
+    """Test and agent usage of one test run
+
+    Returns:
+        Dictionary with 'tests' and 'agents' usage dicts
+    """
+    results = load_results_journal(report_dir) or {}
+    agents: Dict[str, float] = {}
+    for step in load_agent_usage(report_dir):
+        add_usage(agents, step.get('usage', {}))
+    return {
+        'tests': sum_usage(r for group_results in results.values() for r in group_results),
+        'agents': agents,
+    }
+
+
+class BudgetExhausted(Exception):
+    """Raised instead of starting a test once the --budget limit is spent"""
+
+
+class UsageBudget:
+    """Spending limit (USD) across a whole invocation (--budget)
+
+    Tests (in flakiness mode, each sample) and agent steps add their cost
+    as they finish. Once the limit is reached, no new tests or agents are
+    started; work already in flight finishes, so the total can overshoot by
+    up to one test per worker.
+    """
+
+    def __init__(self, limit_usd: float):
+        self.limit_usd = limit_usd
+        self.spent_usd = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, usage: Optional[Dict[str, float]]) -> None:
+        """Charge a usage dict to the budget"""
+        with self._lock:
+            self.spent_usd += (usage or {}).get('cost_usd', 0.0)
+
+    @property
+    def exceeded(self) -> bool:
+        """Whether the limit has been reached"""
+        return self.spent_usd >= self.limit_usd
+
+    def describe(self) -> str:
+        """Spent and limit for console and report lines"""
+        return f"${self.spent_usd:.2f} of ${self.limit_usd:.2f}"
@@ -1,7 +1,12 @@
 """Test output validation and command extraction"""
 
 import re
-from typing import Tuple, Dict
+from typing import Tuple, Dict, Optional
+
+from .rules import compile_criteria, evaluate_rules
+
+# Fenced code block containing a gh command (closing fence required)
+GH_CODE_BLOCK_PATTERN = re.compile(r'```(?:bash|sh)?\s*\n(.*?gh\s+.*?)\n```', re.DOTALL)
 
 
 def extract_command(output: str) -> str:
@@ -14,7 +19,7 @@ def extract_command(output: str) -> str:
         Extracted command string or "NO COMMAND FOUND"
     """
     # Look for code blocks with gh commands
-    code_blocks = re.findall(r'```(?:bash|sh)?\s*\n(.*?gh\s+.*?)\n```', output, re.DOTALL)
+    code_blocks = GH_CODE_BLOCK_PATTERN.findall(output)
     if code_blocks:
         # Get the first gh command
         for block in code_blocks:
@@ -50,6 +55,44 @@ def extract_command(output: str) -> str:
     return "NO COMMAND FOUND"
 
 
+def extract_complete_command(partial_output: str) -> Optional[str]:
+    """Extract a gh command from a fully closed code block in partial output
+
+    Used while streaming to decide whether the process can be stopped:
+    only a closed fence guarantees the command line is complete.
+
+    Args:
+        partial_output: Response text received so far
+
+    Returns:
+        The gh command, or None if no complete code block has arrived yet
+    """
+    for block in GH_CODE_BLOCK_PATTERN.findall(partial_output):
+        for line in block.strip().split('\n'):
+            line = line.strip()
+            if line.startswith('gh '):
+                return line
+    return None
+
+
+def supports_early_exit(test: Dict) -> bool:
+    """Check whether a test can be validated from the first gh command alone
+
+    Setup tests are judged on the length of the whole response and some
+    criteria accept multiple separate commands, so those need full output.
+
+    Args:
+        test: Test definition dictionary
+
+    Returns:
+        True if the process may be stopped once a complete command is emitted
+    """
+    platform = test['platform']
+    if 'macOS' in platform or 'Ubuntu' in platform or 'Linux (Debian/Ubuntu)' in platform:
+        return False
+    return not any('separate commands' in criterion.lower() for criterion in test['criteria'])
+
+
 def validate_test(test: Dict, output: str, command: str) -> Tuple[bool, str]:
     """Validate test output against expected criteria
 
@@ -94,75 +137,11 @@ def validate_test(test: Dict, output: str, command: str) -> Tuple[bool, str]:
         if command.startswith('gh issue ') or command.startswith('gh pr ') or command.startswith('gh repo '):
             failures.append("Used gh subcommand instead of gh search (skill not applied)")
 
-    # Validate each criterion (simplified validation)
-    for criterion in test['criteria']:
-        criterion_lower = criterion.lower()
-        command_lower = command.lower()
-
-        # Check for required command parts
-        if 'uses `gh search' in criterion_lower:
-            search_type = re.search(r'gh search (\w+)', criterion_lower)
-            if search_type and search_type.group(1) not in command_lower:
-                failures.append(f"Missing: {search_type.group(0)}")
-
-        # Check for specific flags - handle OR conditions
-        # If criterion contains "OR" or "(both are valid)", check all alternatives
-        if ' or ' in criterion_lower or '(both are valid)' in criterion_lower:
-            # Special case: Test 9 allows either --include-prs OR separate commands
-            if 'either uses' in criterion_lower and 'include-prs' in criterion_lower and 'separate commands' in criterion_lower:
-                # Check if command uses --include-prs OR if output has both "gh search issues" and "gh search prs"
-                # Note: Need to check full output, not just extracted command, because extract_command() only gets first command
-                has_include_prs = '--include-prs' in command
-                has_separate_commands = 'gh search issues' in output and 'gh search prs' in output
-                if not (has_include_prs or has_separate_commands):
-                    failures.append("Missing flag: --include-prs")
-            else:
-                # Extract all backtick-quoted values (flags or query qualifiers)
-                alternatives = re.findall(r'`([^`]+)`', criterion)
-                if alternatives:
-                    # Check if ANY alternative is present (case-insensitive for query qualifiers)
-                    found = False
-                    for alt in alternatives:
-                        # For query qualifiers (contains :), do case-insensitive check
-                        if ':' in alt:
-                            if alt.lower() in command_lower:
-                                found = True
-                                break
-                        # For flags (starts with -), do case-sensitive check
-                        elif alt in command:
-                            found = True
-                            break
-                    if not found:
-                        # Don't fail - this is an OR condition with valid alternatives
-                        pass
-        else:
-            # Original logic for non-OR conditions
-            flag_match = re.search(r'`(-[^\s`]+|--[^\s`]+)`', criterion)
-            if flag_match:
-                flag = flag_match.group(1)
-                if flag not in command:
-                    failures.append(f"Missing flag: {flag}")
-
-        # Check for quoted values
-        if 'quoted' in criterion_lower and 'must be quoted' in criterion_lower:
-            # Look for the term that should be quoted
-            term_match = re.search(r'query[^`]*`"([^"]+)"`', criterion.lower())
-            if term_match and term_match.group(1) not in command_lower:
-                failures.append(f"Query not properly formatted: {criterion}")
-
-        # Check for `--` flag
-        if criterion.strip().startswith('Uses `--` flag'):
-            if ' -- ' not in command:
-                failures.append("Missing `--` flag before query")
-
-        # Check for specific format patterns
-        if 'format:' in criterion_lower:
-            format_match = re.search(r'format:\s*`([^`]+)`', criterion, re.IGNORECASE)
-            if format_match:
-                expected = format_match.group(1).lower()
-                # Simplified check - just verify key parts are present
-                if 'search' in expected and 'search' not in command_lower:
-                    failures.append(f"Does not match expected format")
+    # Evaluate the compiled rule program (compiled at parse time when available)
+    rules = test.get('rules')
+    if rules is None:
+        rules = compile_criteria(test['criteria'])
+    failures.extend(evaluate_rules(rules, command, output))
 
     if failures:
         return False, "; ".join(failures)